@@ -0,0 +1,243 @@
+"""
+Micro-benchmarks for the API. Requires a reachable Postgres configured through the same
+DB_* environment variables as main.py.
+
+    python bench.py games-today --requests 2000 --concurrency 50
+    python bench.py fanout --sockets 10000 --notifications 50
+    python bench.py notify --updates 5000 --games 200 --detail-bytes 2000
+
+`fanout` runs entirely in memory against fake WebSockets and needs no database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import asyncpg
+import httpx
+
+os.environ.setdefault('NO_DB', '1')  # benchmarks drive the app in-process; no LISTEN task
+
+import main
+from db import AsyncDatabase
+
+AUTH_HEADERS = {"Authorization": f"Bearer {main.AUTH_TOKEN}"}
+
+
+async def _connect_per_request_db():
+    # The pre-pool behaviour: a fresh connection (TCP + auth handshake) for every request
+    db = await AsyncDatabase.create(
+        main.DATABASE_NAME, "root", "root", main.DATABASE_HOST, main.DATABASE_PORT, minconn=1, maxconn=1
+    )
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def _drive(path: str, total: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        remaining = iter(range(total))
+
+        async def worker():
+            for _ in remaining:
+                response = await client.get(path, headers=AUTH_HEADERS)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+
+def bench_games_today(args):
+    modes = {
+        'connect': _connect_per_request_db,
+        'pool': None,  # the real get_db dependency
+    }
+
+    async def run():
+        for mode, override in modes.items():
+            main.app.dependency_overrides.clear()
+            if override is not None:
+                main.app.dependency_overrides[main.get_db] = override
+            # Warm-up so pool growth and imports are not counted
+            await _drive('/games/today', min(args.concurrency, args.requests), args.concurrency)
+            elapsed = await _drive('/games/today', args.requests, args.concurrency)
+            print(f"{mode:>8}: {args.requests} requests in {elapsed:.2f}s -> {args.requests / elapsed:,.0f} req/s")
+        main.app.dependency_overrides.clear()
+        if main._async_db is not None:
+            print(f"pool stats: {main._async_db.stats()}")
+            await main._async_db.close()
+
+    asyncio.run(run())
+
+
+class _FakeWebSocket:
+    """Accepts everything and just counts bytes, so the benchmark measures our side only."""
+    def __init__(self):
+        self.bytes_sent = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.bytes_sent += len(text)
+
+
+async def _legacy_fanout(manager, payload):
+    # The per-recipient encoding that broadcast_to_users used before BroadcastMessage
+    payload_obj = json.loads(payload)
+    key_home = (payload_obj.get('home_team'), payload_obj.get('sport'))
+    key_away = (payload_obj.get('away_team'), payload_obj.get('sport'))
+    for uid in manager.subscriptions.get(key_home, set()) | manager.subscriptions.get(key_away, set()):
+        safe_payload = main.jsonable_encoder(payload_obj)
+        safe_payload['time'] = main._normalize_time_to_z(safe_payload['time'])
+        await manager.connectionsPreferences[uid]['ws'].send_text(json.dumps(safe_payload))
+
+
+def bench_fanout(args):
+    async def run():
+        manager = main.WebsocketConnections()
+        for i in range(args.sockets):
+            await manager.connect(_FakeWebSocket(), str(i))
+            manager.register_preferences(str(i), 'Utah St.', ['Football'])
+        payload = json.dumps({
+            'id': 1, 'date': '2025-10-04', 'time': '2025-10-04 19:00:00', 'home_team': 'Utah St.',
+            'away_team': 'Wyoming', 'sport': 'Football', 'winner': 'Utah St.',
+            'score': {'home': 31, 'away': 24, 'sport_details': {'period_scores': [[7, 7, 10, 7], [3, 14, 0, 7]]}},
+        })
+
+        variants = [('per-recipient', _legacy_fanout)]
+        for backend in main.JSON_BACKENDS:
+            variants.append((f'shared/{backend}', backend))
+        for name, variant in variants:
+            if callable(variant):
+                send = lambda: variant(manager, payload)
+            else:
+                main.json_dumps = main.JSON_BACKENDS[variant]
+                send = lambda: manager.broadcast_to_users(payload)
+            start = time.perf_counter()
+            for _ in range(args.notifications):
+                await send()
+                # Include the per-connection writers' time until every queue is drained
+                while any(q.depth for q in manager.outbound.values()):
+                    await asyncio.sleep(0)
+            elapsed = time.perf_counter() - start
+            per_msg = elapsed / (args.notifications * args.sockets) * 1e6
+            print(f"{name:>15}: {args.notifications} x {args.sockets} sockets in {elapsed:.3f}s ({per_msg:.2f} us/recipient)")
+        for ws in list(manager.activeConnections.values()):
+            manager.disconnect(ws)
+
+    asyncio.run(run())
+
+
+async def _notify_round(args, mode: str):
+    """Push args.updates Game updates through notify_channel and the dispatcher in one mode."""
+    connect = dict(user="root", password="root", database=main.DATABASE_NAME,
+                   host=main.DATABASE_HOST, port=int(main.DATABASE_PORT))
+    db = await AsyncDatabase.create(main.DATABASE_NAME, "root", "root", main.DATABASE_HOST, main.DATABASE_PORT)
+    listen_conn = await asyncpg.connect(**connect)
+    writers = [await asyncpg.connect(**connect) for _ in range(args.writers)]
+    for conn in writers:
+        await conn.execute(f"SET siot.notify_mode = '{mode}'")
+    ids = [r['id'] for r in await writers[0].fetch("SELECT id FROM Game WHERE sport = 'Bench' ORDER BY id")]
+
+    done = asyncio.Event()
+    state = {'received': 0, 'bytes': 0, 'last_notify': 0.0, 'dispatched': 0}
+
+    async def broadcast(payload_obj):
+        state['dispatched'] += 1
+
+    dispatcher = main.NotificationDispatcher(broadcast, maxsize=args.updates, window=0,
+                                             fetch=db.get_games_by_ids)
+
+    def on_notify(conn, pid, channel, payload):
+        state['received'] += 1
+        state['bytes'] += len(payload)
+        dispatcher.submit(payload)
+        if state['received'] == args.updates:
+            state['last_notify'] = time.perf_counter()
+            done.set()
+
+    await listen_conn.add_listener('notify_channel', on_notify)
+    dispatcher.start()
+    detail = 'x' * args.detail_bytes
+    remaining = iter(range(args.updates))
+
+    async def writer(conn):
+        for n in remaining:
+            await conn.execute(
+                "UPDATE Game SET score = $2::jsonb WHERE id = $1",
+                ids[n % len(ids)], json.dumps({'home': n, 'away': 0, 'sport_details': {'log': detail}}),
+            )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(conn) for conn in writers))
+    written = time.perf_counter()
+    await asyncio.wait_for(done.wait(), 60)
+    while dispatcher.queue.qsize() or state['dispatched'] + dispatcher.coalesced < args.updates:
+        await asyncio.sleep(0.001)
+    dispatched = time.perf_counter()
+    stats = dispatcher.stats()
+    await dispatcher.stop()
+    await listen_conn.close()
+    for conn in writers:
+        await conn.close()
+    await db.close()
+
+    print(f"{mode:>5}: {args.updates} updates written in {written - start:.2f}s, "
+          f"notified {args.updates / (state['last_notify'] - start):,.0f}/s, "
+          f"dispatched {args.updates / (dispatched - start):,.0f}/s, "
+          f"avg payload {state['bytes'] / args.updates:,.0f} B, "
+          f"row fetch queries {stats['fetch_queries']}")
+
+
+def bench_notify(args):
+    async def run():
+        conn = await asyncpg.connect(user="root", password="root", database=main.DATABASE_NAME,
+                                     host=main.DATABASE_HOST, port=int(main.DATABASE_PORT))
+        # Throwaway schools/games under a dedicated sport, removed again afterwards
+        await conn.executemany("INSERT INTO School (Name, Sport) VALUES ($1, 'Bench') ON CONFLICT DO NOTHING",
+                               [(f"Bench Home {i}",) for i in range(args.games)] +
+                               [(f"Bench Away {i}",) for i in range(args.games)])
+        await conn.executemany(
+            "INSERT INTO Game (date, time, home_team, away_team, sport) VALUES (CURRENT_DATE, NOW(), $1, $2, 'Bench')",
+            [(f"Bench Home {i}", f"Bench Away {i}") for i in range(args.games)],
+        )
+        try:
+            for mode in ('full', 'thin'):
+                await _notify_round(args, mode)
+        finally:
+            await conn.execute("DELETE FROM Game_Change WHERE game_id IN (SELECT id FROM Game WHERE sport = 'Bench')")
+            await conn.execute("DELETE FROM Game WHERE sport = 'Bench'")
+            await conn.execute("DELETE FROM School WHERE sport = 'Bench'")
+            await conn.close()
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('games-today', help='requests/second for GET /games/today, connect-per-request vs pooled')
+    p.add_argument('--requests', type=int, default=2000)
+    p.add_argument('--concurrency', type=int, default=50)
+    p.set_defaults(func=bench_games_today)
+
+    p = sub.add_parser('fanout', help='broadcast_to_users cost to N fake WebSockets, per-recipient vs shared encoding')
+    p.add_argument('--sockets', type=int, default=10000)
+    p.add_argument('--notifications', type=int, default=50)
+    p.set_defaults(func=bench_fanout)
+
+    p = sub.add_parser('notify', help='notify_channel throughput with full-row vs thin (id + seq) payloads')
+    p.add_argument('--updates', type=int, default=5000)
+    p.add_argument('--games', type=int, default=200)
+    p.add_argument('--writers', type=int, default=4)
+    p.add_argument('--detail-bytes', type=int, default=2000, help='size of score.sport_details per row')
+    p.set_defaults(func=bench_notify)
+
+    args = parser.parse_args()
+    args.func(args)
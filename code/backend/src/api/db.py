@@ -1,6 +1,20 @@
 import psycopg2
+import asyncpg
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import date, datetime, time
 import json  # JSON parsing
+import os
+import sys
+
+# known_entities.py is shared with the scraper: it lives in ../common and is copied next to this file in the image
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'common'))
+from known_entities import KnownEntityCache, known_entities
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes available within the checkout timeout."""
+
 
 class Database:
     def __init__(self, dbname, user, password, host, port):
@@ -383,11 +397,25 @@ class Database:
         self.conn.close()
 
 
+    def _rollback(self):
+        # A failed write may mean a cached school or sport is gone, so re-read them next time
+        self.conn.rollback()
+        known_entities.invalidate()
+
+    def _known_entities(self):
+        if not known_entities.warmed:
+            self.cur.execute(KnownEntityCache.WARM_QUERY)
+            known_entities.warm(self.cur.fetchall())
+            self.conn.commit()
+        return known_entities
+
     def insert_school(self, name, sport):
+        if self._known_entities().has_school(name, sport):
+            return
         try:
             self.cur.execute("SELECT name, sport FROM school WHERE name = %s AND sport = %s", (name, sport))
         except Exception:
-            self.conn.rollback()
+            self._rollback()
             self.cur.execute("SELECT name, sport FROM school WHERE name = %s AND sport = %s", (name, sport))
 
         exists = False
@@ -400,11 +428,13 @@ class Database:
             try:
                 self.cur.execute("INSERT INTO school (name, sport) VALUES (%s, %s)", (name, sport))
                 self.conn.commit()
+                known_entities.add_school(name, sport)
             except Exception:
-                self.conn.rollback()
+                self._rollback()
         else:
             # No-op but ensure clean transaction
             self.conn.commit()
+            known_entities.add_school(name, sport)
 
     def insert_game(self, g):
         self.cur.execute(
@@ -464,6 +494,8 @@ class Database:
         return deleted
 
     def insert_sport(self, name):
+        if self._known_entities().has_sport(name):
+            return
         self.cur.execute("SELECT name FROM sport WHERE name = %s", (name,))
 
         exists = False
@@ -476,6 +508,7 @@ class Database:
             self.cur.execute("INSERT INTO sport (name) VALUES (%s)", (name,))
 
         self.conn.commit()
+        known_entities.add_sport(name)
 
     def get_user(self, uid):
         query = """
@@ -502,7 +535,7 @@ class Database:
             )
             self.conn.commit()
         except Exception:
-            self.conn.rollback()
+            self._rollback()
             raise
 
     def delete_follow(self, uid: str, school: str, sport: str):
@@ -513,7 +546,7 @@ class Database:
             )
             self.conn.commit()
         except Exception:
-            self.conn.rollback()
+            self._rollback()
             raise
 
     # --- Device registration and connection state ---
@@ -529,7 +562,7 @@ class Database:
             )
             self.conn.commit()
         except Exception:
-            self.conn.rollback()
+            self._rollback()
             raise
 
     def mark_connected(self, uid: str):
@@ -540,7 +573,7 @@ class Database:
             )
             self.conn.commit()
         except Exception:
-            self.conn.rollback()
+            self._rollback()
             raise
 
     def mark_disconnected(self, uid: str):
@@ -551,7 +584,7 @@ class Database:
             )
             self.conn.commit()
         except Exception:
-            self.conn.rollback()
+            self._rollback()
             raise
 
     def replace_follows(self, uid: str, school: str, sports: list[str]):
@@ -569,5 +602,386 @@ class Database:
                 self.set_follow(uid, school, sp)
             self.conn.commit()
         except Exception:
-            self.conn.rollback()
+            self._rollback()
             raise
+
+
+class AsyncDatabase:
+    """
+    asyncio counterpart of Database backed by an asyncpg connection pool. Method names, arguments
+    and return shapes mirror Database so routes can switch by adding `await`. Each call borrows a
+    pooled connection only for the duration of its own statement(s). With `check_on_borrow`
+    enabled, each connection is pinged before it is lent so that connections dropped by the
+    server (restart, idle timeout) are replaced transparently.
+    """
+
+    GAME_COLUMNS = "date, time, away_team, home_team, score, winner, sport"
+    GAME_COLUMNS_WITH_ID = "id, date, time, away_team, home_team, score, winner, sport"
+
+    def __init__(self, pool, timeout=5.0, check_on_borrow=True):
+        self.pool = pool
+        self.timeout = timeout
+        self.check_on_borrow = check_on_borrow
+
+    @classmethod
+    async def create(cls, dbname, user, password, host, port, minconn=1, maxconn=10, timeout=5.0,
+                     check_on_borrow=True):
+        pool = await asyncpg.create_pool(
+            database=dbname,
+            user=user,
+            password=password,
+            host=host,
+            port=int(port),
+            min_size=min(minconn, maxconn),
+            max_size=maxconn,
+            init=cls._init_connection,
+        )
+        return cls(pool, timeout=timeout, check_on_borrow=check_on_borrow)
+
+    @staticmethod
+    async def _init_connection(conn):
+        # Decode json/jsonb to Python objects (and encode them back) like the psycopg2 path does
+        for typename in ("json", "jsonb"):
+            await conn.set_type_codec(typename, encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+    async def _healthy(self, conn):
+        if conn.is_closed():
+            return False
+        if not self.check_on_borrow:
+            return True
+        try:
+            await conn.fetchval("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    @asynccontextmanager
+    async def _acquire(self):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while True:
+            try:
+                conn = await self.pool.acquire(timeout=max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                raise PoolTimeout(f"no database connection available within {self.timeout}s")
+            if await self._healthy(conn):
+                break
+            # Drop the dead connection; the pool opens a fresh one on the next acquire
+            conn.terminate()
+            await self.pool.release(conn)
+        try:
+            yield conn
+        except asyncpg.IntegrityConstraintViolationError:
+            # e.g. a game referencing a school the cache still lists but that was deleted
+            known_entities.invalidate()
+            raise
+        finally:
+            await self.pool.release(conn)
+
+    async def close(self):
+        await self.pool.close()
+
+    def stats(self):
+        size = self.pool.get_size()
+        idle = self.pool.get_idle_size()
+        return {"size": size, "idle": idle, "in_use": size - idle, "max": self.pool.get_max_size()}
+
+    @staticmethod
+    def _text(value):
+        # Date/timestamp parameters are sent as text and cast server-side, so callers may keep
+        # passing the same strings ('2025-04-06', '10/16/2025', '2025-10-16 19:00:00+00:00') as before
+        if value is None:
+            return None
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return str(value)
+
+    @staticmethod
+    def _jsonable(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, time):
+            return value.strftime("%H:%M:%S")
+        return value
+
+    def _parse_rows(self, records):
+        return [{k: self._jsonable(v) for k, v in record.items()} for record in records]
+
+    async def _fetch(self, query, *args):
+        async with self._acquire() as conn:
+            return await conn.fetch(query, *args)
+
+    async def _fetch_games(self, where, *args):
+        records = await self._fetch(f"SELECT {self.GAME_COLUMNS} FROM Game {where}", *args)
+        return self._parse_rows(records)
+
+    async def _fetch_games_with_id(self, where, *args):
+        records = await self._fetch(f"SELECT {self.GAME_COLUMNS_WITH_ID} FROM Game {where}", *args)
+        return self._parse_rows(records)
+
+    async def _execute(self, query, *args):
+        async with self._acquire() as conn:
+            return await conn.execute(query, *args)
+
+    @staticmethod
+    def _rowcount(status):
+        # asyncpg returns the command tag, e.g. 'UPDATE 1' / 'DELETE 0'
+        try:
+            return int(status.split()[-1])
+        except (AttributeError, ValueError, IndexError):
+            return 0
+
+    async def get_games(self):
+        return await self._fetch_games("")
+
+    async def get_games_with_team(self, team_name):
+        return await self._fetch_games("WHERE away_team = $1 OR home_team = $1", team_name)
+
+    async def get_games_by_sport(self, sport_name):
+        return await self._fetch_games("WHERE sport = $1", sport_name)
+
+    async def get_games_by_date(self, game_date):
+        return await self._fetch_games("WHERE date = $1::text::date", self._text(game_date))
+
+    async def get_games_by_time(self, game_time):
+        return await self._fetch_games("WHERE time = $1::text::timestamp", self._text(game_time))
+
+    async def get_games_by_score(self, min_score):
+        return await self._fetch_games(
+            "WHERE CAST(score->>'home' AS INTEGER) >= $1 OR CAST(score->>'away' AS INTEGER) >= $1",
+            int(min_score),
+        )
+
+    async def get_games_by_date_and_time(self, game_date, game_time):
+        return await self._fetch_games(
+            "WHERE date = $1::text::date AND time = $2::text::timestamp",
+            self._text(game_date),
+            self._text(game_time),
+        )
+
+    async def get_teams_playing_on_date(self, game_date):
+        records = await self._fetch(
+            "SELECT DISTINCT away_team, home_team FROM Game WHERE date = $1::text::date",
+            self._text(game_date),
+        )
+        team_list = set()
+        for record in records:
+            team_list.add(record["away_team"])
+            team_list.add(record["home_team"])
+        return list(team_list)
+
+    async def get_sports_playing_on_date(self, game_date):
+        records = await self._fetch(
+            "SELECT DISTINCT sport FROM Game WHERE date = $1::text::date",
+            self._text(game_date),
+        )
+        return [record["sport"] for record in records]
+
+    async def get_followed_games(self, device_uid):
+        records = await self._fetch(
+            """
+            SELECT g.date, g.time, g.away_team, g.home_team, g.score, g.winner, g.sport
+            FROM Game g
+            JOIN deviceuser du ON (g.sport = du.followed_sport AND (g.home_team = du.followed_school OR g.away_team = du.followed_school))
+            WHERE du.uid = $1
+            """,
+            device_uid,
+        )
+        return self._parse_rows(records)
+
+    async def get_game_by_id(self, game_id: int):
+        async with self._acquire() as conn:
+            record = await conn.fetchrow(
+                f"SELECT {self.GAME_COLUMNS_WITH_ID} FROM Game WHERE id = $1", int(game_id)
+            )
+        return dict(record) if record else None
+
+    async def get_games_by_ids(self, game_ids):
+        """Current rows for a batch of ids in one round trip; ids that no longer exist are absent."""
+        if not game_ids:
+            return []
+        return await self._fetch_games_with_id(
+            "WHERE id = ANY($1::bigint[])", [int(i) for i in game_ids]
+        )
+
+    async def get_latest_games_for_team_by_sports(self, school: str, sports: list):
+        results = []
+        async with self._acquire() as conn:
+            for sport in sports or []:
+                record = await conn.fetchrow(
+                    f"""
+                    SELECT {self.GAME_COLUMNS_WITH_ID}
+                    FROM Game
+                    WHERE sport = $1 AND (home_team = $2 OR away_team = $2)
+                    ORDER BY date DESC, time DESC NULLS LAST
+                    LIMIT 1
+                    """,
+                    sport,
+                    school,
+                )
+                if record:
+                    results.append(dict(record))
+        return results
+
+    async def get_recent_games_for_team_by_sports(self, school: str, sports: list, hours: int = 24):
+        if not sports:
+            return []
+        records = await self._fetch(
+            f"""
+            SELECT {self.GAME_COLUMNS_WITH_ID}
+            FROM Game
+            WHERE sport = ANY($1::text[])
+              AND (home_team = $2 OR away_team = $2)
+              AND COALESCE(time, date::timestamp) >= (NOW() - make_interval(hours => $3))
+            ORDER BY COALESCE(time, date::timestamp) DESC
+            """,
+            list(sports),
+            school,
+            int(hours),
+        )
+        return [dict(record) for record in records]
+
+    async def add_game(self, game):
+        async with self._acquire() as conn:
+            async with conn.transaction():
+                status = await conn.execute(
+                    """
+                    UPDATE Game
+                    SET score = $1, winner = $2, time = $3::text::timestamp
+                    WHERE away_team = $4 AND home_team = $5 AND sport = $6 AND date = $7::text::date
+                    """,
+                    game["score"],
+                    game["winner"],
+                    self._text(game["time"]),
+                    game["away_team"],
+                    game["home_team"],
+                    game["sport"],
+                    self._text(game["date"]),
+                )
+                if self._rowcount(status) == 0:
+                    await conn.execute(
+                        """
+                        INSERT INTO Game (date, time, away_team, home_team, score, winner, sport)
+                        VALUES ($1::text::date, $2::text::timestamp, $3, $4, $5, $6, $7)
+                        """,
+                        self._text(game["date"]),
+                        self._text(game["time"]),
+                        game["away_team"],
+                        game["home_team"],
+                        game["score"],
+                        game["winner"],
+                        game["sport"],
+                    )
+
+    async def update_game_winner(self, game_id, winner):
+        status = await self._execute("UPDATE Game SET winner = $1 WHERE id = $2", winner, int(game_id))
+        return self._rowcount(status)
+
+    async def get_id_by_team(self, team, sport):
+        records = await self._fetch(
+            "SELECT uid FROM deviceuser WHERE followed_school = $1 and followed_sport = $2", team, sport
+        )
+        return ",".join(str(record["uid"]) for record in records)
+
+    async def _known_entities(self):
+        if not known_entities.warmed:
+            known_entities.warm(tuple(record) for record in await self._fetch(KnownEntityCache.WARM_QUERY))
+        return known_entities
+
+    async def insert_school(self, name, sport):
+        if (await self._known_entities()).has_school(name, sport):
+            return
+        await self._execute(
+            "INSERT INTO school (name, sport) VALUES ($1, $2) ON CONFLICT DO NOTHING", name, sport
+        )
+        known_entities.add_school(name, sport)
+
+    async def insert_game(self, g):
+        await self._execute(
+            """
+            INSERT INTO game (date, time, away_team, home_team, score, winner, sport)
+            VALUES ($1::text::date, $2::text::timestamp, $3, $4, $5, $6, $7)
+            ON CONFLICT (home_team, away_team, sport) DO UPDATE
+            SET date = EXCLUDED.date, time = EXCLUDED.time, score = EXCLUDED.score, winner = EXCLUDED.winner
+            WHERE (game.date, game.time, game.score, game.winner)
+                  IS DISTINCT FROM (EXCLUDED.date, EXCLUDED.time, EXCLUDED.score, EXCLUDED.winner)
+            """,
+            self._text(g["date"]),
+            self._text(g["time"]),
+            g["away_team"],
+            g["home_team"],
+            g["score"],
+            g["winner"],
+            g["sport"],
+        )
+
+    async def delete_game_by_id(self, game_id: int):
+        status = await self._execute("DELETE FROM Game WHERE id = $1", int(game_id))
+        return self._rowcount(status) > 0
+
+    async def insert_sport(self, name):
+        if (await self._known_entities()).has_sport(name):
+            return
+        await self._execute("INSERT INTO sport (name) VALUES ($1) ON CONFLICT DO NOTHING", name)
+        known_entities.add_sport(name)
+
+    async def get_user(self, uid):
+        records = await self._fetch(
+            "SELECT followed_school, followed_sport FROM deviceuser WHERE uid = $1", uid
+        )
+        return [tuple(record) for record in records]
+
+    FOLLOW_QUERY = """
+        INSERT INTO deviceuser (uid, followed_school, followed_sport)
+        VALUES ($1, $2, $3)
+        ON CONFLICT (uid, followed_school, followed_sport) DO NOTHING
+    """
+
+    async def set_follow(self, uid: str, school: str, sport: str):
+        await self._execute(self.FOLLOW_QUERY, uid, school, sport)
+
+    async def delete_follow(self, uid: str, school: str, sport: str):
+        await self._execute(
+            "DELETE FROM deviceuser WHERE uid = $1 AND followed_school = $2 AND followed_sport = $3",
+            uid, school, sport,
+        )
+
+    # --- Device registration and connection state ---
+    async def upsert_device(self, uid: str, school: str | None):
+        await self._execute(
+            """
+            INSERT INTO device (uid, school, connected, last_connect, last_seen)
+            VALUES ($1, $2, false, NULL, NOW())
+            ON CONFLICT (uid) DO UPDATE SET school = EXCLUDED.school, last_seen = NOW()
+            """,
+            uid, school,
+        )
+
+    async def mark_connected(self, uid: str):
+        await self._execute(
+            "UPDATE device SET connected = true, last_connect = NOW(), last_seen = NOW() WHERE uid = $1", uid
+        )
+
+    async def mark_disconnected(self, uid: str):
+        await self._execute(
+            "UPDATE device SET connected = false, last_disconnect = NOW(), last_seen = NOW() WHERE uid = $1", uid
+        )
+
+    async def replace_follows(self, uid: str, school: str, sports: list[str]):
+        sports = list(sports or [])
+        async with self._acquire() as conn:
+            async with conn.transaction():
+                # Ensure School rows exist
+                if sports:
+                    await conn.executemany(
+                        "INSERT INTO school (name, sport) VALUES ($1, $2) ON CONFLICT DO NOTHING",
+                        [(school, sp) for sp in sports],
+                    )
+                # Remove any follows not in the new list
+                await conn.execute(
+                    "DELETE FROM deviceuser WHERE uid = $1 AND followed_school = $2 AND followed_sport <> ALL($3::text[])",
+                    uid, school, sports if sports else ['__none__'],
+                )
+                # Add (or keep) new follows
+                if sports:
+                    await conn.executemany(self.FOLLOW_QUERY, [(uid, school, sp) for sp in sports])
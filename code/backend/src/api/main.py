@@ -1,16 +1,21 @@
 from fastapi import FastAPI, Depends, HTTPException, WebSocket, WebSocketDisconnect, Header
-from db import Database
+from db import AsyncDatabase, PoolTimeout, known_entities
 from typing import Dict, List, Any, Union, Generator
 import os
 import uvicorn
 import datetime
 import asyncio
 import asyncpg
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.encoders import jsonable_encoder
 import httpx
 import json
 import os
+from collections import defaultdict, deque
+try:
+    import orjson
+except ImportError:  # optional: faster JSON encoding for WebSocket fan-out
+    orjson = None
 # from dotenv import load_dotenv 
 
 # load_dotenv()
@@ -19,50 +24,253 @@ DATABASE_NAME = os.getenv('DB_NAME', 'sportsiot')
 DATABASE_HOST = os.getenv('DB_HOST', 'localhost')
 DATABASE_PORT = os.getenv('DB_PORT', '9001')
 
+# Connection pool sizing for the shared AsyncDatabase
+DATABASE_POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))
+DATABASE_POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))
+DATABASE_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))
+DATABASE_POOL_CHECK = os.getenv('DB_POOL_CHECK', '1') in ('1', 'true', 'True')
+
 AUTH_TOKEN = 'abc123'
 from datetime import date
 
+def _dumps_stdlib(obj) -> str:
+    return json.dumps(obj)
+
+def _dumps_orjson(obj) -> str:
+    return orjson.dumps(obj).decode('utf-8')
+
+# JSON encoder used for outbound WebSocket messages: 'orjson' (default when installed) or 'json'
+JSON_BACKENDS = {'json': _dumps_stdlib}
+if orjson is not None:
+    JSON_BACKENDS['orjson'] = _dumps_orjson
+WS_JSON_BACKEND = os.getenv('WS_JSON_BACKEND', 'orjson' if orjson is not None else 'json')
+if WS_JSON_BACKEND not in JSON_BACKENDS:
+    print(f"WS_JSON_BACKEND={WS_JSON_BACKEND} unavailable; falling back to json")
+    WS_JSON_BACKEND = 'json'
+json_dumps = JSON_BACKENDS[WS_JSON_BACKEND]
+
+class BroadcastMessage:
+    """A game notification encoded once (time normalized to Z) and shared by every recipient."""
+    __slots__ = ('payload', 'game_id', 'text')
+
+    def __init__(self, payload: dict):
+        safe_payload = jsonable_encoder(payload)
+        if isinstance(safe_payload, dict) and isinstance(safe_payload.get('time'), str):
+            safe_payload['time'] = _normalize_time_to_z(safe_payload['time'])
+        self.payload = safe_payload
+        self.game_id = safe_payload.get('id') if isinstance(safe_payload, dict) else None
+        self.text = json_dumps(safe_payload)
+
+# Per-connection outbound buffering. When a device's queue is full the policy decides what gives:
+#   drop_oldest - discard the oldest queued message
+#   coalesce    - replace a queued message for the same game id (else drop the oldest)
+#   disconnect  - close the slow connection
+WS_QUEUE_SIZE = int(os.getenv('WS_QUEUE_SIZE', '32'))
+WS_QUEUE_POLICY = os.getenv('WS_QUEUE_POLICY', 'coalesce')
+WS_SEND_TIMEOUT = float(os.getenv('WS_SEND_TIMEOUT', '10'))
+WS_QUEUE_POLICIES = ('drop_oldest', 'coalesce', 'disconnect')
+if WS_QUEUE_POLICY not in WS_QUEUE_POLICIES:
+    print(f"Unknown WS_QUEUE_POLICY={WS_QUEUE_POLICY}; using coalesce")
+    WS_QUEUE_POLICY = 'coalesce'
+
+class OutboundQueue:
+    """
+    Bounded send buffer for one WebSocket, drained by its own writer task so that a slow or
+    half-dead device only ever delays itself. put() never blocks.
+    """
+
+    def __init__(self, websocket: WebSocket, on_failure, maxsize: int = WS_QUEUE_SIZE,
+                 policy: str = WS_QUEUE_POLICY, send_timeout: float = WS_SEND_TIMEOUT):
+        self.ws = websocket
+        self.on_failure = on_failure
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.send_timeout = send_timeout if send_timeout and send_timeout > 0 else None
+        self._pending = deque()  # (game_id | None, text)
+        self._ready = asyncio.Event()
+        self._task = None
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._writer())
+
+    def close(self):
+        self.closed = True
+        self._pending.clear()
+        self._ready.set()  # wake the writer so it exits even if the cancellation is swallowed
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def put(self, text: str, key=None) -> bool:
+        """Queue text for sending. Returns False when the connection should be dropped instead."""
+        if self.closed:
+            return False
+        if len(self._pending) >= self.maxsize:
+            if self.policy == 'disconnect':
+                self.dropped += 1
+                return False
+            if self.policy == 'coalesce' and key is not None:
+                for i, (queued_key, _) in enumerate(self._pending):
+                    if queued_key == key:
+                        self._pending[i] = (key, text)
+                        self.coalesced += 1
+                        return True
+            self._pending.popleft()
+            self.dropped += 1
+        self._pending.append((key, text))
+        self._ready.set()
+        return True
+
+    async def _writer(self):
+        try:
+            while not self.closed:
+                if not self._pending:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                _, text = self._pending.popleft()
+                async with asyncio.timeout(self.send_timeout):
+                    await self.ws.send_text(text)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"WS writer stopped: {e!r}")
+            self.closed = True
+            self.on_failure(self.ws)
+
+    def stats(self) -> dict:
+        return {'depth': self.depth, 'sent': self.sent, 'dropped': self.dropped, 'coalesced': self.coalesced}
+
 class WebsocketConnections:
 
     def __init__(self):
-        self.activeConnections = []  # legacy list (kept for compatibility)
+        # Legacy broadcast-to-everyone targets, keyed by id(websocket) so removal is O(1)
+        self.activeConnections = {}
         # Map: user_id (str) -> { 'ws': WebSocket, 'school': str | None, 'sports': list[str] }
         self.connectionsPreferences = {}
+        # Subscription index: (school, sport) -> set of user_ids following that pairing
+        self.subscriptions = defaultdict(set)
+        # Reverse map: id(websocket) -> user_id (Starlette WebSockets are not hashable)
+        self.userByWebsocket = {}
+        # id(websocket) -> OutboundQueue; every send goes through the connection's own writer
+        self.outbound = {}
+
+    def _index(self, user_id: str):
+        info = self.connectionsPreferences.get(user_id)
+        if not info or not info.get('school') or not isinstance(info.get('sports'), list):
+            return
+        for sport in info['sports']:
+            self.subscriptions[(info['school'], sport)].add(user_id)
+
+    def _unindex(self, user_id: str):
+        info = self.connectionsPreferences.get(user_id)
+        if not info or not info.get('school') or not isinstance(info.get('sports'), list):
+            return
+        for sport in info['sports']:
+            key = (info['school'], sport)
+            subscribers = self.subscriptions.get(key)
+            if subscribers is not None:
+                subscribers.discard(user_id)
+                if not subscribers:
+                    del self.subscriptions[key]
 
     async def connect(self, websocket: WebSocket, client_id):
         try:
             await websocket.accept()
-            self.activeConnections.append(websocket)
-            self.connectionsPreferences[str(client_id)] = {
+            user_id = str(client_id)
+            previous = self.connectionsPreferences.get(user_id)
+            if previous is not None:
+                # Same id reconnecting: forget the stale socket before taking over the slot
+                self.disconnect(previous['ws'])
+            self.activeConnections[id(websocket)] = websocket
+            queue = OutboundQueue(websocket, self._on_send_failure)
+            queue.start()
+            self.outbound[id(websocket)] = queue
+            self.connectionsPreferences[user_id] = {
                 'ws': websocket,
                 'school': None,
                 'sports': []
             }
+            self.userByWebsocket[id(websocket)] = user_id
         except Exception as e:
             print(e)
 
     def disconnect(self, websocket: WebSocket):
-        try:
-            self.activeConnections.remove(websocket)
-        except ValueError:
-            pass
-        to_delete = None
-        for uid, info in self.connectionsPreferences.items():
-            if info.get('ws') is websocket:
-                to_delete = uid
-                break
-        if to_delete:
-            self.connectionsPreferences.pop(to_delete, None)
+        self.activeConnections.pop(id(websocket), None)
+        queue = self.outbound.pop(id(websocket), None)
+        if queue is not None:
+            queue.close()
+        user_id = self.userByWebsocket.pop(id(websocket), None)
+        if user_id is not None:
+            info = self.connectionsPreferences.get(user_id)
+            if info is not None and info.get('ws') is websocket:
+                try:
+                    self._unindex(user_id)
+                finally:
+                    self.connectionsPreferences.pop(user_id, None)
 
     def get_info_by_websocket(self, websocket: WebSocket):
-        for uid, info in self.connectionsPreferences.items():
-            if info.get('ws') is websocket:
-                return uid, info
-        return None, None
+        user_id = self.userByWebsocket.get(id(websocket))
+        if user_id is None:
+            return None, None
+        info = self.connectionsPreferences.get(user_id)
+        if info is None or info.get('ws') is not websocket:
+            return None, None
+        return user_id, info
+
+    def _drop(self, websocket: WebSocket):
+        """Disconnect from the send side. The endpoint's finally won't find the uid once the
+        mapping is gone, so the device is marked disconnected here instead."""
+        key_uid, info = self.get_info_by_websocket(websocket)
+        uid = (info.get('uid') or key_uid) if info is not None else None
+        self.disconnect(websocket)
+        if uid:
+            asyncio.create_task(_mark_device_disconnected(uid))
+
+    def _on_send_failure(self, websocket: WebSocket):
+        self._drop(websocket)
+
+    def _drop_slow_consumer(self, websocket: WebSocket):
+        uid = self.userByWebsocket.get(id(websocket))
+        print(f"WS queue full for user {uid}; disconnecting slow consumer")
+        self._drop(websocket)
+
+        async def _close():
+            try:
+                await websocket.close(code=1013)  # Try Again Later
+            except Exception:
+                pass
+        asyncio.create_task(_close())
+
+    def send(self, websocket: WebSocket, text: str, key=None):
+        """Non-blocking enqueue onto the connection's outbound queue."""
+        queue = self.outbound.get(id(websocket))
+        if queue is not None and not queue.put(text, key):
+            self._drop_slow_consumer(websocket)
+
+    def stats(self) -> dict:
+        per_connection = {}
+        for ws_id, queue in self.outbound.items():
+            per_connection[self.userByWebsocket.get(ws_id, str(ws_id))] = queue.stats()
+        return {
+            'connections': len(self.outbound),
+            'queued': sum(s['depth'] for s in per_connection.values()),
+            'dropped': sum(s['dropped'] for s in per_connection.values()),
+            'coalesced': sum(s['coalesced'] for s in per_connection.values()),
+            'per_connection': per_connection,
+        }
 
     async def broadcastAll(self, payload):
-        for connections in self.activeConnections:
-            await connections.send_text(payload)
+        for connections in list(self.activeConnections.values()):
+            self.send(connections, payload)
 
     # def sendReply(self, clientID, payload):
     #     """Disabled pending redesign; legacy code contained errors and undefined vars."""
@@ -76,8 +284,8 @@ class WebsocketConnections:
         except Exception:
             winner = {"winner": str(winningTeam), "sport": ""}
         message = f"{winner.get('winner','')}, {winner.get('sport','')}"
-        for ws in self.activeConnections:
-            await ws.send_text(message)
+        for ws in list(self.activeConnections.values()):
+            self.send(ws, message)
 
     async def broadcast_to_users(self, payload):
         # Forward only final updates (winner present) to interested users registered via WS
@@ -90,42 +298,168 @@ class WebsocketConnections:
         if winner in (None, ""):
             return  # Only push when a game goes final
 
-        # Normalize time fields to Z when possible
-        if 'time' in payload_obj and isinstance(payload_obj['time'], str):
-            payload_obj['time'] = _normalize_time_to_z(payload_obj['time'])
-
         home_team = payload_obj.get('home_team')
         away_team = payload_obj.get('away_team')
         sport = payload_obj.get('sport')
 
-        for uid, info in list(self.connectionsPreferences.items()):
-            ws = info.get('ws')
-            school = info.get('school')
-            sports = info.get('sports') or []
-            if ws is None:
-                continue
-            if sport in sports and (school == home_team or school == away_team):
-                try:
-                    # Ensure serializable form before sending
-                    safe_payload = jsonable_encoder(payload_obj)
-                    if isinstance(safe_payload, dict) and 'time' in safe_payload and isinstance(safe_payload['time'], str):
-                        safe_payload['time'] = _normalize_time_to_z(safe_payload['time'])
-                    await ws.send_text(json.dumps(safe_payload))
-                except Exception as e:
-                    print(f"WS send error for user {uid}: {e}")
-                    self.disconnect(ws)
+        # Only the devices following (home_team, sport) or (away_team, sport) are visited
+        interested = self.subscriptions.get((home_team, sport), set()) | self.subscriptions.get((away_team, sport), set())
+        if not interested:
+            return
+        # Encode once; every recipient gets the same text, enqueued without awaiting the socket
+        message = BroadcastMessage(payload_obj)
+        for uid in interested:
+            info = self.connectionsPreferences.get(uid)
+            ws = info.get('ws') if info else None
+            if ws is not None:
+                self.send(ws, message.text, key=message.game_id)
 
     def register_preferences(self, user_id: str, school: str, sports: list[str], uid: str | None = None):
         entry = self.connectionsPreferences.get(str(user_id))
         if entry is not None:
-            entry['school'] = school
-            entry['sports'] = sports or []
+            self._unindex(str(user_id))
+            # Straight from the client's first message: only strings can be subscription keys
+            entry['school'] = school if isinstance(school, str) else None
+            entry['sports'] = [sport for sport in sports if isinstance(sport, str)] if isinstance(sports, list) else []
             if uid is not None:
                 entry['uid'] = uid
             self.connectionsPreferences[str(user_id)] = entry
+            self._index(str(user_id))
 
 manager = WebsocketConnections()
 
+# Postgres NOTIFY intake: bounded queue plus a coalescing window (seconds) per dispatch batch
+NOTIFY_QUEUE_SIZE = int(os.getenv('NOTIFY_QUEUE_SIZE', '1024'))
+NOTIFY_COALESCE_WINDOW = float(os.getenv('NOTIFY_COALESCE_WINDOW', '0.05'))
+
+class NotificationDispatcher:
+    """
+    Single consumer for game-change notifications. Payloads are queued (bounded) by the LISTEN
+    callback and fanned out by one task, so updates are delivered in arrival order. Successive
+    updates to the same Game.id that land within `window` seconds are collapsed to the latest.
+
+    Thin payloads ({id, seq, thin}, see game_notify_payload in init.sql) carry no row; the rows
+    for all thin entries in a batch are loaded with one `fetch(ids)` call before fan-out.
+    """
+
+    def __init__(self, broadcast, maxsize: int = NOTIFY_QUEUE_SIZE, window: float = NOTIFY_COALESCE_WINDOW, fetch=None):
+        self.broadcast = broadcast
+        self.fetch = fetch
+        self.window = max(0.0, window)
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self._task = None
+        self.received = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.dispatched = 0
+        self.fetch_queries = 0
+        self.fetched = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def submit(self, payload):
+        """Non-blocking enqueue; called from the asyncpg listener callback."""
+        self.received += 1
+        try:
+            self.queue.put_nowait((asyncio.get_running_loop().time(), payload))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print(f"Notification queue full ({self.queue.maxsize}); dropped an update")
+
+    def _add(self, batch: dict, enqueued_at: float, payload):
+        try:
+            payload_obj = json.loads(payload) if isinstance(payload, str) else payload
+        except Exception:
+            return
+        if not isinstance(payload_obj, dict):
+            return
+        key = payload_obj.get('id')
+        if key is None:
+            key = ('anon', len(batch))
+        elif key in batch:
+            # Keep the first arrival time (for lag) and slot (for ordering), take the newest row
+            self.coalesced += 1
+            enqueued_at = batch[key][0]
+        batch[key] = (enqueued_at, payload_obj)
+
+    async def _resolve_thin(self, batch: dict):
+        """Replace thin payloads with the current rows; games that can't be loaded are dropped."""
+        thin_ids = [key for key, (_, payload_obj) in batch.items() if payload_obj.get('thin')]
+        if not thin_ids:
+            return
+        rows = []
+        if self.fetch is not None:
+            try:
+                rows = await self.fetch(thin_ids)
+                self.fetch_queries += 1
+            except Exception as e:
+                print(f"Could not load {len(thin_ids)} changed games: {e}")
+        by_id = {row['id']: row for row in rows}
+        self.fetched += len(by_id)
+        for key in thin_ids:
+            enqueued_at, payload_obj = batch[key]
+            row = by_id.get(key)
+            if row is None:
+                del batch[key]
+            else:
+                batch[key] = (enqueued_at, {**row, 'seq': payload_obj.get('seq')})
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = {}
+            self._add(batch, *await self.queue.get())
+            if self.window:
+                await asyncio.sleep(self.window)
+            while True:
+                try:
+                    self._add(batch, *self.queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            await self._resolve_thin(batch)
+            for enqueued_at, payload_obj in batch.values():
+                lag = loop.time() - enqueued_at
+                self.last_lag = lag
+                self.max_lag = max(self.max_lag, lag)
+                try:
+                    await self.broadcast(payload_obj)
+                except Exception as e:
+                    print(f"Broadcast failed for game {payload_obj.get('id')}: {e}")
+                self.dispatched += 1
+
+    def stats(self) -> dict:
+        return {
+            'queue_depth': self.queue.qsize(),
+            'queue_max': self.queue.maxsize,
+            'last_lag_seconds': self.last_lag,
+            'max_lag_seconds': self.max_lag,
+            'received': self.received,
+            'dispatched': self.dispatched,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'fetch_queries': self.fetch_queries,
+            'fetched': self.fetched,
+        }
+
+async def fetch_games_by_ids(game_ids):
+    db = await get_async_db()
+    return await db.get_games_by_ids(game_ids)
+
+dispatcher = NotificationDispatcher(manager.broadcast_to_users, fetch=fetch_games_by_ids)
+
 # Hardcoded device authentication
 DEVICE_AUTH = {
     "device_id_1": {"key": "devicekey", "role": "device"},
@@ -134,19 +468,41 @@ DEVICE_AUTH = {
 
 app = FastAPI()
 
-def get_db():
-    db = Database(
-        DATABASE_NAME,
-        "root",
-        "root",
-        DATABASE_HOST,
-        DATABASE_PORT,
-    )
+_async_db = None
+_async_db_lock = asyncio.Lock()
+
+async def get_async_db() -> AsyncDatabase:
+    """Create the shared asyncpg-backed database on first use."""
+    global _async_db
+    if _async_db is None:
+        async with _async_db_lock:
+            if _async_db is None:
+                _async_db = await AsyncDatabase.create(
+                    DATABASE_NAME,
+                    "root",
+                    "root",
+                    DATABASE_HOST,
+                    DATABASE_PORT,
+                    minconn=DATABASE_POOL_MIN,
+                    maxconn=DATABASE_POOL_MAX,
+                    timeout=DATABASE_POOL_TIMEOUT,
+                    check_on_borrow=DATABASE_POOL_CHECK,
+                )
+    return _async_db
+
+async def get_db():
+    yield await get_async_db()
+
+async def _mark_device_disconnected(uid: str):
     try:
-        yield db
-    finally:
-        # db.close()
-        pass
+        db = await get_async_db()
+        await db.mark_disconnected(uid)
+    except Exception as e:
+        print(f"mark_disconnected failed: {e}")
+
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request, exc: PoolTimeout):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
 
 def _normalize_time_to_z(val: str) -> str:
     if not isinstance(val, str) or len(val) == 0:
@@ -186,23 +542,23 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
             print(f"WS register: uid={uid}, school={school}, sports={sports}")
             manager.register_preferences(user_id, school, sports, uid=uid)
             # Persist device registration + synchronize follows
-            db_for_follow = next(get_db())
+            db = await get_async_db()
             try:
-                db_for_follow.upsert_device(uid, school)
-                db_for_follow.mark_connected(uid)
+                await db.upsert_device(uid, school)
+                await db.mark_connected(uid)
             except Exception as e_dev:
                 print(f"device upsert/mark_connected failed for uid={uid}: {e_dev}")
             if school and isinstance(sports, list):
                 try:
-                    db_for_follow.replace_follows(uid, school, sports)
+                    await db.replace_follows(uid, school, sports)
                 except Exception as e:
                     print(f"replace_follows failed for uid={uid}, school={school}: {e}")
         except Exception as e:
-            await websocket.send_text(json.dumps({"error": "invalid registration"}))
+            manager.send(websocket, json_dumps({"error": "invalid registration"}))
         # Send initial state: all games in the last 24 hours for the school across requested sports
-        db = next(get_db())
         try:
-            init_games = db.get_recent_games_for_team_by_sports(school, sports, hours=24)
+            db = await get_async_db()
+            init_games = await db.get_recent_games_for_team_by_sports(school, sports, hours=24)
         except Exception as e:
             init_games = []
         # Ensure JSON-serializable payload (date/datetime -> ISO strings)
@@ -211,7 +567,7 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
         for g in encoded_games:
             if isinstance(g, dict) and 'time' in g and isinstance(g['time'], str):
                 g['time'] = _normalize_time_to_z(g['time'])
-        await websocket.send_text(json.dumps({"init": True, "games": encoded_games}))
+        manager.send(websocket, json_dumps({"init": True, "games": encoded_games}))
         # Now keep the socket alive, responding to pings
         while True:
             try:
@@ -243,7 +599,8 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
             if info is not None:
                 uid_to_mark = info.get('uid') or key_uid
             if uid_to_mark:
-                next(get_db()).mark_disconnected(uid_to_mark)
+                db = await get_async_db()
+                await db.mark_disconnected(uid_to_mark)
         except Exception as e:
             print(f"mark_disconnected failed: {e}")
         # Now remove mapping and close tracking
@@ -264,88 +621,104 @@ def verify_device_auth(authorization: str = Header(None)):
 
 # Retrieve list of all games
 @app.get("/games")
-def get_games(db=Depends(get_db)):
-    data = db.get_games()
+async def get_games(db=Depends(get_db)):
+    data = await db.get_games()
     return {"games": data}
 
 # Removed broken /games/{team}/{sport}/{date} route (no matching function and DB call). Add later if needed.
 
 # Retrieve list of games by team
 @app.get("/games/{team}")
-def get_games_with_team(team, db=Depends(get_db), role=Depends(verify_device_auth)):
-    data = db.get_games_with_team(team)
+async def get_games_with_team(team, db=Depends(get_db), role=Depends(verify_device_auth)):
+    data = await db.get_games_with_team(team)
     return {"games": data}
 
 # Retrieve list of games by sport
 @app.get("/games/sport/{sport}")
-def get_games_by_sport(sport: str, db=Depends(get_db), role=Depends(verify_device_auth)):
-    data = db.get_games_by_sport(sport)
+async def get_games_by_sport(sport: str, db=Depends(get_db), role=Depends(verify_device_auth)):
+    data = await db.get_games_by_sport(sport)
     return {"games": data}
 
 # Retrieve list of games by date
 @app.get("/games/date/{date}")
-def get_games_by_date(date: str, db=Depends(get_db), role=Depends(verify_device_auth)):
-    data = db.get_games_by_date(date)
+async def get_games_by_date(date: str, db=Depends(get_db), role=Depends(verify_device_auth)):
+    data = await db.get_games_by_date(date)
     return {"games": data}
 
 # Retrieve list of games by time
 @app.get("/games/time/{time}")
-def get_games_by_time(time: str, db=Depends(get_db), role=Depends(verify_device_auth)):
-    data = db.get_games_by_time(time)
+async def get_games_by_time(time: str, db=Depends(get_db), role=Depends(verify_device_auth)):
+    data = await db.get_games_by_time(time)
     return {"games": data}
 
 # Retrieve list of games by BOTH date and time
 @app.get("/games/date/{date}/time/{time}")
-def get_games_by_date_and_time(date: str, time: str, db=Depends(get_db), role=Depends(verify_device_auth)):
-    data = db.get_games_by_date_and_time(date, time)
+async def get_games_by_date_and_time(date: str, time: str, db=Depends(get_db), role=Depends(verify_device_auth)):
+    data = await db.get_games_by_date_and_time(date, time)
     return {"games": data}
 
 # Retrieve list of games with min_score by a team
 @app.get("/games/score/{min_score}")
-def get_games_by_score(min_score: int, db=Depends(get_db), role=Depends(verify_device_auth)):
-    data = db.get_games_by_score(min_score)
+async def get_games_by_score(min_score: int, db=Depends(get_db), role=Depends(verify_device_auth)):
+    data = await db.get_games_by_score(min_score)
     return {"games": data}
 
 # Get a single game by id
 @app.get("/games/id/{game_id}")
-def get_game_by_id(game_id: int, db=Depends(get_db), role=Depends(verify_device_auth)):
-    data = db.get_game_by_id(game_id)
+async def get_game_by_id(game_id: int, db=Depends(get_db), role=Depends(verify_device_auth)):
+    data = await db.get_game_by_id(game_id)
     if data is None:
         raise HTTPException(status_code=404, detail="Game not found")
     return data
 
 # Retrieve list of games on current day
 @app.get("/games/today")
-def get_games_today(db=Depends(get_db), role=Depends(verify_device_auth)):
+async def get_games_today(db=Depends(get_db), role=Depends(verify_device_auth)):
     today = date.today().isoformat()
-    data = db.get_games_by_date(today)
+    data = await db.get_games_by_date(today)
     return {"games":data}
 
 # Retrieve list of teams playing on current day
 @app.get("/teams/today")
-def get_teams_playing_today(db=Depends(get_db), role=Depends(verify_device_auth)):
+async def get_teams_playing_today(db=Depends(get_db), role=Depends(verify_device_auth)):
     today = date.today().isoformat()
-    teams = db.get_teams_playing_on_date(today)
+    teams = await db.get_teams_playing_on_date(today)
     return {"teams": teams}
 
 # Retrieve list of sports being played on current day
 @app.get("/sports/today")
-def get_sports_playing_today(db=Depends(get_db), role=Depends(verify_device_auth)):
+async def get_sports_playing_today(db=Depends(get_db), role=Depends(verify_device_auth)):
     today = date.today().isoformat()
-    sports = db.get_sports_playing_on_date(today)
+    sports = await db.get_sports_playing_on_date(today)
     return {"sports": sports}
 
+# Outbound WebSocket queue depth and drop counters, overall and per connection
+@app.get("/metrics/ws")
+async def get_ws_metrics(role=Depends(verify_device_auth)):
+    return manager.stats()
+
+# NOTIFY intake queue depth, dispatch lag and coalescing counters
+@app.get("/metrics/notify")
+async def get_notify_metrics(role=Depends(verify_device_auth)):
+    return {**dispatcher.stats(), 'listener': listener.stats()}
+
+# Connection pool usage and known school/sport cache hit counters
+@app.get("/metrics/db")
+async def get_db_metrics(role=Depends(verify_device_auth)):
+    pool = _async_db.stats() if _async_db is not None else None
+    return {'pool': pool, 'known_entities': known_entities.stats()}
+
 # -- FOR DeviceUser TABLE -- #
 
 # Retrieve list of games for specific device - by followed school and sport
 @app.get("/games/followed/{device_uid}")
-def get_followed_games(device_uid: str, db=Depends(get_db)):
-    data = db.get_followed_games(device_uid)
+async def get_followed_games(device_uid: str, db=Depends(get_db)):
+    data = await db.get_followed_games(device_uid)
     return {"games": data}
 
 @app.get("/id/{team}/{sport}")
-def get_id_by_team(team, sport, db=Depends(get_db)):
-    data = db.get_id_by_team(team, sport)
+async def get_id_by_team(team, sport, db=Depends(get_db)):
+    data = await db.get_id_by_team(team, sport)
     if not data:
         raise HTTPException(status_code=404, detail=data)
     return str(data)
@@ -354,34 +727,34 @@ def get_id_by_team(team, sport, db=Depends(get_db)):
 
 # Add a game to the database (admin-only)
 @app.post("/games")
-def add_game(game: dict, role=Depends(verify_device_auth), db=Depends(get_db)):
+async def add_game(game: dict, role=Depends(verify_device_auth), db=Depends(get_db)):
     if role != "admin":
         raise HTTPException(status_code=403, detail="Unauthorized access")
     try:
-        db.insert_game(game)
+        await db.insert_game(game)
         return {"message": "Game added successfully"}
     except Exception as e:
         print(e)
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/schools")
-def add_school(data: dict, role=Depends(verify_device_auth), db=Depends(get_db)):
+async def add_school(data: dict, role=Depends(verify_device_auth), db=Depends(get_db)):
     if role != "admin":
         raise HTTPException(status_code=403, detail="Unauthorized access")
     try:
-        db.insert_school(data['name'], data['sport'])
+        await db.insert_school(data['name'], data['sport'])
         return {"message": "School added successfully"}
     except Exception as e:
         print(e)
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/sports")
-def add_sport(data: dict, role=Depends(verify_device_auth), db=Depends(get_db)):
+async def add_sport(data: dict, role=Depends(verify_device_auth), db=Depends(get_db)):
     if role != "admin":
         raise HTTPException(status_code=403, detail="Unauthorized access")
     try:
         print(data)
-        db.insert_sport(data['name'])
+        await db.insert_sport(data['name'])
         return {"message": "School added successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -393,9 +766,9 @@ def add_sport(data: dict, role=Depends(verify_device_auth), db=Depends(get_db)):
 
 # Delete game by game ID
 @app.delete("/games/id/{game_id}")
-def delete_game_by_id(game_id: int, db=Depends(get_db)):
+async def delete_game_by_id(game_id: int, db=Depends(get_db)):
     try:
-        deleted = db.delete_game_by_id(game_id)
+        deleted = await db.delete_game_by_id(game_id)
         if deleted:
             return {"message": "Game deleted successfully"}
         else:
@@ -406,24 +779,24 @@ def delete_game_by_id(game_id: int, db=Depends(get_db)):
 # --- DEVICE FOLLOW PREFERENCES --- #
 
 @app.post("/deviceuser/follow")
-def follow_school(payload: dict, db=Depends(get_db), role=Depends(verify_device_auth)):
+async def follow_school(payload: dict, db=Depends(get_db), role=Depends(verify_device_auth)):
     try:
         uid = str(payload['uid'])
         school = payload['followed_school']
         sport = payload['followed_sport']
         try:
-            db.insert_school(school, sport)
+            await db.insert_school(school, sport)
         except Exception as e_ins:
             print(f"insert_school warning for school={school}, sport={sport}: {e_ins}")
-        db.set_follow(uid, school, sport)
+        await db.set_follow(uid, school, sport)
         return {"message": "Follow set"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.delete("/deviceuser/follow")
-def unfollow_school(uid: str, followed_school: str, followed_sport: str, db=Depends(get_db), role=Depends(verify_device_auth)):
+async def unfollow_school(uid: str, followed_school: str, followed_sport: str, db=Depends(get_db), role=Depends(verify_device_auth)):
     try:
-        db.delete_follow(uid, followed_school, followed_sport)
+        await db.delete_follow(uid, followed_school, followed_sport)
         return {"message": "Follow deleted"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -436,47 +809,186 @@ async def startup():
         print('NO_DB set; skipping Postgres LISTEN task')
         return
     try:
+        dispatcher.start()
         asyncio.create_task(listen_to_postgres())
     except Exception as e:
         print(f"Failed to start Postgres listener: {e}")
 
-async def listen_to_postgres():
-    conn = None
-    # Retry until DB is available
-    while conn is None:
+@app.on_event("shutdown")
+async def shutdown():
+    await dispatcher.stop()
+    if _async_db is not None:
+        await _async_db.close()
+
+# LISTEN connection resilience: reconnect delay, liveness probe interval, replay overlap and log retention
+LISTEN_RETRY_SECONDS = float(os.getenv('LISTEN_RETRY_SECONDS', '3'))
+LISTEN_PROBE_SECONDS = float(os.getenv('LISTEN_PROBE_SECONDS', '10'))
+LISTEN_REPLAY_OVERLAP = int(os.getenv('LISTEN_REPLAY_OVERLAP', '100'))
+GAME_CHANGE_RETENTION_HOURS = int(os.getenv('GAME_CHANGE_RETENTION_HOURS', '48'))
+
+class GameChangeListener:
+    """
+    Keeps a LISTEN connection on notify_channel alive and feeds payloads to the dispatcher.
+
+    Every trigger also appends to game_change, and each payload carries that row's seq. When the
+    connection drops, the listener reconnects and replays every game changed after the last seq
+    it saw, joined to the current Game rows, in one query. Transactions can commit slightly
+    out of seq order, so the replay reaches back LISTEN_REPLAY_OVERLAP sequence numbers and
+    skips any seq already delivered.
+    """
+
+    SEEN_LIMIT = 4096
+
+    def __init__(self, dispatcher: NotificationDispatcher, channel: str = 'notify_channel'):
+        self.dispatcher = dispatcher
+        self.channel = channel
+        self.last_seq = None
+        self._floor = 0  # seqs at or below this predate the first LISTEN
+        self._seen = set()
+        self._seen_order = deque()
+        self._held = None  # notifications buffered while a replay is in flight
+        self.connects = 0
+        self.replayed = 0
+        self.duplicates = 0
+
+    async def _connect(self):
+        while True:
+            try:
+                return await asyncpg.connect(
+                    user="root",
+                    password="root",
+                    database=DATABASE_NAME,
+                    host=DATABASE_HOST,
+                    port=int(DATABASE_PORT)
+                )
+            except Exception as e:
+                print(f"Postgres not ready ({e}); retrying in {LISTEN_RETRY_SECONDS:g}s...")
+                await asyncio.sleep(LISTEN_RETRY_SECONDS)
+
+    def _remember(self, seq: int) -> bool:
+        """Record seq as delivered; False if it already was."""
+        if seq in self._seen:
+            self.duplicates += 1
+            return False
+        self._seen.add(seq)
+        self._seen_order.append(seq)
+        if len(self._seen_order) > self.SEEN_LIMIT:
+            self._seen.discard(self._seen_order.popleft())
+        if self.last_seq is None or seq > self.last_seq:
+            self.last_seq = seq
+        return True
+
+    def _deliver(self, payload_obj: dict):
+        seq = payload_obj.get('seq')
+        if seq is None or self._remember(int(seq)):
+            self.dispatcher.submit(payload_obj)
+
+    def _on_notify(self, conn, pid, channel, payload):
+        try:
+            payload_obj = json.loads(payload)
+        except Exception:
+            print(f"Ignoring malformed notification: {payload[:200]}")
+            return
+        if self._held is not None:
+            self._held.append(payload_obj)
+        else:
+            self._deliver(payload_obj)
+
+    async def _catch_up(self, conn):
+        if self.last_seq is None:
+            # First start: devices get current state from the init message, nothing to replay
+            self.last_seq = self._floor = await conn.fetchval("SELECT COALESCE(MAX(seq), 0) FROM game_change")
+            return
+        self._held = []
         try:
-            conn = await asyncpg.connect(
-                user="root",
-                password="root",
-                database=DATABASE_NAME,
-                host=DATABASE_HOST,
-                port=int(DATABASE_PORT)
+            rows = await conn.fetch(
+                """
+                SELECT c.seq, c.game_id, to_jsonb(g)::text AS game
+                FROM game_change c JOIN game g ON g.id = c.game_id
+                WHERE c.seq > $1
+                ORDER BY c.seq
+                """,
+                max(self._floor, self.last_seq - LISTEN_REPLAY_OVERLAP),
             )
-        except Exception as e:
-            print(f"Postgres not ready ({e}); retrying in 3s...")
-            await asyncio.sleep(3)
-    try:
-        await conn.add_listener("notify_channel", notify_handler)
-        print('listening on notify_channel')
+            # Every row carries the game's current state, so one message per game is enough
+            latest = {}
+            for row in rows:
+                if self._remember(row['seq']):
+                    latest.pop(row['game_id'], None)
+                    latest[row['game_id']] = row
+            for row in latest.values():
+                payload_obj = json.loads(row['game'])
+                payload_obj['seq'] = row['seq']
+                self.dispatcher.submit(payload_obj)
+            self.replayed += len(latest)
+            if latest:
+                print(f"Replayed {len(latest)} games changed while disconnected")
+        finally:
+            held, self._held = self._held, None
+            for payload_obj in held:
+                self._deliver(payload_obj)
+
+    async def _prune(self, conn):
+        await conn.execute(
+            "DELETE FROM game_change WHERE changed_at < NOW() - make_interval(hours => $1)",
+            GAME_CHANGE_RETENTION_HOURS,
+        )
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
         while True:
-            await asyncio.sleep(10)  # Keep alive
-    except Exception as e:
-        print(f"Error in Postgres listener: {e}")
+            conn = await self._connect()
+            self.connects += 1
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda c: lost.set())
+            try:
+                # LISTEN first so nothing committed during the replay query slips through
+                await conn.add_listener(self.channel, self._on_notify)
+                await self._catch_up(conn)
+                print(f'listening on {self.channel} (last seq {self.last_seq})')
+                next_prune = loop.time()
+                while not lost.is_set():
+                    try:
+                        async with asyncio.timeout(LISTEN_PROBE_SECONDS):
+                            await lost.wait()
+                    except TimeoutError:
+                        # Half-open TCP connections never report termination; a query will
+                        await conn.fetchval("SELECT 1")
+                        if loop.time() >= next_prune:
+                            await self._prune(conn)
+                            next_prune = loop.time() + 3600
+            except asyncio.CancelledError:
+                await conn.close()
+                raise
+            except Exception as e:
+                print(f"Error in Postgres listener: {e}")
+            try:
+                conn.terminate()
+            except Exception:
+                pass
+            print(f"Postgres listener disconnected; reconnecting in {LISTEN_RETRY_SECONDS:g}s")
+            await asyncio.sleep(LISTEN_RETRY_SECONDS)
+
+    def stats(self) -> dict:
+        return {
+            'last_seq': self.last_seq,
+            'connects': self.connects,
+            'replayed': self.replayed,
+            'duplicates': self.duplicates,
+        }
+
+listener = GameChangeListener(dispatcher)
 
-def notify_handler(conn, pid, channel, payload):
-    asyncio.create_task(manager.broadcast_to_users(payload))
-    # asyncio.create_task(manager.broadcastAll(payload))
-    # asyncio.create_task(manager.broadcastWin(payload))
-    # jsonObjs = json.load(payload)
-    # manager.broadcastWin(payload)
+async def listen_to_postgres():
+    await listener.run()
 
 # Update when winner detected (admin-only)
 @app.put("/games/{game_id}/winner")
-def update_game_winner(game_id: int, winner: str, role=Depends(verify_device_auth), db=Depends(get_db)):
+async def update_game_winner(game_id: int, winner: str, role=Depends(verify_device_auth), db=Depends(get_db)):
     if role != "admin":
         raise HTTPException(status_code=403, detail="Unauthorized access")
     try:
-        db.update_game_winner(game_id, winner)
+        await db.update_game_winner(game_id, winner)
         return {"message": "Game winner updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,36 +1,39 @@
+import asyncio
+import json
 import pytest
 from httpx import AsyncClient
-from main import app, get_db
+from main import app, get_db, WebsocketConnections, OutboundQueue, NotificationDispatcher, GameChangeListener
+from db import AsyncDatabase, PoolTimeout, KnownEntityCache
 
 auth_headers = {"Authorization": "Bearer abc123"}
 
 
 class _StubDB:
-    def get_games(self):
+    async def get_games(self):
         return []
-    def get_games_by_sport(self, sport):
+    async def get_games_by_sport(self, sport):
         return []
-    def get_games_by_date(self, d):
+    async def get_games_by_date(self, d):
         return []
-    def get_followed_games(self, device_uid):
+    async def get_followed_games(self, device_uid):
         return []
-    def get_games_with_team(self, team):
+    async def get_games_with_team(self, team):
         return []
-    def get_id_by_team(self, team, sport):
+    async def get_id_by_team(self, team, sport):
         return ""
-    def insert_sport(self, name):
+    async def insert_sport(self, name):
         return None
-    def insert_school(self, name, sport):
+    async def insert_school(self, name, sport):
         return None
-    def insert_game(self, game):
+    async def insert_game(self, game):
         return None
-    def update_game_winner(self, game_id, winner):
+    async def update_game_winner(self, game_id, winner):
         return 0
 
 
 @pytest.fixture(autouse=True)
 def override_db_dependency(monkeypatch):
-    def _yield_stub():
+    async def _yield_stub():
         stub = _StubDB()
         yield stub
     app.dependency_overrides[get_db] = _yield_stub
@@ -116,6 +119,44 @@ async def test_update_game_winner():
         response = await ac.put(f"/games/{game_id}/winner?winner={winner}", headers=auth_headers)
     assert response.status_code in [200, 400, 403]
 
+@pytest.mark.asyncio
+async def test_pool_exhaustion_returns_503():
+    class _ExhaustedDB(_StubDB):
+        async def get_games(self):
+            raise PoolTimeout("no database connection available within 5s")
+    async def _yield_exhausted():
+        yield _ExhaustedDB()
+    app.dependency_overrides[get_db] = _yield_exhausted
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.get("/games", headers=auth_headers)
+    assert response.status_code == 503
+
+@pytest.mark.asyncio
+async def test_acquire_replaces_dead_connection():
+    class _Conn:
+        def __init__(self, alive):
+            self.alive, self.terminated = alive, False
+        def is_closed(self):
+            return self.terminated
+        async def fetchval(self, query):
+            if not self.alive:
+                raise ConnectionError("server closed the connection")
+            return 1
+        def terminate(self):
+            self.terminated = True
+    class _Pool:
+        def __init__(self):
+            self.conns, self.released = [_Conn(False), _Conn(True)], []
+        async def acquire(self, timeout=None):
+            return self.conns.pop(0)
+        async def release(self, conn):
+            self.released.append(conn)
+    pool = _Pool()
+    db = AsyncDatabase(pool)
+    async with db._acquire() as conn:
+        assert conn.alive
+    assert [(c.alive, c.terminated) for c in pool.released] == [(False, True), (True, False)]
+
 # Testing Authentication
 
 @pytest.mark.asyncio
@@ -123,3 +164,265 @@ async def test_unauthorized_access():
     async with AsyncClient(app=app, base_url="http://test") as ac:
         response = await ac.get("/games")
     assert response.status_code == 200
+
+
+# Testing WebSocket fan-out
+
+class _FakeWebSocket:
+    def __init__(self, delay=0.0):
+        self.sent = []
+        self.delay = delay
+        self.closed = False
+    async def accept(self):
+        pass
+    async def send_text(self, text):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(text)
+    async def close(self, code=1000):
+        self.closed = True
+
+
+async def _let_writers_run():
+    await asyncio.sleep(0.05)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_reaches_only_subscribed_devices():
+    manager = WebsocketConnections()
+    follower, other = _FakeWebSocket(), _FakeWebSocket()
+    await manager.connect(follower, "1")
+    await manager.connect(other, "2")
+    manager.register_preferences("1", "Utah St.", ["Football"])
+    manager.register_preferences("2", "Utah St.", ["Soccer (W)"])
+
+    await manager.broadcast_to_users(json.dumps({
+        "home_team": "Utah St.", "away_team": "Wyoming", "sport": "Football",
+        "winner": "Utah St.", "time": "2025-10-04 19:00:00",
+    }))
+    await _let_writers_run()
+
+    assert len(follower.sent) == 1
+    assert json.loads(follower.sent[0])["time"] == "2025-10-04T19:00:00Z"
+    assert other.sent == []
+    manager.disconnect(follower)
+    manager.disconnect(other)
+
+
+@pytest.mark.asyncio
+async def test_disconnect_and_reregister_keep_index_consistent():
+    manager = WebsocketConnections()
+    ws = _FakeWebSocket()
+    await manager.connect(ws, "1")
+    manager.register_preferences("1", "Utah St.", ["Football", "Baseball"])
+    manager.register_preferences("1", "Utah St.", ["Baseball"])
+    assert ("Utah St.", "Football") not in manager.subscriptions
+    assert manager.get_info_by_websocket(ws)[0] == "1"
+
+    manager.disconnect(ws)
+    assert manager.subscriptions == {}
+    assert manager.get_info_by_websocket(ws) == (None, None)
+    assert manager.connectionsPreferences == {}
+
+
+@pytest.mark.asyncio
+async def test_malformed_registration_is_not_indexed():
+    manager = WebsocketConnections()
+    ws = _FakeWebSocket()
+    await manager.connect(ws, "1")
+    manager.register_preferences("1", "Lehigh", ["Basketball", ["x"], {"y": 1}, 3])
+    assert dict(manager.subscriptions) == {("Lehigh", "Basketball"): {"1"}}
+    manager.register_preferences("1", ["Lehigh"], ["Basketball"])
+    assert dict(manager.subscriptions) == {}
+    manager.register_preferences("1", "Lehigh", "Basketball")
+    assert manager.connectionsPreferences["1"]["sports"] == []
+
+    manager.disconnect(ws)
+    assert manager.connectionsPreferences == {} and manager.subscriptions == {}
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_does_not_delay_others():
+    manager = WebsocketConnections()
+    slow, fast = _FakeWebSocket(delay=60), _FakeWebSocket()
+    await manager.connect(slow, "slow")
+    await manager.connect(fast, "fast")
+    for uid in ("slow", "fast"):
+        manager.register_preferences(uid, "Utah St.", ["Football"])
+
+    for game_id in range(3):
+        await manager.broadcast_to_users({
+            "id": game_id, "home_team": "Utah St.", "away_team": "Wyoming",
+            "sport": "Football", "winner": "Utah St.",
+        })
+    await _let_writers_run()
+
+    assert [json.loads(t)["id"] for t in fast.sent] == [0, 1, 2]
+    stats = manager.stats()["per_connection"]
+    assert stats["slow"]["sent"] == 0 and stats["slow"]["depth"] == 2
+    manager.disconnect(slow)
+    manager.disconnect(fast)
+
+
+@pytest.mark.asyncio
+async def test_dropped_devices_are_marked_disconnected(monkeypatch):
+    import main
+    marked = []
+    class _MarkingDB:
+        async def mark_disconnected(self, uid):
+            marked.append(uid)
+    async def _get_async_db():
+        return _MarkingDB()
+    monkeypatch.setattr(main, "get_async_db", _get_async_db)
+
+    class _BrokenWebSocket(_FakeWebSocket):
+        async def send_text(self, text):
+            raise ConnectionResetError("peer gone")
+    manager = WebsocketConnections()
+    broken, slow = _BrokenWebSocket(), _FakeWebSocket(delay=60)
+    await manager.connect(broken, "1")
+    await manager.connect(slow, "2")
+    manager.register_preferences("1", "Utah St.", ["Football"], uid="dev-1")
+    manager.register_preferences("2", "Utah St.", ["Football"], uid="dev-2")
+    manager.outbound[id(slow)].policy, manager.outbound[id(slow)].maxsize = "disconnect", 1
+
+    for game_id in range(3):
+        await manager.broadcast_to_users({
+            "id": game_id, "home_team": "Utah St.", "away_team": "Wyoming",
+            "sport": "Football", "winner": "Utah St.",
+        })
+    await _let_writers_run()
+
+    assert sorted(marked) == ["dev-1", "dev-2"]
+    assert manager.connectionsPreferences == {} and slow.closed
+
+
+def test_outbound_queue_full_policies():
+    drop = OutboundQueue(None, on_failure=None, maxsize=2, policy="drop_oldest")
+    for text in ("a", "b", "c"):
+        assert drop.put(text, key=text)
+    assert [t for _, t in drop._pending] == ["b", "c"] and drop.dropped == 1
+
+    coalesce = OutboundQueue(None, on_failure=None, maxsize=2, policy="coalesce")
+    coalesce.put("game1-v1", key=1)
+    coalesce.put("game2-v1", key=2)
+    coalesce.put("game1-v2", key=1)
+    assert [t for _, t in coalesce._pending] == ["game1-v2", "game2-v1"] and coalesce.coalesced == 1
+
+    disconnect = OutboundQueue(None, on_failure=None, maxsize=1, policy="disconnect")
+    assert disconnect.put("a")
+    assert not disconnect.put("b") and disconnect.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_coalesces_same_game_and_keeps_order():
+    delivered = []
+    async def _broadcast(payload):
+        delivered.append((payload["id"], payload["score"]))
+    dispatcher = NotificationDispatcher(_broadcast, maxsize=2, window=0.01)
+    dispatcher.submit(json.dumps({"id": 1, "score": [0, 0]}))
+    dispatcher.submit(json.dumps({"id": 2, "score": [7, 0]}))
+    dispatcher.submit(json.dumps({"id": 1, "score": [0, 3]}))  # queue full -> dropped
+    dispatcher.start()
+    await asyncio.sleep(0)
+    dispatcher.submit(json.dumps({"id": 1, "score": [0, 7]}))  # inside the window -> coalesced
+    await asyncio.sleep(0.05)
+    await dispatcher.stop()
+
+    assert delivered == [(1, [0, 7]), (2, [7, 0])]
+    stats = dispatcher.stats()
+    assert stats["dropped"] == 1 and stats["coalesced"] == 1 and stats["dispatched"] == 2
+
+
+class _ReplayConn:
+    def __init__(self, max_seq, rows):
+        self.max_seq = max_seq
+        self.rows = rows
+        self.after = None
+
+    async def fetchval(self, query):
+        return self.max_seq
+
+    async def fetch(self, query, after):
+        self.after = after
+        return [r for r in self.rows if r["seq"] > after]
+
+
+class _Collect:
+    def __init__(self):
+        self.payloads = []
+
+    def submit(self, payload):
+        self.payloads.append(payload)
+
+
+@pytest.mark.asyncio
+async def test_listener_replays_missed_changes_once():
+    sink = _Collect()
+    listener = GameChangeListener(sink)
+    await listener._catch_up(_ReplayConn(max_seq=10, rows=[]))
+    listener._on_notify(None, 0, "notify_channel", json.dumps({"id": 1, "seq": 11, "score": [0, 0]}))
+
+    # Reconnect: seq 11 was already delivered, game 2 changed twice, game 3 once
+    rows = [
+        {"seq": 11, "game_id": 1, "game": json.dumps({"id": 1, "score": [0, 0]})},
+        {"seq": 12, "game_id": 2, "game": json.dumps({"id": 2, "score": [7, 3]})},
+        {"seq": 13, "game_id": 3, "game": json.dumps({"id": 3, "score": [1, 0]})},
+        {"seq": 14, "game_id": 2, "game": json.dumps({"id": 2, "score": [7, 3]})},
+    ]
+    conn = _ReplayConn(max_seq=14, rows=rows)
+    await listener._catch_up(conn)
+
+    assert conn.after == 10  # never reaches below what existed at the first LISTEN
+    assert [(p["id"], p["seq"]) for p in sink.payloads] == [(1, 11), (3, 13), (2, 14)]
+    assert listener.stats()["last_seq"] == 14 and listener.stats()["duplicates"] == 1
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_loads_thin_payloads_in_one_query():
+    delivered, queries = [], []
+    async def _broadcast(payload):
+        delivered.append((payload["id"], payload["seq"], payload["winner"]))
+    async def _fetch(ids):
+        queries.append(sorted(ids))
+        return [{"id": i, "winner": f"team{i}"} for i in ids if i != 3]  # game 3 was deleted
+    dispatcher = NotificationDispatcher(_broadcast, window=0.01, fetch=_fetch)
+    dispatcher.submit(json.dumps({"id": 1, "seq": 5, "thin": True}))
+    dispatcher.submit(json.dumps({"id": 2, "seq": 6, "winner": "full"}))
+    dispatcher.submit(json.dumps({"id": 3, "seq": 7, "thin": True}))
+    dispatcher.submit(json.dumps({"id": 4, "seq": 8, "thin": True}))
+    dispatcher.start()
+    await asyncio.sleep(0.05)
+    await dispatcher.stop()
+
+    assert queries == [[1, 3, 4]]
+    assert delivered == [(1, 5, "team1"), (2, 6, "full"), (4, 8, "team4")]
+
+
+def test_known_entity_cache_counts_hits_and_misses():
+    cache = KnownEntityCache()
+    cache.warm([("Utah St.", "Football"), ("Football", None)])
+    assert cache.has_school("Utah St.", "Football")
+    assert cache.has_sport("Football")
+    assert not cache.has_school("Utah St.", "Soccer (W)")
+    cache.add_school("Utah St.", "Soccer (W)")
+    assert cache.has_school("Utah St.", "Soccer (W)")
+    assert cache.stats() == {"schools": 2, "sports": 1, "hits": 3, "misses": 1, "invalidations": 0}
+
+
+def test_known_entity_cache_invalidates_expires_and_bounds(monkeypatch):
+    import known_entities
+    now = [100.0]
+    monkeypatch.setattr(known_entities, "monotonic", lambda: now[0])
+    cache = KnownEntityCache(ttl=60, max_entries=2)
+    cache.warm([("Utah St.", "Football"), ("Boise St.", "Football"), ("Football", None)])
+    assert cache.warmed and cache.stats()["schools"] + cache.stats()["sports"] == 2
+    cache.add_sport("Soccer (W)")
+    assert not cache.has_sport("Soccer (W)")  # full: misses go to the database instead
+    now[0] += 61
+    assert not cache.warmed
+    cache.warm([("Utah St.", "Football")])
+    assert cache.schools == {("Utah St.", "Football")}
+    cache.invalidate()
+    assert not cache.warmed and not cache.has_school("Utah St.", "Football")
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,83 @@
+from time import monotonic
+
+
+class KnownEntityCache:
+    """
+    Process-local record of the (school, sport) pairs and sports known to exist in the database.
+    Filled by one query on first use and write-through on insert, so a hit means the INSERT can be
+    skipped without touching the database.
+
+    Rows can still disappear underneath it (a school deleted or re-keyed by hand), so the cache is
+    re-filled once it is `ttl` seconds old and emptied by invalidate(), which the database classes
+    call whenever a write rolls back or hits an integrity error. At most `max_entries` schools and
+    sports are held; anything past that simply misses and goes to the database.
+    """
+
+    WARM_QUERY = "SELECT name, sport FROM school UNION ALL SELECT name, NULL FROM sport"
+
+    def __init__(self, ttl=3600.0, max_entries=50000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.schools = set()
+        self.sports = set()
+        self.warmed_at = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def warmed(self) -> bool:
+        return self.warmed_at is not None and monotonic() - self.warmed_at < self.ttl
+
+    def warm(self, rows):
+        self.schools.clear()
+        self.sports.clear()
+        for name, sport in rows:
+            if sport is None:
+                self.add_sport(name)
+            else:
+                self.add_school(name, sport)
+        self.warmed_at = monotonic()
+
+    def invalidate(self):
+        self.schools.clear()
+        self.sports.clear()
+        self.warmed_at = None
+        self.invalidations += 1
+
+    def _full(self) -> bool:
+        return len(self.schools) + len(self.sports) >= self.max_entries
+
+    def add_school(self, name, sport):
+        if not self._full():
+            self.schools.add((name, sport))
+
+    def add_sport(self, name):
+        if not self._full():
+            self.sports.add(name)
+
+    def has_school(self, name, sport) -> bool:
+        return self._count((name, sport) in self.schools)
+
+    def has_sport(self, name) -> bool:
+        return self._count(name in self.sports)
+
+    def _count(self, hit: bool) -> bool:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return hit
+
+    def stats(self) -> dict:
+        return {
+            "schools": len(self.schools),
+            "sports": len(self.sports),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+# One per process: shared by every database object of the service that imports it
+known_entities = KnownEntityCache()
@@ -34,15 +34,42 @@ CREATE table Game(
   FOREIGN KEY(Winner, sport) REFERENCES School(Name, sport)
 );
 
+-- Append-only log of Game inserts/updates. seq is monotonically increasing, so a listener that
+-- lost its connection can replay everything after the last seq it saw.
+CREATE TABLE IF NOT EXISTS Game_Change (
+  seq BIGSERIAL PRIMARY KEY,
+  game_id BIGINT NOT NULL,
+  changed_at timestamptz NOT NULL DEFAULT NOW()
+);
+
 NOTIFY "notify_channel"; --Might need parmater for a return string
 
+-- Payload for notify_channel. The default is the full row plus its change seq. With
+-- siot.notify_mode = 'thin' (e.g. ALTER DATABASE sportsiot SET siot.notify_mode = 'thin') only
+-- {id, seq, thin} is sent and the API fetches the rows itself. Rows too large for pg_notify's
+-- 8000 byte limit are always sent thin.
+CREATE OR REPLACE FUNCTION game_notify_payload(game_row Game, change_seq BIGINT)
+  RETURNS text AS $$
+DECLARE
+  payload text;
+BEGIN
+  IF COALESCE(current_setting('siot.notify_mode', true), '') <> 'thin' THEN
+    payload := (to_jsonb(game_row) || jsonb_build_object('seq', change_seq))::text;
+    IF octet_length(payload) < 7900 THEN
+      RETURN payload;
+    END IF;
+  END IF;
+  RETURN jsonb_build_object('id', game_row.id, 'seq', change_seq, 'thin', true)::text;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
 CREATE OR REPLACE FUNCTION notify_gameinserted()
   RETURNS trigger AS $$
 DECLARE
+  change_seq BIGINT;
 BEGIN
-  PERFORM pg_notify(
-    'notify_channel',
-    row_to_json(NEW)::text);
+  INSERT INTO Game_Change (game_id) VALUES (NEW.id) RETURNING seq INTO change_seq;
+  PERFORM pg_notify('notify_channel', game_notify_payload(NEW, change_seq));
   RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
@@ -53,15 +80,20 @@ CREATE TRIGGER notify_gameinserted
   EXECUTE PROCEDURE notify_gameinserted();
 
 CREATE OR REPLACE FUNCTION notify_update() RETURNS trigger AS $$
+DECLARE
+    change_seq BIGINT;
 BEGIN
-    PERFORM pg_notify('notify_channel', row_to_json(NEW)::text);
+    INSERT INTO Game_Change (game_id) VALUES (NEW.id) RETURNING seq INTO change_seq;
+    PERFORM pg_notify('notify_channel', game_notify_payload(NEW, change_seq));
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
 
+-- Writes that leave the row unchanged produce no change log entry or notification
 CREATE TRIGGER update_notify_trigger
 AFTER UPDATE ON Game
 FOR EACH ROW
+WHEN (OLD.* IS DISTINCT FROM NEW.*)
 EXECUTE FUNCTION notify_update();
 
 -- Track device registrations and connection state
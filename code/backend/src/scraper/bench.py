@@ -0,0 +1,544 @@
+"""
+Micro-benchmarks for the scraper's parse path. Runs offline against recorded pages.
+
+    python bench.py parse
+    python bench.py parse --pages recordings/Football_2025-10-04.parquet --copies 1
+    python bench.py parse --pages testdata/scoreboard_basketball_m.html --copies 20 --chrome-kb 300
+    python bench.py plugins
+    python bench.py pipeline --workers 0 2 4 --copies 10
+    python bench.py fragments --changed 1 5 --copies 10 --chrome-kb 300
+    python bench.py mutation --interval-ms 500 --mutations 50
+    python bench.py browsers --sports 7 --seconds 20
+    python bench.py network --interval-ms 500 --updates 50 --copies 10
+    python bench.py assets --sports 7 --restarts 5
+
+`--pages` takes .html files and/or the .parquet recordings written by recorder.py (every
+html_text row is used). `--copies` repeats the scoreboard cards to approximate a full Saturday
+slate, and `--chrome-kb` pads the page with navigation/script markup like the live site's.
+`mutation`, `browsers`, `network` and `assets` are the exceptions: they drive real headless Chrome against a
+local server.
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import lxml.html
+import pandas as pd
+
+import plugins
+from scraper import (BLOCK_PROFILES, PARSER_BACKENDS, PLUGINS, SPORTS_CODE, Controller, DatabasePutter, JsonParser,
+                     LxmlParser, SharedBrowser, WebGrabber, WebPlayback)
+
+TESTDATA = os.path.join(os.path.dirname(__file__), 'testdata')
+GRID = '<div class="row justify-content-center">'
+
+
+def _sport_for(path, default):
+    # Recordings are named '<sport>_<date>.parquet'; fixtures 'scoreboard_<sport>.html'
+    name = os.path.basename(path)
+    if name.endswith('.parquet'):
+        return name.rsplit('_', 1)[0]
+    for sport in SPORTS_CODE:
+        slug = sport.lower().replace(' (w)', '_w').replace(' (m)', '_m')
+        if slug in name:
+            return sport
+    return default
+
+
+def _load_pages(paths, default_sport):
+    pages = []
+    for path in paths:
+        sport = _sport_for(path, default_sport)
+        if path.endswith('.parquet'):
+            import pandas as pd
+            pages += [(path, sport, html) for html in pd.read_parquet(path)['html_text'] if html]
+        else:
+            with open(path) as f:
+                pages.append((path, sport, f.read()))
+    return pages
+
+
+def _inflate(html, copies, chrome_kb):
+    if copies > 1 and GRID in html:
+        head, rest = html.split(GRID, 1)
+        cards, tail = rest.rsplit('</div>\n</div>', 1)
+        html = head + GRID + cards * copies + '</div>\n</div>' + tail
+    if chrome_kb:
+        item = '<li class="nav-item"><a class="nav-link" href="/teams/000">Team</a></li>'
+        menu = '<ul class="navbar-nav">' + item * (chrome_kb * 1024 // 2 // len(item)) + '</ul>'
+        script = '<script>' + 'var x = {"k": [1, 2, 3]};\n' * (chrome_kb * 1024 // 2 // 26) + '</script>'
+        html = html.replace('<body>', '<body>' + menu + script, 1)
+    return html
+
+
+def _snapshot(backend, html, sport):
+    """What Controller.run does per observed change for one sport, with every team configured."""
+    page = backend.parse_page(html)
+    index = backend.build_contest_index(page)
+    for team in index:
+        column, _ = backend.lookup_school_column(index, team)
+        if column is not None:
+            backend.parse_sport_event(column, sport)
+    return len(index)
+
+
+def bench_parse(args):
+    pages = _load_pages(args.pages or sorted(glob.glob(os.path.join(TESTDATA, '*.html'))), args.sport)
+    if not pages:
+        raise SystemExit('no pages to parse')
+    pages = [(path, sport, _inflate(html, args.copies, args.chrome_kb)) for path, sport, html in pages]
+    total_kb = sum(len(html) for _, _, html in pages) / 1024
+    print(f"{len(pages)} pages, {total_kb:,.0f} KB total, {args.repeat} passes")
+
+    for name, backend in PARSER_BACKENDS.items():
+        _snapshot(backend, pages[0][2], pages[0][1])  # warm up regex/XPath caches
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for _, sport, html in pages:
+                _snapshot(backend, html, sport)
+        per_page = (time.perf_counter() - start) / (args.repeat * len(pages)) * 1000
+
+        peak = 0
+        for _, sport, html in pages:
+            tracemalloc.start()
+            _snapshot(backend, html, sport)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        print(f"{name:>9}: {per_page:7.2f} ms/page, peak {peak / 1024:,.0f} KB")
+
+
+def bench_plugins(args):
+    """Cost of each sport plugin alone, per contest container, on every recorded container."""
+    pages = _load_pages(args.pages or sorted(glob.glob(os.path.join(TESTDATA, '*.html'))), args.sport)
+    for name, backend in PARSER_BACKENDS.items():
+        columns = []
+        for _, _, html in pages:
+            index = backend.build_contest_index(backend.parse_page(html))
+            columns += list({id(c): c for c in index.values() if c is not None}.values())
+        for sport in SPORTS_CODE:
+            best = float('inf')
+            # Plugins that don't fit a page print their exception; keep that out of the timing
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(args.rounds):
+                    start = time.perf_counter()
+                    for _ in range(args.repeat):
+                        for column in columns:
+                            backend.parse_sport_event(column, sport)
+                    best = min(best, time.perf_counter() - start)
+            per_column = best / (args.repeat * len(columns)) * 1e6
+            print(f"{name:>9} {sport:>15}: {per_column:7.1f} us/container")
+
+
+def bench_pipeline(args):
+    """
+    End-to-end snapshots/second through Controller's fetch -> parse -> diff -> sink pipeline,
+    replaying recordings, for each parse worker count. Consecutive snapshots alternate between the
+    page and a whitespace-padded copy, so every container digest changes and every snapshot is a
+    full parse, but no game changes after the first write.
+    """
+    pages = _load_pages(args.pages or sorted(glob.glob(os.path.join(TESTDATA, '*.html'))), args.sport)
+    backend = PARSER_BACKENDS[args.backend]
+    recorded = {}
+    teams = {}
+    for _, sport, html in pages:
+        html = _inflate(html, args.copies, args.chrome_kb)
+        recorded.setdefault(sport, []).extend([html, html.replace('</td>', ' </td>')] * (args.snapshots // 2))
+        for team in backend.build_contest_index(backend.parse_page(html)):
+            teams.setdefault(team, set()).add(sport)
+    total = sum(len(rows) for rows in recorded.values())
+    print(f"{total} snapshots over {len(recorded)} sports, {len(teams)} teams, backend {args.backend}, {os.cpu_count()} CPUs")
+
+    class CountingPutter(DatabasePutter):
+        def __init__(self, config):
+            self.written = 0
+
+        def put_many(self, game_infos):
+            self.written += len(game_infos)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            os.mkdir('recordings')
+            day = date.today()
+            for sport, rows in recorded.items():
+                pd.DataFrame({'html_text': rows}).to_parquet(f'recordings/{sport}_{day:%Y-%m-%d}.parquet')
+            with open('config.json', 'w') as f:
+                json.dump({'teams': [{'name': t, 'sports': sorted(s)} for t, s in teams.items()],
+                           'timing': {'interval_seconds': 0}}, f)
+
+            for workers in args.workers:
+                controller = Controller('config.json', WebPlayback, backend, CountingPutter, playback_date=day,
+                                        parse_workers=workers, queue_size=args.queue_size)
+                if controller.parse_pool is not None:
+                    # Start the worker processes (and their imports) outside the timing
+                    list(controller.parse_pool.map(time.sleep, [0.5] * workers))
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    controller.run()
+                elapsed = time.perf_counter() - start
+                label = f"{workers} workers" if workers else 'inline'
+                print(f"{label:>10}: {total / elapsed:7.1f} snapshots/s, {controller.dbputter.written} games written")
+                for name, stats in controller.pipeline_stats().items():
+                    print(f"{'':>12}{name:>6}: wait {stats['wait_ms']:7.1f} ms, busy {stats['busy_ms']:6.1f} ms, "
+                          f"age {stats['age_ms']:7.1f} ms (max {stats['max_age_ms']:.0f}), max depth {stats['max_depth']}")
+        finally:
+            os.chdir(cwd)
+
+def bench_fragments(args):
+    """
+    Bytes moved and parse time per change, full page_source vs QUERY_MODE=fragments returning
+    only the cards of the games that changed.
+    """
+    pages = _load_pages(args.pages or sorted(glob.glob(os.path.join(TESTDATA, '*.html'))), args.sport)
+    backend = PARSER_BACKENDS[args.backend]
+    for path, sport, html in pages:
+        html = _inflate(html, args.copies, args.chrome_kb)
+        index = LxmlParser.build_contest_index(LxmlParser.parse_page(html))
+        cards = list({id(c): c for c in index.values()}.values())
+        variants = [('page', html)]
+        for changed in args.changed:
+            outer = [lxml.html.tostring(card, encoding='unicode', with_tail=False) for card in cards[:changed]]
+            variants.append((f'{min(changed, len(cards))} changed', WebGrabber.FRAGMENT_PAGE.format(''.join(outer))))
+        print(f"{os.path.basename(path)} ({len(cards)} games)")
+        for label, text in variants:
+            _snapshot(backend, text, sport)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                _snapshot(backend, text, sport)
+            per_change = (time.perf_counter() - start) / args.repeat * 1000
+            print(f"{label:>12}: {len(text) / 1024:8.1f} KB, {per_change:7.2f} ms to parse")
+
+
+# A scoreboard cell that changes on a timer and stamps each change with the page's clock
+MUTATING_PAGE = """<html><body><table><tr id="contest_1"><td class="score" data-at="0">0</td></tr></table>
+<script>
+var n = 0;
+setInterval(function(){
+    var cell = document.querySelector('td.score');
+    cell.setAttribute('data-at', Date.now());
+    cell.textContent = ++n;
+}, %d);
+</script></body></html>"""
+
+
+def _serve(pages):
+    """Serve {path: html or a callable returning it} from a local HTTP server in the background; returns the server."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = pages.get(self.path)
+            if callable(body):
+                body = body()
+            self.send_response(200 if body is not None else 404)
+            self.send_header('Content-Type', 'text/html')
+            self.end_headers()
+            self.wfile.write(body or b'')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_mutation(args):
+    """Delay from a DOM mutation to WebGrabber.query() returning the page, on a local mutating page."""
+    server = _serve({'/': (MUTATING_PAGE % args.interval_ms).encode()})
+    os.environ['DOM_WAIT'] = '1' if args.dom_wait else '0'
+    grabber = WebGrabber(f'http://127.0.0.1:{server.server_port}/')
+    try:
+        grabber.query()  # initial snapshot, emitted without waiting
+        delays = []
+        while len(delays) < args.mutations:
+            success, html = grabber.query()
+            emitted = time.time() * 1000
+            stamp = re.search(r'data-at="(\d+)"', html) if success else None
+            if stamp and int(stamp.group(1)):
+                delays.append(emitted - int(stamp.group(1)))
+    finally:
+        grabber.quit()
+        server.shutdown()
+    delays.sort()
+    print(f"{len(delays)} mutations every {args.interval_ms} ms, DOM_WAIT={int(args.dom_wait)}: "
+          f"p50 {delays[len(delays) // 2]:.1f} ms, p95 {delays[int(len(delays) * 0.95)]:.1f} ms, max {delays[-1]:.1f} ms")
+
+
+# The scoreboard's live updates, modelled: poll a JSON endpoint and write one score into the page
+POLLING_SCRIPT = """<script>
+setInterval(function(){
+    fetch('/scores.json').then(function(r){ return r.json(); }).then(function(data){
+        document.querySelector('tr[id^="contest_"] td').textContent = data.tick;
+    });
+}, %d);
+</script></body>"""
+
+
+def _contest_json(card, sport):
+    """A card's plugin fields as live-update JSON (see plugins.JsonExtractor), links as {"href": ...}."""
+    def plain(value):
+        if isinstance(value, lxml.html.HtmlElement):
+            return {'href': value.get('href')}
+        if isinstance(value, dict):
+            return {key: plain(v) for key, v in value.items()}
+        if isinstance(value, list):
+            return [plain(v) for v in value]
+        return value
+    return plain(plugins.XPATH.extract(PLUGINS[sport].PLAN, card))
+
+
+def bench_network(args):
+    """
+    Per-update cost of QUERY_MODE=page (page_source + HTML parse) vs QUERY_MODE=network (the
+    page's own JSON responses + JsonParser), against a local page polling a local JSON endpoint.
+    """
+    path, sport, html = _load_pages(args.pages or [os.path.join(TESTDATA, 'scoreboard_basketball_m.html')], args.sport)[0]
+    html = _inflate(html, args.copies, args.chrome_kb)
+    index = LxmlParser.build_contest_index(LxmlParser.parse_page(html))
+    contests = [_contest_json(card, sport) for card in {id(c): c for c in index.values()}.values()]
+    ticks = iter(range(1, 1 << 30))
+
+    def scores():
+        # One game's score moves on every poll
+        tick = next(ticks)
+        contests[0]['teams'][0]['score'] = str(tick)
+        return json.dumps({'tick': tick, 'contests': contests}).encode()
+
+    server = _serve({'/': html.replace('</body>', POLLING_SCRIPT % args.interval_ms, 1).encode(), '/scores.json': scores})
+    os.environ['DOM_WAIT'] = '1'
+    print(f"{os.path.basename(path)}: {len(contests)} games, page {len(html) / 1024:.1f} KB")
+    try:
+        for mode, backend in (('page', PARSER_BACKENDS[args.backend]), ('network', JsonParser)):
+            os.environ['QUERY_MODE'] = mode
+            grabber = WebGrabber(f'http://127.0.0.1:{server.server_port}/')
+            try:
+                grabber.query()  # initial snapshot, emitted without waiting
+                fetch_ms, parse_ms, sizes = [], [], []
+                while len(sizes) < args.updates:
+                    start = time.perf_counter()
+                    success, text = grabber.query()
+                    if not success:
+                        continue
+                    fetched = time.perf_counter()
+                    _snapshot(backend, text, sport)
+                    fetch_ms.append((fetched - start) * 1000)
+                    parse_ms.append((time.perf_counter() - fetched) * 1000)
+                    sizes.append(len(text))
+            finally:
+                grabber.quit()
+            fetch_ms.sort()
+            parse_ms.sort()
+            print(f"{mode:>8}: {sum(sizes) / len(sizes) / 1024:8.1f} KB per update, "
+                  f"query p50 {fetch_ms[len(fetch_ms) // 2]:.1f} ms (includes the wait), "
+                  f"parse p50 {parse_ms[len(parse_ms) // 2]:.2f} ms")
+    finally:
+        server.shutdown()
+
+
+def _descendants_usage():
+    """Total RSS (bytes) and CPU seconds of every process below this one: chromedriver and Chrome."""
+    page_size, ticks = os.sysconf('SC_PAGE_SIZE'), os.sysconf('SC_CLK_TCK')
+    children, usage = {}, {}
+    for pid in filter(str.isdigit, os.listdir('/proc')):
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(pid))
+        usage[int(pid)] = (int(fields[21]) * page_size, (int(fields[11]) + int(fields[12])) / ticks)
+    rss = cpu = 0
+    todo = list(children.get(os.getpid(), []))
+    while todo:
+        pid = todo.pop()
+        todo += children.get(pid, [])
+        rss += usage.get(pid, (0, 0))[0]
+        cpu += usage.get(pid, (0, 0))[1]
+    return rss, cpu
+
+
+def bench_browsers(args):
+    """Memory and CPU of a Chrome per sport vs one shared Chrome with a tab per sport."""
+    pages = _load_pages(args.pages or sorted(glob.glob(os.path.join(TESTDATA, '*.html'))), args.sport)
+    # The recorded pages, each with a score cell that keeps changing so the observers stay busy
+    ticker = ("<script>setInterval(function(){ document.querySelector('tr[id^=\"contest_\"] td')"
+              ".textContent = Date.now(); }, %d);</script></body>" % args.interval_ms)
+    server = _serve({f'/{i}': pages[i % len(pages)][2].replace('</body>', ticker, 1).encode() for i in range(args.sports)})
+    os.environ['DOM_WAIT'] = '1'
+    try:
+        for shared in (False, True):
+            browser = SharedBrowser() if shared else None
+            grabbers = [WebGrabber(f'http://127.0.0.1:{server.server_port}/{i}', browser=browser) for i in range(args.sports)]
+            stop = threading.Event()
+            emitted = [0] * len(grabbers)
+
+            def work(i):
+                while not stop.is_set():
+                    emitted[i] += grabbers[i].query()[0]
+
+            threads = [threading.Thread(target=work, args=(i,), daemon=True) for i in range(len(grabbers))]
+            for t in threads:
+                t.start()
+            time.sleep(args.warmup)
+            emitted[:] = [0] * len(grabbers)
+            samples = []
+            _, cpu_start = _descendants_usage()
+            for _ in range(args.seconds):
+                time.sleep(1)
+                samples.append(_descendants_usage()[0])
+            _, cpu_end = _descendants_usage()
+            stop.set()
+            for t in threads:
+                t.join()
+            for grabber in grabbers:
+                grabber.quit()
+            if browser is not None:
+                browser.quit()
+            label = 'shared tabs' if shared else 'per sport'
+            print(f"{label:>11}: {args.sports} sports, RSS mean {sum(samples) / len(samples) / 2**20:,.0f} MB "
+                  f"(max {max(samples) / 2**20:,.0f} MB), CPU {(cpu_end - cpu_start) / args.seconds * 100:.0f}% "
+                  f"of a core, {sum(emitted) / args.seconds:.1f} pages/s emitted")
+    finally:
+        server.shutdown()
+
+ASSET_URL = re.compile(r'(?:src|href)="https://example\.invalid(/[^"]+)"')
+
+
+def bench_assets(args):
+    """Load and refresh time, RSS and CPU of a Chrome per sport for each BLOCK_RESOURCES profile."""
+    pages = _load_pages(args.pages or sorted(glob.glob(os.path.join(TESTDATA, '*.html'))), args.sport)
+    requests = Counter()
+
+    def asset(path, body):
+        def serve():
+            requests[os.path.splitext(path)[1]] += 1
+            return body
+        return serve
+
+    # The recorded pages with their logos/stylesheets served locally, sized like the live site's
+    served = {}
+    for i in range(args.sports):
+        html = _inflate(pages[i % len(pages)][2], args.copies, 0)
+        for path in ASSET_URL.findall(html):
+            if path.endswith('.css'):
+                body = b'/*' + b'x' * (args.css_kb * 1024) + b'*/'
+            else:
+                body = b'<svg xmlns="http://www.w3.org/2000/svg"><!--' + b'x' * (args.logo_kb * 1024) + b'--></svg>'
+            served[path] = asset(path, body)
+        served[f'/{i}'] = ASSET_URL.sub(lambda m: m.group(0).replace('https://example.invalid', ''), html).encode()
+    server = _serve(served)
+    try:
+        for profile in args.profiles:
+            os.environ['BLOCK_RESOURCES'] = profile
+            requests.clear()
+            _, cpu_start = _descendants_usage()
+            start = time.perf_counter()
+            grabbers = [WebGrabber(f'http://127.0.0.1:{server.server_port}/{i}') for i in range(args.sports)]
+            load_ms = (time.perf_counter() - start) / args.sports * 1000
+            start = time.perf_counter()
+            for _ in range(args.restarts):
+                for grabber in grabbers:
+                    grabber.restart()
+            restart_ms = (time.perf_counter() - start) / max(args.restarts * args.sports, 1) * 1000
+            time.sleep(args.settle)
+            rss, cpu_end = _descendants_usage()
+            for grabber in grabbers:
+                grabber.quit()
+            fetched = ', '.join(f'{n} {ext}' for ext, n in sorted(requests.items())) or 'none'
+            print(f"{profile:>7}: load {load_ms:,.0f} ms, restart {restart_ms:,.0f} ms per grabber, "
+                  f"RSS {rss / args.sports / 2**20:,.0f} MB and CPU {cpu_end - cpu_start:.1f} s per grabber, "
+                  f"assets fetched: {fetched}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('parse', help='latency and peak memory per snapshot for each PARSER_BACKEND')
+    p.add_argument('--pages', nargs='*', help='.html files or recorder .parquet files (default: testdata/*.html)')
+    p.add_argument('--sport', default='Football', help='sport plugin for pages whose name does not say')
+    p.add_argument('--copies', type=int, default=10, help='repeat the scoreboard cards this many times')
+    p.add_argument('--chrome-kb', type=int, default=0, help='pad each page with this much non-scoreboard markup')
+    p.add_argument('--repeat', type=int, default=20)
+    p.set_defaults(func=bench_parse)
+
+    p = sub.add_parser('plugins', help='time per contest container for each sport plugin and backend')
+    p.add_argument('--pages', nargs='*', help='.html files or recorder .parquet files (default: testdata/*.html)')
+    p.add_argument('--sport', default='Football', help=argparse.SUPPRESS)
+    p.add_argument('--repeat', type=int, default=50)
+    p.add_argument('--rounds', type=int, default=5, help='report the best of this many timed rounds')
+    p.set_defaults(func=bench_plugins)
+
+    p = sub.add_parser('pipeline', help='end-to-end snapshots/second and per-stage latency, inline vs parse workers')
+    p.add_argument('--pages', nargs='*', help='.html files or recorder .parquet files (default: testdata/*.html)')
+    p.add_argument('--sport', default='Football', help='sport plugin for pages whose name does not say')
+    p.add_argument('--backend', default='soup', choices=sorted(PARSER_BACKENDS))
+    p.add_argument('--workers', type=int, nargs='*', default=[0, 2, 4], help='parse worker counts to compare (0 = inline)')
+    p.add_argument('--snapshots', type=int, default=20, help='snapshots replayed per sport')
+    p.add_argument('--queue-size', type=int, default=64, help='bound on each stage inbox')
+    p.add_argument('--copies', type=int, default=10, help='repeat the scoreboard cards this many times')
+    p.add_argument('--chrome-kb', type=int, default=0, help='pad each page with this much non-scoreboard markup')
+    p.set_defaults(func=bench_pipeline)
+
+    p = sub.add_parser('fragments', help='bytes and parse time per change, full page vs changed-card fragments')
+    p.add_argument('--pages', nargs='*', help='.html files or recorder .parquet files (default: testdata/*.html)')
+    p.add_argument('--sport', default='Football', help='sport plugin for pages whose name does not say')
+    p.add_argument('--backend', default='soup', choices=sorted(PARSER_BACKENDS))
+    p.add_argument('--changed', type=int, nargs='*', default=[1, 5], help='number of changed games per fragment')
+    p.add_argument('--copies', type=int, default=10, help='repeat the scoreboard cards this many times')
+    p.add_argument('--chrome-kb', type=int, default=300, help='pad each page with this much non-scoreboard markup')
+    p.add_argument('--repeat', type=int, default=20)
+    p.set_defaults(func=bench_fragments)
+
+    p = sub.add_parser('browsers', help='RSS and CPU, a Chrome per sport vs one shared Chrome (needs Chrome)')
+    p.add_argument('--pages', nargs='*', help='.html files or recorder .parquet files (default: testdata/*.html)')
+    p.add_argument('--sport', default='Football', help=argparse.SUPPRESS)
+    p.add_argument('--sports', type=int, default=7, help='number of sports (tabs/browsers) to run')
+    p.add_argument('--interval-ms', type=int, default=1000, help='how often each page mutates')
+    p.add_argument('--warmup', type=int, default=5, help='seconds before measuring')
+    p.add_argument('--seconds', type=int, default=20, help='seconds to measure')
+    p.set_defaults(func=bench_browsers)
+
+    p = sub.add_parser('mutation', help='mutation-to-emit delay of WebGrabber against a local page (needs Chrome)')
+    p.add_argument('--interval-ms', type=int, default=500, help='how often the page mutates')
+    p.add_argument('--mutations', type=int, default=50)
+    p.add_argument('--no-dom-wait', dest='dom_wait', action='store_false', help='use the POLL_INTERVAL timeout instead')
+    p.set_defaults(func=bench_mutation)
+
+    p = sub.add_parser('network', help='bytes and parse time per update, page_source vs captured JSON responses (needs Chrome)')
+    p.add_argument('--pages', nargs='*', help='one .html file or recorder .parquet file (default: the basketball fixture)')
+    p.add_argument('--sport', default='Basketball (M)', help='sport plugin for pages whose name does not say')
+    p.add_argument('--backend', default='lxml', choices=sorted(PARSER_BACKENDS), help='HTML backend for page mode')
+    p.add_argument('--interval-ms', type=int, default=500, help='how often the page polls its JSON endpoint')
+    p.add_argument('--updates', type=int, default=50)
+    p.add_argument('--copies', type=int, default=10, help='repeat the scoreboard cards this many times')
+    p.add_argument('--chrome-kb', type=int, default=300, help='pad each page with this much non-scoreboard markup')
+    p.set_defaults(func=bench_network)
+
+    p = sub.add_parser('assets', help='load time, RSS and CPU per grabber for each BLOCK_RESOURCES profile (needs Chrome)')
+    p.add_argument('--pages', nargs='*', help='.html files or recorder .parquet files (default: testdata/*.html)')
+    p.add_argument('--sport', default='Football', help=argparse.SUPPRESS)
+    p.add_argument('--profiles', nargs='*', default=['none', 'images', 'assets'], choices=sorted(BLOCK_PROFILES))
+    p.add_argument('--sports', type=int, default=7, help='number of grabbers (browsers) to run')
+    p.add_argument('--restarts', type=int, default=5, help='refreshes per grabber after the first load')
+    p.add_argument('--copies', type=int, default=10, help='repeat the scoreboard cards this many times')
+    p.add_argument('--logo-kb', type=int, default=8, help='size of each served logo')
+    p.add_argument('--css-kb', type=int, default=160, help='size of each served stylesheet')
+    p.add_argument('--settle', type=float, default=2, help='seconds to wait before reading RSS')
+    p.set_defaults(func=bench_assets)
+
+    args = parser.parse_args()
+    args.func(args)
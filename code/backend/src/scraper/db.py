@@ -1,5 +1,13 @@
 import psycopg2
+from psycopg2.extras import execute_values
 import json
+import os
+import sys
+
+# known_entities.py is shared with the API: it lives in ../common and is copied next to this file in the image
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'common'))
+from known_entities import KnownEntityCache, known_entities
+
 
 class Database:
     def __init__(self, dbname, user, password, host, port):
@@ -13,60 +21,50 @@ class Database:
 
         self.cur = self.conn.cursor()
 
-    def insert_school(self, name, sport):
-        self.cur.execute("SELECT name, sport FROM school WHERE name = %s AND sport = %s", (name, sport))
+    def _known_entities(self):
+        if not known_entities.warmed:
+            try:
+                self.cur.execute(KnownEntityCache.WARM_QUERY)
+                known_entities.warm(self.cur.fetchall())
+                self.conn.commit()
+            except Exception:
+                self._rollback()
+                raise
+        return known_entities
 
-        exists = False
-        rows = self.cur.fetchall()
-        for row in rows:
-            if row[0] == name and row[1] == sport:
-                exists = True
+    def insert_school(self, name, sport):
+        if self._known_entities().has_school(name, sport):
+            return
+        try:
+            self.cur.execute("INSERT INTO school (name, sport) VALUES (%s, %s) ON CONFLICT DO NOTHING", (name, sport))
+            self.conn.commit()
+        except Exception:
+            self._rollback()
+            raise
+        known_entities.add_school(name, sport)
 
-        if not exists:
-            self.cur.execute("INSERT INTO school (name, sport) VALUES (%s, %s)", (name, sport))
+    # One round trip: insert, or update only when a stored column actually differs. The WHERE on
+    # DO UPDATE leaves identical rows untouched, so update_notify_trigger doesn't fire for them.
+    UPSERT_GAME = """
+        INSERT INTO game (date, time, away_team, home_team, score, winner, sport)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (home_team, away_team, sport) DO UPDATE
+        SET date = EXCLUDED.date, time = EXCLUDED.time, score = EXCLUDED.score, winner = EXCLUDED.winner
+        WHERE (game.date, game.time, game.score, game.winner)
+              IS DISTINCT FROM (EXCLUDED.date, EXCLUDED.time, EXCLUDED.score, EXCLUDED.winner)
+        RETURNING id
+        """
 
-        self.conn.commit()
+    def _rollback(self):
+        # A failed write may mean a cached school or sport is gone, so re-read them next time
+        self.conn.rollback()
+        known_entities.invalidate()
 
     def insert_game(self, g):
-        self.cur.execute(
-            """
-            SELECT home_team, away_team, sport FROM game WHERE
-            home_team = %s AND away_team = %s AND sport = %s
-            """,
-            (g["home_team"],
-             g["away_team"],
-             g["sport"])
-        )
-
-        exists = False
-        rows = self.cur.fetchall()
-        for row in rows:
-            exists = True
-            break
-
-        if exists:
+        """Upsert a game; returns True if a row was inserted or changed, False if it was identical."""
+        try:
             self.cur.execute(
-                """
-                UPDATE game
-                SET date = %s, time = %s, score = %s, winner = %s
-                WHERE home_team = %s AND away_team = %s AND sport = %s
-                """,
-                (g["date"],
-                g["time"],
-                json.dumps(g["score"]),
-                g["winner"],
-                g["home_team"],
-                g["away_team"],
-                g["sport"])
-            )
-            
-        else:
-            self.cur.execute(
-                """
-                INSERT INTO game
-                (date, time, away_team, home_team, score, winner, sport)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """,
+                self.UPSERT_GAME,
                 (g["date"],
                 g["time"],
                 g["away_team"],
@@ -75,19 +73,58 @@ class Database:
                 g["winner"],
                 g["sport"])
             )
+            changed = self.cur.fetchone() is not None
+            self.conn.commit()
+        except Exception:
+            # Never leave this (long-lived, per-thread) connection in an aborted transaction
+            self._rollback()
+            raise
+        return changed
 
-        self.conn.commit()
+    def put_games(self, games):
+        """
+        Write a batch of games, and the schools they reference, in one transaction. Games with the
+        same (home_team, away_team, sport) are collapsed to the last one, since a single upsert
+        statement may not touch a row twice. Returns the number of rows inserted or changed.
+        """
+        latest = {}
+        for g in games:
+            latest[(g["home_team"], g["away_team"], g["sport"])] = g
+        if not latest:
+            return 0
 
-    def insert_sport(self, name):
-        self.cur.execute("SELECT name FROM sport WHERE name = %s", (name,))
-
-        exists = False
-        rows = self.cur.fetchall()
-        for row in rows:
-            if row[0] == name:
-                exists = True
-
-        if not exists:
-            self.cur.execute("INSERT INTO sport (name) VALUES (%s)", (name,))
+        known = self._known_entities()
+        schools = {(team, g["sport"]) for g in latest.values() for team in (g["home_team"], g["away_team"])}
+        new_schools = sorted(school for school in schools if not known.has_school(*school))
+        try:
+            if new_schools:
+                execute_values(
+                    self.cur,
+                    "INSERT INTO school (name, sport) VALUES %s ON CONFLICT DO NOTHING",
+                    new_schools,
+                )
+            changed = execute_values(
+                self.cur,
+                self.UPSERT_GAME.replace("VALUES (%s, %s, %s, %s, %s, %s, %s)", "VALUES %s"),
+                [(g["date"], g["time"], g["away_team"], g["home_team"], json.dumps(g["score"]), g["winner"], g["sport"])
+                 for g in latest.values()],
+                fetch=True,
+            )
+            self.conn.commit()
+        except Exception:
+            self._rollback()
+            raise
+        for school in new_schools:
+            known.add_school(*school)
+        return len(changed)
 
-        self.conn.commit()
+    def insert_sport(self, name):
+        if self._known_entities().has_sport(name):
+            return
+        try:
+            self.cur.execute("INSERT INTO sport (name) VALUES (%s) ON CONFLICT DO NOTHING", (name,))
+            self.conn.commit()
+        except Exception:
+            self._rollback()
+            raise
+        known_entities.add_sport(name)
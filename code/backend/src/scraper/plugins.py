@@ -1,4 +1,5 @@
-from bs4 import BeautifulSoup  # For parsing and navigating HTML
+from bs4 import BeautifulSoup, NavigableString  # For parsing and navigating HTML
+from lxml import etree  # XPath backend
 import re  # Regular expressions
 import functools
 from datetime import date, timedelta, datetime, timezone
@@ -17,17 +18,323 @@ from datetime import time as datetimetime
 # FOREIGN KEY(Home_Team, sport) REFERENCES School(Name, sport),
 # FOREIGN KEY(Winner, sport) REFERENCES School(Name, sport)
 
+# --- Extraction plans ---------------------------------------------------------------------------
+# Each sport declares the elements it reads as FIELDS: a Sel (what to find) plus how to read it.
+# Selectors are compiled once at import, for BeautifulSoup (find() arguments) and for lxml
+# (XPath), so instantiating a plugin per contest only runs the lookups. The game_info logic
+# below is shared by both backends; test_scraper.py checks they agree on the recorded pages.
+
+XPATH_NS = {"re": "http://exslt.org/regular-expressions"}
+_REGEX_META = set(".^$*+?{}[]\\|()")
+
+
+def _xpath(expr):
+    return etree.XPath(expr, namespaces=XPATH_NS)
+
+
+def _has_class(name):
+    # BeautifulSoup's class_="x" matches any element whose class list contains x
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+_VISIBLE_TEXT = _xpath('.//text()[not(parent::script or parent::style)]')
+
+
+def _text(element):
+    """Equivalent of Tag.get_text(strip=True): every text node stripped, then concatenated."""
+    return "".join(t.strip() for t in _VISIBLE_TEXT(element))
+
+
+def _literal_prefix(pattern):
+    """('period_', True) for '^period_\\d+': the fixed text a match must start with/contain."""
+    anchored = pattern.startswith("^")
+    prefix = ""
+    for i, ch in enumerate(pattern[1:] if anchored else pattern):
+        if ch in _REGEX_META:
+            if ch in "*?{" and prefix:
+                prefix = prefix[:-1]  # the last literal is optional/repeated
+            break
+        prefix += ch
+    return prefix, anchored
+
+
+class Sel:
+    """
+    An element (or text) to look for below a node: tag name plus attribute tests.
+
+    A str attribute value matches exactly; for class, a single name matches any element having
+    that class and a value with spaces must equal the whole attribute (BeautifulSoup's rules).
+    A compiled regex is searched in the attribute. `text=` finds the first text node matching a
+    regex instead of an element. `within=` restricts the match to descendants of another Sel,
+    like the CSS 'td.hitscol div'.
+    """
+
+    def __init__(self, tag=None, text=None, within=None, **attrs):
+        self.tag = tag
+        self.text = text
+        self.within = within
+        self.attrs = {("class" if k == "class_" else k): v for k, v in attrs.items()}
+
+        # lxml: XPath for candidates, plus regex checks XPath can't do cheaply, done in Python
+        self.checks = []
+        if text is not None:
+            path = f'.//text()[not(parent::script or parent::style)][re:test(., "{text.pattern}")]'
+        else:
+            predicates = []
+            for name, value in self.attrs.items():
+                if isinstance(value, re.Pattern):
+                    prefix, anchored = _literal_prefix(value.pattern)
+                    if prefix:
+                        test = "starts-with" if anchored else "contains"
+                        predicates.append(f'{test}(@{name}, "{prefix}")')
+                        self.checks.append((name, value))
+                    else:
+                        predicates.append(f're:test(@{name}, "{value.pattern}")')
+                elif name == "class" and " " not in value:
+                    predicates.append(_has_class(value))
+                elif name == "class":
+                    predicates.append(f'normalize-space(@class) = "{value}"')
+                else:
+                    predicates.append(f'@{name} = "{value}"')
+            path = f'.//{tag or "*"}' + "".join(f"[{p}]" for p in predicates)
+            if within is not None:
+                if within.checks:
+                    raise ValueError("within= selectors cannot use regex attributes")
+                path = within.path + path[1:]
+        self.path = path
+        self.xpath_all = _xpath(path)
+        self.xpath_first = _xpath(f"({path})[1]")
+
+
+class Field:
+    """How to read a Sel: first match or all of them, and as a node, text, or nested fields."""
+
+    def __init__(self, sel, many=False, read=None, fields=None):
+        self.sel = sel
+        self.many = many
+        self.read = read  # None (the node), "text", "raw_text" or "string"
+        self.plan = Plan(fields) if fields else None
+
+
+class Plan:
+    """
+    A set of named Fields, grouped once so an extractor can fill all of them in a single walk
+    over a container: element fields by tag name, text fields, and within= fields (looked up
+    separately).
+    """
+
+    def __init__(self, fields):
+        self.fields = dict(fields)
+        self.by_tag = {}
+        self.any_tag = []
+        self.text = []
+        self.within = []
+        for key, field in self.fields.items():
+            if field.sel.within is not None:
+                self.within.append((key, field))
+            elif field.sel.text is not None:
+                self.text.append((key, field))
+            elif field.sel.tag is None:
+                self.any_tag.append((key, field))
+            else:
+                self.by_tag.setdefault(field.sel.tag, []).append((key, field))
+        for tag, tag_fields in self.by_tag.items():
+            tag_fields.extend(self.any_tag)
+
+    def empty(self):
+        return {key: [] if field.many else None for key, field in self.fields.items()}
+
+
+class SoupExtractor:
+    """Runs extraction plans on BeautifulSoup tags (the reference backend)."""
+
+    def first(self, sel, node):
+        if sel.text is not None:
+            return node.find(string=sel.text)
+        if sel.within is not None:
+            for outer in self.all(sel.within, node):
+                found = outer.find(sel.tag, attrs=sel.attrs)
+                if found is not None:
+                    return found
+            return None
+        return node.find(sel.tag, attrs=sel.attrs)
+
+    def all(self, sel, node):
+        return node.find_all(sel.tag, attrs=sel.attrs)
+
+    def read(self, node, how):
+        if how == "text":
+            return node.get_text(strip=True)
+        if how == "raw_text":
+            return node.text.strip()
+        if how == "string":
+            return str(node).strip()
+        return node
+
+    def attr(self, node, name):
+        return node[name]
+
+    def extract(self, plan, node):
+        """
+        Fill every field of the plan with one walk over node's descendants, rather than one
+        find()/find_all() traversal per field. Same matches, in the same order, as find().
+        """
+        values = plan.empty()
+        self._lookup(plan.within, node, values)
+        for element in node.descendants:
+            if isinstance(element, NavigableString):
+                for key, field in plan.text:
+                    if values[key] is None and field.sel.text.search(element):
+                        values[key] = self._value(field, element)
+            else:
+                self._offer(plan.by_tag.get(element.name, plan.any_tag), element, element.attrs, values)
+        return values
+
+    def _lookup(self, fields, node, values):
+        for key, field in fields:
+            if field.many:
+                values[key] = [self._value(field, n) for n in self.all(field.sel, node)]
+            else:
+                found = self.first(field.sel, node)
+                values[key] = None if found is None else self._value(field, found)
+
+    def _offer(self, fields, element, attrs, values):
+        for key, field in fields:
+            if not field.many and values[key] is not None:
+                continue
+            if self._matches(field.sel, attrs):
+                if field.many:
+                    values[key].append(self._value(field, element))
+                else:
+                    values[key] = self._value(field, element)
+
+    @staticmethod
+    def _matches(sel, attrs):
+        for name, want in sel.attrs.items():
+            have = attrs.get(name)
+            if have is None:
+                return False
+            # Multi-valued attributes (class) match per value or as the whole string
+            candidates = have + [" ".join(have)] if isinstance(have, list) else (have,)
+            if isinstance(want, re.Pattern):
+                if not any(want.search(c) for c in candidates):
+                    return False
+            elif want not in candidates:
+                return False
+        return True
+
+    def _value(self, field, node):
+        if field.plan is not None:
+            return self.extract(field.plan, node)
+        return self.read(node, field.read)
+
+
+class XPathExtractor(SoupExtractor):
+    """Runs extraction plans on lxml elements; text and within= fields use the precompiled XPath."""
+
+    def first(self, sel, node):
+        if not sel.checks:
+            found = sel.xpath_first(node)
+            return found[0] if found else None
+        return next(iter(self.all(sel, node)), None)
+
+    def all(self, sel, node):
+        found = sel.xpath_all(node)
+        for name, regex in sel.checks:
+            found = [n for n in found if regex.search(n.get(name, ""))]
+        return found
+
+    def read(self, node, how):
+        if how == "text":
+            return _text(node)
+        if how == "raw_text":
+            return "".join(_VISIBLE_TEXT(node)).strip()
+        if how == "string":
+            return str(node).strip()
+        return node
+
+    def attr(self, node, name):
+        return node.attrib[name]
+
+    def extract(self, plan, node):
+        values = plan.empty()
+        self._lookup(plan.within, node, values)
+        self._lookup(plan.text, node, values)
+        for element in node.iterdescendants(etree.Element):
+            fields = plan.by_tag.get(element.tag, plan.any_tag)
+            if fields:
+                attrs = element.attrib
+                if "class" in attrs:
+                    attrs = {**attrs, "class": attrs["class"].split()}
+                self._offer(fields, element, attrs, values)
+        return values
+
+
+class JsonExtractor:
+    """
+    Runs extraction plans on already-extracted data: a contest as JSON whose keys are the plan's
+    field names (nested plans as objects or lists of objects, links as {"href": ...}). This is
+    what a network-mode WebGrabber receives, so it skips HTML parsing entirely.
+    """
+
+    def extract(self, plan, node):
+        values = {}
+        for key, field in plan.fields.items():
+            value = node.get(key)
+            if field.plan is not None and value is not None:
+                value = [self.extract(field.plan, v) for v in value] if field.many else self.extract(field.plan, value)
+            values[key] = value if value is not None or not field.many else []
+        return values
+
+    def attr(self, node, name):
+        return node[name]
+
+
+SOUP = SoupExtractor()
+XPATH = XPathExtractor()
+JSON = JsonExtractor()
+
+
 class TypeASport:
-    def __init__(self, soup):
-        """Parse common sport event data from HTML."""
+    """
+    Common NCAA scoreboard card: date/time, attendance, status, teams and total scores.
+    Subclasses add FIELDS (merged with the parent's) and fill game_info["sport_details"].
+    """
+
+    # Matches date with optional time (e.g., MM/DD/YYYY or MM/DD/YYYY HH:MM AM/PM)
+    FIELDS = {
+        "date_time": Field(Sel(text=re.compile(r"\d{2}/\d{2}/\d{4}(?:\s+\d{1,2}:\d{2}\s+(?:AM|PM))?")), read="string"),
+        "attendance": Field(Sel("div", class_="col p-0 text-right"), read="text"),
+        "live_link": Field(Sel("a", target="LIVE_BOX_SCORE")),
+        "period": Field(Sel("span", id=re.compile(r"^period_\d+")), read="text"),
+        "clock": Field(Sel("span", id=re.compile(r"^clock_\d+")), read="text"),
+        "score_cells": Field(Sel("div", id=re.compile(r"^score_\d+")), many=True, read="text"),
+        "box_link": Field(Sel("a", target=re.compile(r"box_score_\d+"))),
+        "teams": Field(Sel("tr", id=re.compile(r"contest_\d+")), many=True, fields={
+            "name": Field(Sel("td", class_="opponents_min_width"), read="text"),
+            "score": Field(Sel("div", class_="p-1"), read="text"),
+        }),
+    }
+    PLAN = Plan(FIELDS)
+
+    def __init_subclass__(cls, **kwargs):
+        # Compile once per plugin class, at import
+        super().__init_subclass__(**kwargs)
+        cls.PLAN = Plan({**cls.PLAN.fields, **cls.__dict__.get("FIELDS", {})})
+
+    def __init__(self, soup, extractor=SOUP):
+        """Parse common sport event data from a contest container (a Tag, an lxml element with XPATH, or a dict with JSON)."""
         self.soup = soup
+        self.extractor = extractor
+        fields = extractor.extract(self.PLAN, soup)
+        self.game_info = self._game_info(fields)
+        self.add_details(fields)
 
-        # Matches date with optional time (e.g., MM/DD/YYYY or MM/DD/YYYY HH:MM AM/PM)
-        date_pattern = re.compile(r"\d{2}/\d{2}/\d{4}(?:\s+\d{1,2}:\d{2}\s+(?:AM|PM))?")
+    def add_details(self, fields):
+        pass
 
-        # Extract common elements
-        date_time_element = self.soup.find(string=date_pattern)
-        date_time = date_time_element.strip() if date_time_element else "Date not found"
+    def _game_info(self, f):
+        date_time = f["date_time"] if f["date_time"] is not None else "Date not found"
         date_only = None
         if date_time == "Date not found":
             # Default to today at 00:00 UTC if not found
@@ -40,56 +347,45 @@ class TypeASport:
             else:
                 date_time_dt = datetime.strptime(date_time, "%m/%d/%Y %I:%M %p").replace(tzinfo=timezone.utc)
 
-        attendance_element = self.soup.find("div", class_="col p-0 text-right")
-        attendance = attendance_element.get_text(strip=True).replace("Attend: ", "") if attendance_element else "Unknown"
+        attendance = f["attendance"].replace("Attend: ", "") if f["attendance"] is not None else "Unknown"
 
-        live_box_score_link = self.soup.find("a", target="LIVE_BOX_SCORE")
-        period_element = self.soup.find("span", id=re.compile(r"^period_\d+"))
-        clock_element = self.soup.find("span", id=re.compile(r"^clock_\d+"))
-        scores_present = any(cell.get_text(strip=True) for cell in self.soup.find_all("div", id=re.compile(r"^score_\d+")))
+        live_box_score_link = f["live_link"]
+        current_period = f["period"]
+        scores_present = any(f["score_cells"])
 
-        if live_box_score_link and not scores_present:
+        if live_box_score_link is not None and not scores_present:
             # No scores yet, but we have a live link => Not started
             game_status = "Not Started"
-            game_link = live_box_score_link["href"]
-        elif period_element:
-            # Check the text in the period element
-            current_period = period_element.get_text(strip=True)
-
+            game_link = self.extractor.attr(live_box_score_link, "href")
+        elif current_period is not None:
             # Final vs live
             if current_period in ["F", "Final"]:
                 game_status = "Final"
-                box_score_link = self.soup.find("a", target=re.compile(r"box_score_\d+"))
-                game_link = box_score_link["href"] if box_score_link else "Link not found"
+                box_score_link = f["box_link"]
+                game_link = self.extractor.attr(box_score_link, "href") if box_score_link is not None else "Link not found"
                 current_clock = "00:00"
             else:
                 game_status = "In Progress"
-                game_link = live_box_score_link["href"] if live_box_score_link else "Link not found"
-                current_clock = clock_element.get_text(strip=True) if clock_element else "Unknown"
+                game_link = self.extractor.attr(live_box_score_link, "href") if live_box_score_link is not None else "Link not found"
+                current_clock = f["clock"] if f["clock"] is not None else "Unknown"
         else:
             # Assume final if no period element
             game_status = "Final"
-            box_score_link = self.soup.find("a", target=re.compile(r"box_score_\d+"))
-            game_link = box_score_link["href"] if box_score_link else "Link not found"
+            box_score_link = f["box_link"]
+            game_link = self.extractor.attr(box_score_link, "href") if box_score_link is not None else "Link not found"
             current_clock = "00:00"
 
         # Extract teams and scores
         teams = []
         scores = []
-        team_rows = self.soup.find_all("tr", id=re.compile(r"contest_\d+"))
-        for team_row in team_rows:
-            team_name_element = team_row.find("td", class_="opponents_min_width")
-            if team_name_element:
-                team_name = team_name_element.get_text(strip=True).split(" (")[0]
-                teams.append(team_name)
-
-            score_element = team_row.find("div", class_="p-1")
-            score = score_element.get_text(strip=True) if score_element and score_element.get_text(strip=True) else ""
+        for team_row in f["teams"]:
+            if team_row["name"] is not None:
+                teams.append(team_row["name"].split(" (")[0])
+            score = team_row["score"] or ""
             if score.isdigit():
                 scores.append(int(score.replace(",", "")))
 
-        # Prepare common game info dictionary
-        self.game_info = {
+        game_info = {
             "date": (date_only or date_time.split(maxsplit=1)[0]) if date_time != "Date not found" else date.today().strftime("%m/%d/%Y"),
             "time": date_time_dt,
             "attendance": int(attendance.replace(",", "")) if attendance.replace(",", "").isdigit() else None,
@@ -102,93 +398,86 @@ class TypeASport:
 
         # Add current period/clock if game is in progress
         if game_status == "In Progress":
-            self.game_info["current_period"] = current_period
-            self.game_info["current_clock"] = current_clock
-
-        if self.game_info["status"] != "Final":
-            self.game_info["winner"] = None
-        elif isinstance(self.game_info["score"], list) and len(self.game_info["score"]) >= 2 and self.game_info["score"][0] == self.game_info["score"][1]:
-            self.game_info["winner"] = "tie"
-        elif isinstance(self.game_info["score"], list) and len(self.game_info["score"]) >= 2 and self.game_info["score"][0] > self.game_info["score"][1]:
-            self.game_info["winner"] = teams[0]
+            game_info["current_period"] = current_period
+            game_info["current_clock"] = current_clock
+
+        if game_info["status"] != "Final":
+            game_info["winner"] = None
+        elif isinstance(game_info["score"], list) and len(game_info["score"]) >= 2 and game_info["score"][0] == game_info["score"][1]:
+            game_info["winner"] = "tie"
+        elif isinstance(game_info["score"], list) and len(game_info["score"]) >= 2 and game_info["score"][0] > game_info["score"][1]:
+            game_info["winner"] = teams[0]
         else:
-            self.game_info["winner"] = teams[1] if len(teams) > 1 else None
+            game_info["winner"] = teams[1] if len(teams) > 1 else None
+        return game_info
 
 
-class Volleyball(TypeASport):
-    def __init__(self, soup):
-        super().__init__(soup)
+class LinescoreSport(TypeASport):
+    """Per-period (or per-set) scores from the card's linescore table into sport_details."""
+    FIELDS = {
+        "linescore": Field(Sel("table", id=re.compile(r"linescore_\d+_table")), fields={
+            "rows": Field(Sel("tr"), many=True, fields={
+                "cells": Field(Sel("td"), many=True, read="text"),
+            }),
+        }),
+    }
+    DETAILS_KEY = "period_scores"
+    EMPTY_WITHOUT_TABLE = False  # report [] (rather than omit the key) before the table exists
+
+    def add_details(self, fields):
         sport_data = {}
-        # Volleyball: variable number of sets (up to 5)
-        set_scores = []
-        linescore_table = self.soup.find("table", id=re.compile(r"linescore_\d+_table"))
-        if linescore_table:
-            for score_row in linescore_table.find_all("tr"):
-                set_data = [int(cell.get_text(strip=True))
-                    for cell in score_row.find_all("td") if cell.get_text(strip=True).isdigit()]
-                set_scores.append(set_data)
-        sport_data["set_scores"] = set_scores
+        if fields["linescore"] is not None:
+            sport_data[self.DETAILS_KEY] = [
+                [int(cell) for cell in row["cells"] if cell.isdigit()]
+                for row in fields["linescore"]["rows"]
+            ]
+        elif self.EMPTY_WITHOUT_TABLE:
+            sport_data[self.DETAILS_KEY] = []
         self.game_info["sport_details"] = sport_data
 
+
+class Volleyball(LinescoreSport):
+    # Volleyball: variable number of sets (up to 5)
+    DETAILS_KEY = "set_scores"
+    EMPTY_WITHOUT_TABLE = True
+
 class TypeBSport:
     def __init__(self, soup):
         pass
 
 
-class MensBasketball(TypeASport):
-    def __init__(self, soup):
-        super().__init__(soup)
-        sport_data = {}
-        # Basketball: typically 4 quarters, possibly with overtime periods
-        period_scores = []
-        linescore_table = self.soup.find("table", id=re.compile(r"linescore_\d+_table"))
-        if linescore_table:
-            for score_row in linescore_table.find_all("tr"):
-                period_data = [int(cell.get_text(strip=True))
-                    for cell in score_row.find_all("td") if cell.get_text(strip=True).isdigit()]
-                period_scores.append(period_data)
-            sport_data["period_scores"] = period_scores
-        self.game_info["sport_details"] = sport_data
+class MensBasketball(LinescoreSport):
+    # Basketball: typically 4 quarters, possibly with overtime periods
+    DETAILS_KEY = "period_scores"
 
-class WomensBasketball(TypeASport):
-    def __init__(self, soup):
-        super().__init__(soup)
-        sport_data = {}
-        # Basketball: typically 4 quarters, possibly with overtime periods
-        period_scores = []
-        linescore_table = self.soup.find("table", id=re.compile(r"linescore_\d+_table"))
-        if linescore_table:
-            for score_row in linescore_table.find_all("tr"):
-                period_data = [int(cell.get_text(strip=True))
-                   for cell in score_row.find_all("td") if cell.get_text(strip=True).isdigit()]
-                period_scores.append(period_data)
-            sport_data["period_scores"] = period_scores
-        self.game_info["sport_details"] = sport_data
+class WomensBasketball(LinescoreSport):
+    DETAILS_KEY = "period_scores"
 
 class Baseball(TypeASport):
-    def __init__(self, soup):
-        super().__init__(soup)
+    # Score is [hits, errors] per team
+    FIELDS = {
+        "box_rows": Field(Sel("tr", id=re.compile(r"^contest_")), many=True, fields={
+            "team": Field(Sel("a", within=Sel("td", class_="opponents_min_width")), read="raw_text"),
+            "hits": Field(Sel("div", within=Sel("td", class_="hitscol")), read="raw_text"),
+            "errors": Field(Sel("div", within=Sel("td", class_="errorscol")), read="raw_text"),
+        }),
+    }
 
+    def add_details(self, fields):
         score = []
-        team_rows = soup.select('tr[id^="contest_"]')
-        for row in team_rows:
-            team_name = row.select_one('td.opponents_min_width a').text.strip()
-            #score = int(row.select_one('td.totalcol div').text.strip())
-            hits = int(row.select_one('td.hitscol div').text.strip())
-            errors = int(row.select_one('td.errorscol div').text.strip())
-            score.append([hits, errors])
+        for row in fields["box_rows"]:
+            if row["team"] is None or row["hits"] is None or row["errors"] is None:
+                raise ValueError("baseball row is missing the team, hits or errors cell")
+            score.append([int(row["hits"]), int(row["errors"])])
 
         self.game_info["score"] = score
 
           
 class Football(TypeASport):
-    def __init__(self, soup):
-        super().__init__(soup)
+    pass
 
 class WomensSoccer(TypeASport):
-    def __init__(self, soup):
-        super().__init__(soup)
+    pass
 
 class MensSoccer(TypeASport):
-    def __init__(self, soup):
-        super().__init__(soup)
+    pass
@@ -22,6 +22,8 @@ from selenium.common.exceptions import TimeoutException
 import sqlite3
 import zlib
 
+from scraper import PageDigests
+
 
 class WebGrabber:
     """
@@ -40,7 +42,7 @@ class WebGrabber:
     # Observer scope: 'body' (default, broad) or 'contest' (narrow)
         self.observe_scope = os.getenv('OBSERVE_SCOPE', 'body').lower()
         self.driver = self._create_driver()
-        self.last_page_source = ''
+        self.page_digests = PageDigests()
         self._last_change_counter = 0
         self._first_emit = True
 
@@ -115,7 +117,7 @@ class WebGrabber:
         # Emit an initial snapshot without waiting, so pages with no live mutations still record once
         if self._first_emit:
             current_page_source = self.driver.page_source
-            self.last_page_source = current_page_source
+            self.page_digests.changed(current_page_source)
             self._first_emit = False
             return True, current_page_source
 
@@ -147,7 +149,7 @@ class WebGrabber:
                     lambda d: (d.execute_script("return window.__siot_change_counter || 0") or 0) > self._last_change_counter
                 )
             except TimeoutException:
-                return False, self.last_page_source
+                return False, None
 
         try:
             counter = self.driver.execute_script("return window.__siot_change_counter || 0") or 0
@@ -157,13 +159,10 @@ class WebGrabber:
         if counter > self._last_change_counter:
             self._last_change_counter = counter
             current_page_source = self.driver.page_source
-            if self.last_page_source != current_page_source:
-                self.last_page_source = current_page_source
+            if self.page_digests.changed(current_page_source):
                 return True, current_page_source
-            else:
-                return False, self.last_page_source
-        else:
-            return False, self.last_page_source
+        # Nothing new: no page to hand back
+        return False, None
 
     def quit(self):
         self.driver.quit()
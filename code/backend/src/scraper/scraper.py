@@ -1,9 +1,10 @@
 import os
 from fake_useragent import UserAgent  # Library to generate random user agents
-from bs4 import BeautifulSoup, SoupStrainer  # For parsing and navigating HTML
+from bs4 import BeautifulSoup, SoupStrainer, NavigableString  # For parsing and navigating HTML
 import re  # Regular expressions
 import time  # Time-related functions
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 
 import datetime  # Date and time handling
 from datetime import date, timedelta, datetime, timezone
@@ -14,18 +15,21 @@ from typing import Type
 import schedule
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import TimeoutException, WebDriverException
 import threading
+from contextlib import contextmanager
 from queue import Queue, Empty
 import argparse 
 import pandas as pd
-import gc
+import multiprocessing
 import requests
 import sqlite3
+import hashlib
+import base64
+import lxml.html
 
 import plugins
-from db import Database
+from db import Database, known_entities
 
 # Mapping of sports names to their NCAA sport codes
 # TODO: Since basketball season is starting, ensure codes for those sports are included
@@ -56,6 +60,7 @@ PLUGINS = {
     'Soccer (M)': plugins.MensSoccer,
 }
 
+
 def compare_dicts_excluding_key(dict1, dict2, excluded_key):
 
     if (dict2 == '' or dict1 == '') and dict1 != dict2:
@@ -107,34 +112,356 @@ class WebPlayback(WebGetter):
         pass
         
 
+class PageDigests:
+    """
+    Change detection for a grabber without holding on to the previous page: a digest of the
+    last page_source, plus a short ring of recent digests so pages flapping back to a state seen
+    moments ago (A -> B -> A) are counted. Those are still reported as changes, since the page
+    really is back at A and whatever stored B needs to hear about it.
+    """
+    CHUNK = 64 * 1024
+
+    def __init__(self, ring=8):
+        self.last = None
+        self.recent = deque(maxlen=ring)
+        self.flaps = 0
+
+    def changed(self, page: str) -> bool:
+        # Digest the string in slices rather than encoding a full copy of it
+        h = hashlib.blake2b(digest_size=16)
+        for start in range(0, len(page), PageDigests.CHUNK):
+            h.update(page[start:start + PageDigests.CHUNK].encode())
+        digest = h.digest()
+        if digest == self.last:
+            return False
+        if digest in self.recent:
+            self.flaps += 1
+        self.recent.append(digest)
+        self.last = digest
+        return True
+
+
+def chrome_options(*extra):
+    options = Options()
+    options.add_argument(f"user-agent={UserAgent().random}")
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    for argument in extra:
+        options.add_argument(argument)
+    return options
+
+
+# BLOCK_RESOURCES profiles: URL patterns for Network.setBlockedURLs ('*' is a wildcard) and extra
+# Chrome flags. The parsers only read markup, so blocking assets never changes what is scraped.
+IMAGE_URLS = ("*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.svg*", "*.webp*", "*.ico*")
+FONT_URLS = ("*.woff*", "*.ttf*", "*.otf*", "*.eot*")
+STYLE_URLS = ("*.css*",)
+NO_IMAGES = ("--blink-settings=imagesEnabled=false",)
+BLOCK_PROFILES = {
+    'none': ((), ()),
+    'images': (IMAGE_URLS, NO_IMAGES),
+    # Also one renderer process for every page/tab instead of one per site
+    'assets': (IMAGE_URLS + FONT_URLS + STYLE_URLS,
+               NO_IMAGES + ("--disable-gpu", "--disable-extensions", "--renderer-process-limit=1",
+                            "--disable-site-isolation-trials")),
+}
+
+
+def blocking_profile():
+    """(URL patterns to block, extra Chrome flags) for BLOCK_RESOURCES, plus the BLOCK_URLS patterns."""
+    name = os.getenv('BLOCK_RESOURCES', 'none').lower()
+    if name not in BLOCK_PROFILES:
+        print(f"Unknown BLOCK_RESOURCES={name}, expected one of {sorted(BLOCK_PROFILES)}; blocking nothing")
+        name = 'none'
+    urls, flags = BLOCK_PROFILES[name]
+    extra = tuple(url.strip() for url in os.getenv('BLOCK_URLS', '').split(',') if url.strip())
+    return urls + extra, flags
+
+
+def block_urls(driver, urls):
+    """Drop requests matching these patterns in the driver's current tab, before it loads anything."""
+    if not urls:
+        return
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(urls)})
+    except Exception as ex:
+        # Only costs bandwidth; the page still loads
+        print(f"Could not block resources: {ex}")
+
+
+class SharedBrowser:
+    """
+    One headless Chrome shared by every sport's WebGrabber (SHARED_BROWSER=1), each sport in its
+    own tab, instead of a browser process tree per sport.
+
+    A WebDriver session runs one command at a time against the selected tab, so grabbers take
+    turns: tab() hands the driver out first-come first-served and switches to the caller's tab.
+    Tabs also ping each other over a BroadcastChannel when their page changes (see NOTIFY_JS), so
+    a tab waiting in the browser gives up its turn as soon as another tab has something to report.
+    """
+
+    # Background tabs get their timers and rendering throttled; every tab here is "background"
+    # except the selected one, including the scoreboard's own refresh timers
+    FLAGS = (
+        "--disable-background-timer-throttling",
+        "--disable-backgrounding-occluded-windows",
+        "--disable-renderer-backgrounding",
+    )
+
+    def __init__(self, script_timeout=15):
+        self.script_timeout = script_timeout
+        # Longest a tab may wait in the browser per turn when nothing happens anywhere
+        try:
+            self.wait_slice = float(os.getenv('SHARED_WAIT_SLICE', '1'))
+        except Exception:
+            self.wait_slice = 1.0
+        self._turns = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self.current = None
+        self.driver = None
+        self.tabs = 0
+        self.blocked_urls, self.flags = blocking_profile()
+
+    def _start(self):
+        self.driver = webdriver.Chrome(options=chrome_options(*SharedBrowser.FLAGS, *self.flags))
+        self.driver.set_script_timeout(self.script_timeout)
+        self.current = self.driver.current_window_handle
+        self.tabs = 0
+        print("SHARED BROWSER STARTED")
+
+    @contextmanager
+    def turn(self):
+        """Exclusive use of the driver, in the order callers asked for it."""
+        with self._turns:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while ticket != self._serving:
+                self._turns.wait()
+        try:
+            yield
+        finally:
+            with self._turns:
+                self._serving += 1
+                self._turns.notify_all()
+
+    @contextmanager
+    def tab(self, handle):
+        with self.turn():
+            if self.current != handle:
+                self.driver.switch_to.window(handle)
+                self.current = handle
+            yield self.driver
+
+    def open_tab(self, url):
+        with self.turn():
+            try:
+                if self.driver is None:
+                    self._start()
+                # The browser starts with one blank tab; use it for the first sport
+                if self.tabs:
+                    self.driver.switch_to.new_window('tab')
+            except Exception as ex:
+                print(f"Shared browser unusable, restarting it: {ex}")
+                self.quit()
+                self._start()
+            self.tabs += 1
+            self.current = self.driver.current_window_handle
+            # Per tab: blocking is a setting of the tab's DevTools session
+            block_urls(self.driver, self.blocked_urls)
+            self.driver.get(url)
+            return BrowserTab(self, self.current)
+
+    def close_tab(self, handle):
+        with self.turn():
+            if self.driver is None:
+                return
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            finally:
+                handles = self.driver.window_handles
+                self.current = None
+                if handles:
+                    self.driver.switch_to.window(handles[0])
+                    self.current = handles[0]
+
+    def quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+
+class BrowserTab:
+    """The part of the WebDriver API a WebGrabber uses, scoped to one tab of a SharedBrowser."""
+
+    def __init__(self, browser: SharedBrowser, handle):
+        self.browser = browser
+        self.handle = handle
+
+    @property
+    def page_source(self):
+        with self.browser.tab(self.handle) as driver:
+            return driver.page_source
+
+    def execute_script(self, script, *args):
+        with self.browser.tab(self.handle) as driver:
+            return driver.execute_script(script, *args)
+
+    def execute_async_script(self, script, *args):
+        with self.browser.tab(self.handle) as driver:
+            return driver.execute_async_script(script, *args)
+
+    def get(self, url):
+        with self.browser.tab(self.handle) as driver:
+            driver.get(url)
+
+    def refresh(self):
+        with self.browser.tab(self.handle) as driver:
+            driver.refresh()
+
+    def set_script_timeout(self, seconds):
+        pass  # one timeout for the whole session, set by SharedBrowser
+
+    def quit(self):
+        self.browser.close_tab(self.handle)
+
+
 class WebGrabber(WebGetter):
     """
     Event-driven Web grabber using a DOM MutationObserver. It installs an observer in the page
-    and optionally blocks until a change occurs, avoiding fixed-interval polling.
+    and blocks in the browser until a change occurs, avoiding fixed-interval polling.
     """
 
-    def __init__(self, url):
+    # The observer callback: count the mutation, note which contests it touched (the contest_ row
+    # ids of the enclosing card, or of cards it inserted), and wake a pending WAIT_FOR_CHANGE_JS
+    NOTIFY_JS = """
+        window.__siot_dirty = window.__siot_dirty || new Set();
+        if (!window.__siot_channel && window.BroadcastChannel) {
+            // Tabs of a SharedBrowser: when another tab changes, stop waiting so it gets its turn
+            window.__siot_channel = new BroadcastChannel('siot');
+            window.__siot_channel.onmessage = function(){
+                var waiter = window.__siot_waiter;
+                if (waiter) { window.__siot_waiter = null; waiter(window.__siot_change_counter || 0); }
+                else { window.__siot_yield = true; }
+            };
+        }
+        window.__siot_notify = window.__siot_notify || function(records){
+            window.__siot_change_counter = (window.__siot_change_counter || 0) + 1;
+            if (window.__siot_channel) { window.__siot_channel.postMessage(1); }
+            (records || []).forEach(function(record){
+                var target = record.target.nodeType === 1 ? record.target : record.target.parentElement;
+                var card = target && target.closest('div.card');
+                var cards = card ? [card] : [];
+                if (!card) {
+                    record.addedNodes.forEach(function(node){
+                        if (node.nodeType !== 1) { return; }
+                        if (node.matches('div.card')) { cards.push(node); }
+                        node.querySelectorAll('div.card').forEach(function(c){ cards.push(c); });
+                    });
+                }
+                cards.forEach(function(c){
+                    c.querySelectorAll('tr[id^="contest_"]').forEach(function(row){ window.__siot_dirty.add(row.id); });
+                });
+            });
+            var waiter = window.__siot_waiter;
+            if (waiter) { window.__siot_waiter = null; waiter(window.__siot_change_counter); }
+        };
+    """
+
+    # The outerHTML of the card of every contest marked dirty since the last read, once per card
+    READ_DIRTY_JS = """
+        var ids = Array.from(window.__siot_dirty || []);
+        window.__siot_dirty = new Set();
+        var cards = new Set();
+        ids.forEach(function(id){
+            var row = document.getElementById(id);
+            var card = row && row.closest('div.card');
+            if (card) { cards.add(card); }
+        });
+        return Array.from(cards).map(function(card){ return card.outerHTML; });
+    """
+
+    # What query() returns in QUERY_MODE=fragments: just the changed cards, which every parser
+    # backend indexes like the full page
+    FRAGMENT_PAGE = "<html><body>{}</body></html>"
+
+    @staticmethod
+    def is_fragment_page(html) -> bool:
+        # Chrome's page_source always serializes a <head>, so real pages never start like this
+        return html.startswith(WebGrabber.FRAGMENT_PAGE[:12])
+
+    # execute_async_script(WAIT_FOR_CHANGE_JS, last_counter, timeout_ms): resolves with the change
+    # counter as soon as it passes last_counter, when another tab of a shared browser changed, or
+    # when the timeout runs out. -1 means the page
+    # lost its observer (navigation/reload) and it needs reinstalling.
+    WAIT_FOR_CHANGE_JS = """
+        var last = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+        new Promise(function(resolve){
+            if (!window.__siot_obs || !window.__siot_notify) { resolve(-1); return; }
+            var counter = window.__siot_change_counter || 0;
+            if (counter > last) { resolve(counter); return; }
+            if (window.__siot_yield) { window.__siot_yield = false; resolve(counter); return; }
+            var timer = setTimeout(function(){
+                window.__siot_waiter = null;
+                resolve(window.__siot_change_counter || 0);
+            }, timeoutMs);
+            window.__siot_waiter = function(n){ clearTimeout(timer); resolve(n); };
+        }).then(done);
+    """
+
+    def __init__(self, url, browser: SharedBrowser = None):
         self.url = url
+        # None: a Chrome of our own; otherwise a tab of this shared browser
+        self.browser = browser
+        # 'page' returns driver.page_source on every change; 'fragments' only the changed contests;
+        # 'network' the scoreboard's own live-update responses, read from Chrome's performance log
+        self.query_mode = os.getenv('QUERY_MODE', 'page').lower()
+        if self.query_mode == 'network' and browser is not None:
+            # The performance log is per session, not per tab, so tabs can't tell their responses apart
+            print("QUERY_MODE=network needs a browser per sport; using page mode with SHARED_BROWSER")
+            self.query_mode = 'page'
+        # Which XHR/fetch responses carry scores
+        self.network_pattern = re.compile(os.getenv('NETWORK_URL_PATTERN', r'livestream|scoreboard|\.json'))
+        self._pending_responses = set()
         # Optional: event-driven change detection
         self.dom_wait = os.getenv('DOM_WAIT', '0') in ('1', 'true', 'True')
         try:
             self.dom_wait_timeout = float(os.getenv('DOM_WAIT_TIMEOUT', '10'))
         except Exception:
             self.dom_wait_timeout = 10.0
+        # Without DOM_WAIT, query() still returns on the first mutation but gives up after this long
+        try:
+            self.poll_interval = float(os.getenv('POLL_INTERVAL', '0.25'))
+        except Exception:
+            self.poll_interval = 0.25
         # Observer scope: 'body' (default, broad) or 'contest' (narrow)
         self.observe_scope = os.getenv('OBSERVE_SCOPE', 'body').lower()
+        # Assets the page never needs loaded (BLOCK_RESOURCES); a shared browser has its own
+        self.blocked_urls, self.browser_flags = blocking_profile()
         self.driver = self._create_driver()
-        self.last_page_source = ''
+        self.page_digests = PageDigests()
         self._last_change_counter = 0
         self._first_emit = True
 
     def _create_driver(self):
-        ua = UserAgent()
-        options = Options()
-        options.add_argument(f"user-agent={ua.random}")
-        options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
+        if self.browser is not None:
+            driver = self.browser.open_tab(self.url)
+            print(f"TAB OPENED FOR URL: {self.url}")
+            self._install_dom_observer(driver)
+            return driver
+        options = chrome_options(*self.browser_flags)
+        if self.query_mode == 'network':
+            # Network.* events end up in driver.get_log('performance')
+            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
         driver = webdriver.Chrome(options=options)
+        driver.set_script_timeout(max(self.dom_wait_timeout, self.poll_interval) + 5)
+        # Stays in effect for refresh() and get() on this driver, so restarts load less too
+        block_urls(driver, self.blocked_urls)
         driver.get(self.url)
         print(f"DRIVER CREATED FOR URL: {self.url}")
         self._install_dom_observer(driver)
@@ -145,13 +472,13 @@ class WebGrabber(WebGetter):
         try:
             scope = self.observe_scope if self.observe_scope in ('body', 'contest') else 'body'
             res = drv.execute_script(
-                """
+                WebGrabber.NOTIFY_JS + """
                 (function(scope){
                     if (!window.__siot_change_counter) { window.__siot_change_counter = 0; }
                     function setupOn(target, scopeName){
                         try{
                             if (window.__siot_obs) { try{ window.__siot_obs.disconnect(); }catch(e){} }
-                            var obs = new MutationObserver(function(){ window.__siot_change_counter++; });
+                            var obs = new MutationObserver(function(records){ window.__siot_notify(records); });
                             obs.observe(target, {subtree:true, childList:true, characterData:true, attributes:true});
                             window.__siot_obs = obs;
                             window.__siot_scope = scopeName;
@@ -185,6 +512,7 @@ class WebGrabber(WebGetter):
         # Reuse the existing driver whenever possible; only recreate on failure
         if url is not None:
             self.url = url
+        self._pending_responses.clear()
         try:
             if getattr(self, 'driver', None) is None:
                 self.driver = self._create_driver()
@@ -209,7 +537,7 @@ class WebGrabber(WebGetter):
         # Emit an initial snapshot without waiting, so pages with no live mutations still record once
         if self._first_emit:
             current_page_source = self.driver.page_source
-            self.last_page_source = current_page_source
+            self.page_digests.changed(current_page_source)
             self._first_emit = False
             return True, current_page_source
 
@@ -224,7 +552,7 @@ class WebGrabber(WebGetter):
                             if (window.__siot_obs) { try{ window.__siot_obs.disconnect(); }catch(e){} }
                             var target = row.closest('div.col-md-auto.p-0') || row.closest('div.card') || row.closest('table') || row.parentElement || row;
                             try {
-                                var obs = new MutationObserver(function(){ window.__siot_change_counter++; });
+                                var obs = new MutationObserver(function(records){ window.__siot_notify(records); });
                                 obs.observe(target, {subtree:true, childList:true, characterData:true, attributes:true});
                                 window.__siot_obs = obs; window.__siot_scope = 'contest';
                             } catch(e) {}
@@ -235,29 +563,104 @@ class WebGrabber(WebGetter):
             except Exception:
                 pass
 
-        if self.dom_wait:
-            try:
-                WebDriverWait(self.driver, self.dom_wait_timeout, poll_frequency=0.25).until(
-                    lambda d: (d.execute_script("return window.__siot_change_counter || 0") or 0) > self._last_change_counter
-                )
-            except TimeoutException:
-                return False, self.last_page_source
-
+        # Block in the browser until the observer fires, instead of polling the counter from here
+        timeout = self.dom_wait_timeout if self.dom_wait else self.poll_interval
+        if self.browser is not None:
+            # Other sports are queued behind this wait for the shared driver
+            timeout = min(timeout, self.browser.wait_slice)
         try:
-            counter = self.driver.execute_script("return window.__siot_change_counter || 0") or 0
-        except Exception:
-            counter = 0
+            counter = self.driver.execute_async_script(
+                WebGrabber.WAIT_FOR_CHANGE_JS, self._last_change_counter, int(timeout * 1000)
+            )
+        except TimeoutException:
+            return False, None
+        except WebDriverException as ex:
+            # e.g. "document unloaded while waiting for result" on a reload, or a crashed renderer
+            print(f"Waiting for a change failed, reinstalling the observer: {ex}")
+            self._install_dom_observer(self.driver)
+            return False, None
+        if counter is None or counter < 0:
+            # The page reloaded under us; observe the new document and count from its counter
+            self._install_dom_observer(self.driver)
+            return False, None
+
+        if self.query_mode == 'network':
+            # Responses can land before their DOM update, so read the log on every wakeup
+            dom_changed = counter > self._last_change_counter
+            self._last_change_counter = max(counter, self._last_change_counter)
+            payload = WebGrabber.network_payload(self._captured_bodies(), lambda: self.driver.page_source)
+            if payload is None and dom_changed:
+                # The page changed but no response held contests we understand: read the page itself
+                payload = self.driver.page_source
+            if payload is not None and self.page_digests.changed(payload):
+                return True, payload
+            return False, None
 
         if counter > self._last_change_counter:
             self._last_change_counter = counter
+            if self.query_mode == 'fragments':
+                # Transfer (and later parse) only the cards that changed, not the whole page
+                cards = self.driver.execute_script(WebGrabber.READ_DIRTY_JS)
+                if not cards:
+                    return False, None
+                return True, WebGrabber.FRAGMENT_PAGE.format("".join(cards))
             current_page_source = self.driver.page_source
-            if self.last_page_source != current_page_source:
-                self.last_page_source = current_page_source
+            if self.page_digests.changed(current_page_source):
                 return True, current_page_source
-            else:
-                return False, self.last_page_source
-        else:
-            return False, self.last_page_source
+        # Nothing new: no page to hand back
+        return False, None
+
+    def _captured_bodies(self):
+        """Bodies of the matching XHR/fetch responses that finished loading since the last call."""
+        finished = []
+        for entry in self.driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            method, params = message.get('method'), message.get('params', {})
+            if method == 'Network.responseReceived':
+                if params.get('type') in ('XHR', 'Fetch') and self.network_pattern.search(params['response']['url']):
+                    self._pending_responses.add(params['requestId'])
+            elif method == 'Network.loadingFinished' and params.get('requestId') in self._pending_responses:
+                self._pending_responses.discard(params['requestId'])
+                finished.append(params['requestId'])
+            elif method == 'Network.loadingFailed':
+                self._pending_responses.discard(params.get('requestId'))
+        # Responses still loading stay pending and are picked up on a later call
+        bodies = []
+        for request_id in finished:
+            try:
+                response = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            except Exception as ex:
+                print(f"Could not read response body {request_id}: {ex}")
+                continue
+            body = response.get('body', '')
+            if response.get('base64Encoded'):
+                body = base64.b64decode(body).decode('utf-8', 'replace')
+            bodies.append(body)
+        return bodies
+
+    @staticmethod
+    def network_payload(bodies, read_page=None):
+        """
+        One snapshot from captured response bodies: JSON contests merged into {"contests": [...]}
+        for JsonParser, or HTML fragments with contest rows wrapped like QUERY_MODE=fragments.
+        None if there are none; other bodies (JSON of another shape, JSONP, scripts, text) count
+        as neither. If one drain holds both kinds, neither alone is the whole update, so the page
+        itself is read through read_page() instead (None without one).
+        """
+        contests, fragments = [], []
+        # Newest first: the contest index keeps the first contest a team appears in
+        for body in reversed(bodies):
+            if JsonParser.is_payload(body):
+                contests.extend(JsonParser.parse_page(body))
+            elif HttpGetter.CONTEST_ROW.search(body):
+                fragments.append(body)
+        if contests and fragments:
+            return read_page() if read_page is not None else None
+        if contests:
+            return json.dumps({"contests": contests})
+        if fragments:
+            return WebGrabber.FRAGMENT_PAGE.format("".join(fragments))
+        return None
 
     def quit(self):
         if getattr(self, 'driver', None) is not None:
@@ -268,6 +671,122 @@ class WebGrabber(WebGetter):
 
 
 
+class HttpGetter(WebGetter):
+    """
+    Browserless grabber (FETCH_MODE=http): the scoreboard is server-rendered, so poll it with a
+    keep-alive HTTP session instead of running Chrome. Requests are conditional (If-None-Match /
+    If-Modified-Since), a 304 or an unchanged body costs no further work, and the poll interval
+    backs off while the page stays the same and snaps back when it changes.
+
+    If the page keeps arriving as an empty app shell, or without the scoreboard's container (it
+    needs JS to render), the sport falls back to a Selenium WebGrabber until the next restart. A
+    scoreboard with no contest rows is an off-day or a schedule not yet posted, not a reason to.
+    """
+
+    CONTEST_ROW = re.compile(r"""id=["']?contest_\d""")
+    # The server-rendered scoreboard wraps its cards in this, games or not
+    SCOREBOARD_CONTAINER = re.compile(r"""class=["'](?:[^"']*\s)?container-fluid[\s"']""")
+    # Markup and scripts, stripped to see whether the page has any text of its own
+    NOT_TEXT = re.compile(r"<script\b.*?</script>|<style\b.*?</style>|<[^>]*>", re.S | re.I)
+
+    def __init__(self, url, browser: SharedBrowser = None):
+        self.url = url
+        self.browser = browser
+        self.min_interval = float(os.getenv('HTTP_MIN_INTERVAL', '2'))
+        self.max_interval = float(os.getenv('HTTP_MAX_INTERVAL', '30'))
+        self.backoff = float(os.getenv('HTTP_BACKOFF', '1.5'))
+        self.timeout = float(os.getenv('HTTP_TIMEOUT', '10'))
+        # Consecutive pages that need JS to render before handing the sport to Chrome
+        self.fallback_after = int(os.getenv('HTTP_FALLBACK_AFTER', '3'))
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = UserAgent().random
+        self.fallback = None
+        self.stats = defaultdict(int)
+        self.restart(url)
+
+    def restart(self, url=None):
+        if url is not None:
+            self.url = url
+        if self.fallback is not None:
+            # Give plain HTTP another chance each restart rather than keeping Chrome for good
+            self.fallback.quit()
+            self.fallback = None
+        self.etag = None
+        self.last_modified = None
+        self.page_digests = PageDigests()
+        self.interval = self.min_interval
+        self.next_fetch = 0.0
+        self.misses = 0
+
+    def _validators(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    @staticmethod
+    def needs_js(html) -> bool:
+        """True for an empty app shell or a page without the scoreboard container."""
+        if HttpGetter.CONTEST_ROW.search(html):
+            return False
+        return not HttpGetter.SCOREBOARD_CONTAINER.search(html) or not HttpGetter.NOT_TEXT.sub('', html).strip()
+
+    def _wait_and_back_off(self, changed):
+        self.interval = self.min_interval if changed else min(self.interval * self.backoff, self.max_interval)
+        self.next_fetch = time.monotonic() + self.interval
+
+    def query(self):
+        if self.fallback is not None:
+            return self.fallback.query()
+
+        # Block until this sport's next poll is due, like WebGrabber blocks on the observer
+        time.sleep(max(self.next_fetch - time.monotonic(), 0))
+        self.stats['requests'] += 1
+        try:
+            response = self.session.get(self.url, headers=self._validators(), timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"HTTP fetch failed for {self.url}: {e}")
+            self.stats['errors'] += 1
+            self._wait_and_back_off(False)
+            return False, None
+
+        if response.status_code == 304:
+            self.stats['not_modified'] += 1
+            self._wait_and_back_off(False)
+            return False, None
+        if response.status_code != 200:
+            print(f"HTTP {response.status_code} for {self.url}")
+            self.stats['errors'] += 1
+            self._wait_and_back_off(False)
+            return False, None
+
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+        if 'charset' not in response.headers.get('Content-Type', ''):
+            response.encoding = 'utf-8'  # requests would assume ISO-8859-1 for text/html
+        html = response.text
+        if HttpGetter.needs_js(html):
+            self.misses += 1
+            if self.misses >= self.fallback_after:
+                print(f"No scoreboard over HTTP after {self.misses} fetches; using the browser for {self.url}")
+                self.fallback = WebGrabber(self.url, browser=self.browser)
+                return self.fallback.query()
+        else:
+            self.misses = 0
+
+        changed = self.page_digests.changed(html)
+        self.stats['changed' if changed else 'unchanged'] += 1
+        self._wait_and_back_off(changed)
+        return (True, html) if changed else (False, None)
+
+    def quit(self):
+        if self.fallback is not None:
+            self.fallback.quit()
+        self.session.close()
+
+
 class DatabasePutter:
     """
     Base class for the database putter. Currently there are two derived variants:
@@ -287,22 +806,41 @@ class DatabasePutter:
     def insert_game(self, game_info):
         pass
 
+    def put_many(self, game_infos):
+        """Store a batch of changed games. Variants without a bulk path write them one by one."""
+        for game_info in game_infos:
+            self.insert_school(game_info["home_team"], game_info["sport"])
+            self.insert_school(game_info["away_team"], game_info["sport"])
+            self.insert_game(game_info)
+
+    def stats(self):
+        return {}
+
 
 class PostgresDatabasePutter(DatabasePutter):
     """
-    The derived class that puts the data into the PostgreSQL database
+    The derived class that puts the data into the PostgreSQL database. Each thread writes through
+    its own connection: with several sink workers, a shared psycopg2 cursor would interleave their
+    statements and one worker's commit or rollback would end another's transaction.
     """
     def __init__(self, config:DotMap):
         super().__init__(config)
+        self.database = config.database
+        self.local = threading.local()
+
+    @property
+    def db(self) -> Database:
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = self.local.db = Database(
+                self.database.dbname,
+                self.database.user,
+                self.database.password,
+                self.database.host,
+                self.database.port
+            )
+        return db
 
-        self.db = Database(
-            config.database.dbname,
-            config.database.user,
-            config.database.password,
-            config.database.host,
-            config.database.port
-        )
-    
     def insert_sport(self, sport):
         self.db.insert_sport(sport)
 
@@ -310,7 +848,14 @@ class PostgresDatabasePutter(DatabasePutter):
         self.db.insert_school(school, sport)
 
     def insert_game(self, game_info):
-        self.db.insert_game(game_info)
+        return self.db.insert_game(game_info)
+
+    def put_many(self, game_infos):
+        # Schools and games for the whole batch in one transaction
+        return self.db.put_games(game_infos)
+
+    def stats(self):
+        return {'known_entities': known_entities.stats()}
 
 class DebugPrintDatabasePutter(DatabasePutter):
     """
@@ -576,56 +1121,121 @@ class CGIDatabasePutter(DatabasePutter):
                 print(f"8AM clear worker error: {e}")
 
 class Parser:
+    """
+    Reference parser backend: BeautifulSoup over lxml's HTML parser, with the plugins in
+    PLUGINS. LxmlParser implements the same interface directly on lxml with XPath; pick one with
+    PARSER_BACKEND (see PARSER_BACKENDS).
+    """
+    CONTEST_ROW_ID = re.compile(r"^contest_\d+")
+
+    @staticmethod
+    def parse_page(html):
+        return BeautifulSoup(html, 'lxml')
+
+    @staticmethod
+    def has_contest_rows(page) -> bool:
+        return page.find('tr', id=re.compile(r'^contest_')) is not None
+
+    @staticmethod
+    def normalize_team(s: str) -> str:
+        """Lowercase alphanumerics only, so 'Utah St.' / 'utah st' / 'UTAH-ST' compare equal."""
+        if not isinstance(s, str):
+            return ""
+        return re.sub(r"[^a-z0-9]", "", s.lower())
+
+    @staticmethod
+    def _contest_container(row):
+        # The enclosing <div class="col-md-auto p-0"> column, or the card if the layout differs
+        column_div = row.find_parent(
+            "div",
+            class_=lambda c: isinstance(c, list) and ("col-md-auto" in c and "p-0" in c),
+        )
+        if column_div is None:
+            column_div = row.find_parent("div", class_="card")
+        return column_div
+
+    @staticmethod
+    def build_contest_index(soup) -> dict:
+        """
+        Walk the scoreboard once and map every normalized team name to its contest column.
+
+        Each contest row contributes its logo alt text and its link text, both with and without
+        the trailing record (e.g. 'Utah St. (4-1)'). Keys keep page order, and the first contest
+        a name appears in wins, matching the old top-to-bottom scan.
+        """
+        index = {}
+        for row in soup.find_all("tr", id=Parser.CONTEST_ROW_ID):
+            texts = []
+            img = row.find("img", alt=True)
+            if img:
+                texts.append(img.get("alt", ""))
+            a = row.find("a")
+            if a:
+                link_text = a.get_text(strip=True)
+                texts.append(link_text)
+                texts.append(link_text.split(" (")[0])
+
+            container = None
+            for text in texts:
+                key = Parser.normalize_team(text)
+                if key and key not in index:
+                    if container is None:
+                        container = Parser._contest_container(row)
+                    index[key] = container
+        return index
+
+    @staticmethod
+    def lookup_school_column(index: dict, school_name):
+        """
+        Contest column for a configured team from a build_contest_index() result.
+
+        Exact names are a dict lookup. Partial names from the config (e.g. 'Leh' for 'Lehigh')
+        fall back to the first indexed name containing them, which only scans the index keys.
+        """
+        name = Parser.resolve_team(index, school_name)
+        return (index[name] if name is not None else None), False
+
+    @staticmethod
+    def resolve_team(index: dict, school_name):
+        """The index key a configured team matches (see lookup_school_column), or None."""
+        target = Parser.normalize_team(school_name)
+        if target in index:
+            return target
+        return next((key for key in index if target in key), None)
+
     @staticmethod
     def extract_school_column(soup, school_name):
         """Extracts the specific <div class="col-md-auto p-0"> column containing the specified school.
-        
+
+        Convenience wrapper for a single lookup; to look up several teams in the same page, build
+        the index once with build_contest_index() and use lookup_school_column().
+
         Args:
-            html_content (str): The HTML content to parse.
+            soup: The parsed scoreboard page.
             school_name (str): The name of the school to search for.
 
         Returns:
-            str: The HTML of the encapsulating <div class="col-md-auto p-0"> column with the team,
-                 or a message if not found.
+            (column, had_error): the encapsulating <div class="col-md-auto p-0"> column with the
+            team, or None if not found.
         """
-
         try:
-            # Normalize function to compare school names robustly
-            def _norm(s: str) -> str:
-                if not isinstance(s, str):
-                    return ""
-                return re.sub(r"[^a-z0-9]", "", s.lower())
-
-            target = _norm(school_name)
-
-            # Search contest rows for a matching school by img alt or link text
-            for row in soup.find_all("tr", id=re.compile(r"^contest_\d+")):
-                # Candidate strings to check in this row
-                texts = []
-                img = row.find("img", alt=True)
-                if img:
-                    texts.append(img.get("alt", ""))
-                a = row.find("a")
-                if a:
-                    texts.append(a.get_text(strip=True))
-
-                if any(_norm(t).find(target) != -1 for t in texts):
-                    # Found the row; return the enclosing column container
-                    column_div = row.find_parent(
-                        "div",
-                        class_=lambda c: isinstance(c, list) and ("col-md-auto" in c and "p-0" in c),
-                    )
-                    if column_div is None:
-                        # Fallback to card container
-                        column_div = row.find_parent("div", class_="card")
-                    return column_div, False
-
-            # Not found
-            return None, False
+            return Parser.lookup_school_column(Parser.build_contest_index(soup), school_name)
         except Exception as ex:
             print(ex)
             return (None, True)
 
+    @staticmethod
+    def container_digest(column) -> bytes:
+        """Digest of everything a plugin can read in the container: tag names, attributes and text."""
+        # Walking the tree is several times cheaper than serializing it with Tag.encode()
+        h = hashlib.blake2b(digest_size=16)
+        for node in column.descendants:
+            if isinstance(node, NavigableString):
+                h.update(node.encode())
+            else:
+                h.update(f"\x00{node.name}{node.attrs}\x00".encode())
+        return h.digest()
+
     @staticmethod
     def parse_sport_event(soup, sport):
         try:
@@ -633,16 +1243,351 @@ class Parser:
         except Exception as ex:
             print(ex)
             return None, True
+
+
+class LxmlParser(Parser):
+    """
+    Fast parser backend: lxml.html elements and the plugins' precompiled XPath, skipping
+    BeautifulSoup's tree building. Produces the same game_info as Parser.
+    """
+    CONTEST_ROWS = plugins._xpath(r'//tr[re:test(@id, "^contest_\d+")]')
+    ANY_CONTEST_ROW = plugins._xpath('boolean(//tr[starts-with(@id, "contest_")])')
+    LOGO_ALT = plugins._xpath('(.//img[@alt])[1]/@alt')
+    LINK = plugins._xpath('(.//a)[1]')
+    # Parser._contest_container's column match never fires (BeautifulSoup hands the class
+    # lambda one class at a time), so in practice the container is the nearest card
+    CARD = plugins._xpath(f'ancestor::div[{plugins._has_class("card")}][1]')
+
+    @staticmethod
+    def parse_page(html):
+        # lxml refuses empty documents; BeautifulSoup just yields an empty tree
+        return lxml.html.document_fromstring(html if html and html.strip() else '<html></html>')
+
+    @staticmethod
+    def has_contest_rows(page) -> bool:
+        return LxmlParser.ANY_CONTEST_ROW(page)
+
+    @staticmethod
+    def _contest_container(row):
+        cards = LxmlParser.CARD(row)
+        return cards[0] if cards else None
+
+    @staticmethod
+    def build_contest_index(page) -> dict:
+        index = {}
+        for row in LxmlParser.CONTEST_ROWS(page):
+            texts = list(LxmlParser.LOGO_ALT(row))
+            links = LxmlParser.LINK(row)
+            if links:
+                link_text = plugins._text(links[0])
+                texts.append(link_text)
+                texts.append(link_text.split(" (")[0])
+
+            container = None
+            for text in texts:
+                key = Parser.normalize_team(text)
+                if key and key not in index:
+                    if container is None:
+                        container = LxmlParser._contest_container(row)
+                    index[key] = container
+        return index
+
+    @staticmethod
+    def extract_school_column(page, school_name):
+        try:
+            return Parser.lookup_school_column(LxmlParser.build_contest_index(page), school_name)
+        except Exception as ex:
+            print(ex)
+            return (None, True)
+
+    @staticmethod
+    def container_digest(element) -> bytes:
+        # Without the tail: the text after the card belongs to the page, not the contest
+        return hashlib.blake2b(lxml.html.tostring(element, with_tail=False), digest_size=16).digest()
+
+    @staticmethod
+    def parse_sport_event(element, sport):
+        try:
+            return PLUGINS[sport](element, plugins.XPATH).game_info, False
+        except Exception as ex:
+            print(ex)
+            return None, True
+
+
+class StrainedParser(Parser):
+    """
+    BeautifulSoup backend that only builds the scoreboard cards. Navigation, scripts, ads and
+    other page chrome are skipped by the tokenizer instead of being turned into Tag objects, and
+    contest presence is read off the resulting index rather than a second scan of the page.
+    """
+    # parse_only sees the whole class attribute as one string, so split it into classes here
+    CARDS = SoupStrainer('div', class_=lambda c: c is not None and 'card' in c.split())
+
+    @staticmethod
+    def parse_page(html):
+        return BeautifulSoup(html, 'lxml', parse_only=StrainedParser.CARDS)
+
+
+class JsonParser(Parser):
+    """
+    Backend for the scoreboard's own live-update payloads (QUERY_MODE=network): JSON contests
+    keyed by the plugins' field names, read through plugins.JSON instead of an HTML tree.
+    Accepts {"contests": [...]} or a bare list; anything in it that isn't a contest (a dict with
+    a list of named teams) is dropped. Not a PARSER_BACKEND: the Controller picks it per
+    payload, since the first snapshot of every sport is still a full HTML page.
+    """
+
+    @staticmethod
+    def is_payload(text) -> bool:
+        return text.lstrip()[:1] in ('{', '[')
+
+    @staticmethod
+    def parse_page(text):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return []
+        contests = data.get("contests") if isinstance(data, dict) else data
+        if not isinstance(contests, list):
+            return []
+        return [contest for contest in contests if JsonParser.is_contest(contest)]
+
+    @staticmethod
+    def is_contest(contest) -> bool:
+        if not isinstance(contest, dict):
+            return False
+        teams = contest.get("teams")
+        return (isinstance(teams, list) and bool(teams)
+                and all(isinstance(team, dict) and isinstance(team.get("name"), str) for team in teams))
+
+    @staticmethod
+    def has_contest_rows(page) -> bool:
+        return bool(page)
+
+    @staticmethod
+    def build_contest_index(page) -> dict:
+        index = {}
+        for contest in page:
+            for team in contest.get("teams") or []:
+                name = team.get("name") or ""
+                for text in (name, name.split(" (")[0]):
+                    key = Parser.normalize_team(text)
+                    if key and key not in index:
+                        index[key] = contest
+        return index
+
+    @staticmethod
+    def container_digest(contest) -> bytes:
+        return hashlib.blake2b(json.dumps(contest, sort_keys=True).encode(), digest_size=16).digest()
+
+    @staticmethod
+    def parse_sport_event(contest, sport):
+        try:
+            return PLUGINS[sport](contest, plugins.JSON).game_info, False
+        except Exception as ex:
+            print(ex)
+            return None, True
+
+
+PARSER_BACKENDS = {
+    'soup': Parser,
+    'strained': StrainedParser,
+    'lxml': LxmlParser,
+}
         
 
 
+class ParseMemo:
+    """
+    Remembers a digest of each team's contest container from the last snapshot. Any mutation
+    anywhere on the page re-delivers the whole page, but usually only one game's card changed;
+    for the rest the digest matches and the plugin run and diff can be skipped.
+    """
+
+    def __init__(self):
+        self.digests = {}
+        self.lookups = defaultdict(int)
+        self.hits = defaultdict(int)
+
+    def unchanged(self, sport, key, digest) -> bool:
+        self.lookups[sport] += 1
+        if self.digests.get(key) == digest:
+            self.hits[sport] += 1
+            return True
+        return False
+
+    def remember(self, key, digest):
+        self.digests[key] = digest
+
+    def forget(self, key):
+        self.digests.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            sport: {
+                'lookups': lookups,
+                'hits': self.hits[sport],
+                'hit_rate': round(self.hits[sport] / lookups, 3),
+            }
+            for sport, lookups in self.lookups.items()
+        }
+
+
+def parse_snapshot(parser, sport, html, teams, known, names=None):
+    """
+    Parse one snapshot of a sport's scoreboard for the configured teams. Runs in the Controller
+    thread or in a parse worker process, so it only takes and returns picklable values.
+
+    `names` is None for a full page, where partial config names match the first contest name
+    containing them. A partial snapshot (changed cards or network contests only) passes the names
+    the teams resolved to on the last full page instead and only matches those exactly: a team
+    whose own card didn't change must not be bound to some other card that did.
+
+    Returns None when the page has no contest rows, otherwise a list of
+    (team, key, digest, game_info, hadErr, name) for every team with a contest on the page, name
+    being the contest name it matched. game_info is None when the container digest equals
+    known[key], i.e. the plugin run was skipped.
+    """
+    page = parser.parse_page(html)
+    # One pass over the contest rows; an empty index means the scoreboard isn't there
+    contest_index = parser.build_contest_index(page)
+    if not contest_index:
+        return None
+
+    results = []
+    for team in teams:
+        if names is None:
+            name = Parser.resolve_team(contest_index, team)
+        else:
+            name = names.get(team) or Parser.normalize_team(team)
+            if name not in contest_index:
+                name = None
+        if name is None:
+            continue
+        school_column = contest_index[name]
+        key = f"{sport}:{team}"
+        digest = parser.container_digest(school_column)
+        if known.get(key) == digest:
+            # Same container HTML as last snapshot: same game_info, nothing to diff
+            results.append((team, key, digest, None, False, name))
+            continue
+        game_info, hadErr = parser.parse_sport_event(school_column, sport)
+        if hadErr:
+            print("ERROR PARSING SPORT EVENT")
+        results.append((team, key, digest, game_info, hadErr, name))
+    return results
+
+
+class Stage:
+    """
+    One stage of the Controller pipeline: `workers` threads block on their inbox, call handle()
+    on each item and put whatever it returns (unless None) on the downstream stage. Items are
+    (sport, observed_at, payload) tuples.
+
+    Inboxes are bounded, so a stage that falls behind blocks the one feeding it instead of
+    buffering without limit. With keyed=True each worker has its own inbox and items are routed by
+    sport, which keeps every sport's items in order however many workers there are. With
+    batch=True handle() gets everything that queued up while the previous call ran.
+    """
+
+    STOP = object()
+
+    def __init__(self, name, handle, workers=1, maxsize=64, keyed=False, batch=False, downstream=None):
+        self.name = name
+        self.handle = handle
+        self.batch = batch
+        self.downstream = downstream
+        self.inboxes = [Queue(maxsize) for _ in range(workers if keyed else 1)]
+        self.threads = [
+            threading.Thread(target=self._loop, args=(self.inboxes[i % len(self.inboxes)],), name=f"{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.wait_seconds = 0.0
+        self.busy_seconds = 0.0
+        self.age_seconds = 0.0
+        self.max_age = 0.0
+        self.max_depth = 0
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def put(self, item):
+        inbox = self.inboxes[hash(item[0]) % len(self.inboxes)]
+        inbox.put((time.monotonic(), item))
+        self.max_depth = max(self.max_depth, inbox.qsize())
+
+    def close(self):
+        """Finish everything already queued, then stop the workers."""
+        for i in range(len(self.threads)):
+            self.inboxes[i % len(self.inboxes)].put((None, Stage.STOP))
+        for thread in self.threads:
+            thread.join()
+
+    def _loop(self, inbox):
+        while True:
+            entries = [inbox.get()]
+            while self.batch and entries[-1][1] is not Stage.STOP:
+                try:
+                    entries.append(inbox.get_nowait())
+                except Empty:
+                    break
+            stop = entries[-1][1] is Stage.STOP
+            if stop:
+                entries.pop()
+            if entries:
+                self._run(entries)
+            if stop:
+                return
+
+    def _run(self, entries):
+        started = time.monotonic()
+        items = [item for _, item in entries]
+        try:
+            result = self.handle(items if self.batch else items[0])
+        except Exception as e:
+            print(f"Pipeline stage {self.name} failed: {e}")
+            result = None
+        if result is not None and self.downstream is not None:
+            self.downstream.put(result)
+        finished = time.monotonic()
+        with self.lock:
+            self.processed += len(items)
+            self.busy_seconds += finished - started
+            for enqueued, (_, observed, _) in entries:
+                self.wait_seconds += started - enqueued
+                self.age_seconds += finished - observed
+                self.max_age = max(self.max_age, finished - observed)
+
+    def stats(self) -> dict:
+        """Queue depth, and per item: time queued, time handled, and time since the page was fetched."""
+        with self.lock:
+            n = self.processed or 1
+            return {
+                'workers': len(self.threads),
+                'depth': sum(inbox.qsize() for inbox in self.inboxes),
+                'max_depth': self.max_depth,
+                'processed': self.processed,
+                'wait_ms': round(self.wait_seconds / n * 1000, 1),
+                'busy_ms': round(self.busy_seconds / n * 1000, 1),
+                'age_ms': round(self.age_seconds / n * 1000, 1),
+                'max_age_ms': round(self.max_age * 1000, 1),
+            }
+
+
 class Controller:
     """
     The Controller will be they entry class of the program. It initilizes
     all the sports/WebGrabbers, gets their data, pipes it into the parser,
     then to the database. 
     """
-    def __init__(self, config_file, webgrabber:Type[WebGetter], parser:Type[Parser], dbputter:Type[DatabasePutter], playback_date=None):
+    # Pause before querying again after query() raised, so a broken driver doesn't spin a core
+    QUERY_RETRY_SECONDS = 1
+
+    def __init__(self, config_file, webgrabber:Type[WebGetter], parser:Type[Parser], dbputter:Type[DatabasePutter], playback_date=None,
+                 parse_workers=0, sink_workers=1, queue_size=64, shared_browser=False):
         if webgrabber == WebPlayback and playback_date is None:
             raise ValueError('playback_date must be provided when using WebPlayback')
 
@@ -663,15 +1608,23 @@ class Controller:
             self.sports[key] = list(value)
 
         self.grabbers = {}
+        self.parse_memo = ParseMemo()
+        # sport -> {team: contest name it matched on the last full page}
+        self.team_names = defaultdict(dict)
+        self.previous_game_info = defaultdict(lambda: "")
     # Track consecutive parse failures per sport to avoid aggressive restarts
         self.parse_failures = defaultdict(int)
+        # Consecutive query() errors per sport; the fetch thread restarts its grabber after a few
+        self.query_failures = defaultdict(int)
+        # One Chrome with a tab per sport instead of a Chrome per sport
+        self.browser = SharedBrowser() if shared_browser and webgrabber in (WebGrabber, HttpGetter) else None
         for sport in self.sports:
             if webgrabber == WebPlayback:
                 self.grabbers[sport] = webgrabber(Controller.build_url(sport), playback_date)
-            elif webgrabber == WebGrabber:
-                self.grabbers[sport] = webgrabber(Controller.build_url(sport))
+            elif webgrabber in (WebGrabber, HttpGetter):
+                self.grabbers[sport] = webgrabber(Controller.build_url(sport), browser=self.browser)
             else:
-                raise ValueError("webgrabber must be of type WebGrabber or WebPlayback")
+                raise ValueError("webgrabber must be of type WebGrabber, HttpGetter or WebPlayback")
             # self.grabbers[sport] = self.webgrabber(Controller.build_url(sport))
 
         # do db stuff
@@ -680,24 +1633,28 @@ class Controller:
 
         # Schedule the task for 2 AM daily
         schedule.every().day.at("02:00").do(self.restart_grabbers)
+        schedule.every(10).minutes.do(self.log_stats)
+
+        # fetch (grabber threads) -> parse -> diff -> sink, each stage blocking on a bounded inbox.
+        # parse_workers > 0 parses that many sports at once in worker processes; spawn rather than
+        # fork because this process already runs grabber threads and Chrome drivers. The diff
+        # stage owns previous_game_info and stays single-threaded.
+        self.parse_pool = None
+        if parse_workers > 0:
+            self.parse_pool = ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context('spawn'))
+        self.sink = Stage('sink', self._sink, workers=sink_workers, maxsize=queue_size, keyed=True, batch=True)
+        self.diff = Stage('diff', self._diff, maxsize=queue_size, downstream=self.sink)
+        self.parse = Stage('parse', self._parse, workers=max(parse_workers, 1), maxsize=queue_size, keyed=True, downstream=self.diff)
+        self.stages = (self.parse, self.diff, self.sink)
 
-        # If using event-driven WebGrabber, set up queue and worker threads
-        self.queue = None
         self.threads = {}
-        if webgrabber == WebGrabber:
-            self.queue = Queue()
-            for sport in self.sports:
-                t = threading.Thread(target=self._worker_loop, args=(sport,), daemon=True)
-                t.start()
-                self.threads[sport] = t
-        else:
-            # Poll interval from config, default to 2s
-            self.interval_seconds = 2
-            try:
-                if self.config.timing and self.config.timing.interval_seconds is not None:
-                    self.interval_seconds = int(self.config.timing.interval_seconds)
-            except Exception:
-                pass
+        # Poll interval from config for the polling path, default to 2s
+        self.interval_seconds = 2
+        try:
+            if self.config.timing and self.config.timing.interval_seconds is not None:
+                self.interval_seconds = int(self.config.timing.interval_seconds)
+        except Exception:
+            pass
 
     @staticmethod
     def build_url(sport):
@@ -708,81 +1665,45 @@ class Controller:
             f'sport_code={code}&game_date={gameday.month}%2F{gameday.day}%2F{gameday.year}'
         )
 
+    def log_stats(self):
+        print(f'Parse memo hit rates: {self.parse_memo.stats()}')
+        flaps = {sport: g.page_digests.flaps for sport, g in self.grabbers.items() if hasattr(g, 'page_digests')}
+        if flaps:
+            print(f'Page flaps (A -> B -> A): {flaps}')
+        http = {sport: {**g.stats, 'interval': g.interval, 'browser': g.fallback is not None}
+                for sport, g in self.grabbers.items() if isinstance(g, HttpGetter)}
+        if http:
+            print(f'HTTP fetch stats: {http}')
+        print(f'Pipeline stages: {self.pipeline_stats()}')
+        sink_stats = self.dbputter.stats()
+        if sink_stats:
+            print(f'Database sink stats: {sink_stats}')
+
     def restart_grabbers(self):
         print('Restarting grabbers on daily schedule')
         for sport in self.sports:
             new_url = Controller.build_url(sport)
             self.grabbers[sport].restart(url=new_url)
         
+    def pipeline_stats(self) -> dict:
+        return {stage.name: stage.stats() for stage in self.stages}
+
     def run(self):
-        previous_game_info = defaultdict(lambda: "")
+        for stage in reversed(self.stages):
+            stage.start()
 
-        # Event-driven path
-        if isinstance(self.grabbers[next(iter(self.grabbers))], WebGrabber) and self.queue is not None:
+        # Event-driven path: one fetch thread per grabber feeds the pipeline as pages change
+        if self.webgrabber in (WebGrabber, HttpGetter):
+            for sport in self.sports:
+                t = threading.Thread(target=self._worker_loop, args=(sport,), daemon=True)
+                t.start()
+                self.threads[sport] = t
             while True:
-                drained = 0
-                # Drain queue without blocking
-                while True:
-                    try:
-                        sport, html = self.queue.get_nowait()
-                    except Empty:
-                        break
-                    drained += 1
-
-                    print(f"Observed a change for {sport}")
-
-                    soup = BeautifulSoup(html, 'lxml')
-                    has_contest_rows = soup.find('tr', id=re.compile(r'^contest_')) is not None
-
-                    if has_contest_rows:
-                        self.parse_failures[sport] = 0
-                        for team in self.sports[sport]:
-                            school_column_soup, hadErr = self.parser.extract_school_column(soup, team)
-                            if hadErr:
-                                print("ERROR EXTRACTING SCHOOL COLUMN")
-
-                            if school_column_soup is not None:
-                                
-                                game_info, hadErr = self.parser.parse_sport_event(school_column_soup, sport)
-                                if hadErr:
-                                    print("ERROR PARSING SPORT EVENT")
-
-                                game_info["sport"] = sport
-                                key = f"{sport}:{team}"
-                                if compare_dicts_excluding_key(game_info, previous_game_info[key], 'time') == False:
-                                    if previous_game_info[key] != '' and isinstance(previous_game_info[key], dict) and previous_game_info[key].get('status') != 'Final' and game_info.get('status') == 'Final':
-                                        print(f'**** GAME WENT FINAL - {sport}:{team} ****')
-
-                                    print(f"Found a change for team: {team} in sport: {sport}")
-                                    dt = game_info.get("time")
-                                    if isinstance(dt, datetime):
-                                        if dt.tzinfo is None:
-                                            dt = dt.replace(tzinfo=timezone.utc)
-                                        dt = dt.astimezone(timezone.utc)
-                                        game_info["time"] = str(dt)
-                                    previous_game_info[key] = game_info
-                                    self.dbputter.insert_school(game_info["home_team"], sport)
-                                    self.dbputter.insert_school(game_info["away_team"], sport)
-                                    self.dbputter.insert_game(game_info)
-                    else:
-                        self.parse_failures[sport] += 1
-                        if self.parse_failures[sport] >= 10:
-                            print(f"Restarting grabber for {sport} after {self.parse_failures[sport]} consecutive parse misses (no contest rows found)")
-                            self.grabbers[sport].restart()
-                            self.parse_failures[sport] = 0
-                        else:
-                            print(f"Parse miss for {sport} (no contest rows yet); attempt {self.parse_failures[sport]}/10")
-
                 schedule.run_pending()
-                # Light sleep; workers block on DOM mutations when enabled
-                if any(getattr(g, 'dom_wait', False) for g in self.grabbers.values() if isinstance(g, WebGrabber)):
-                    time.sleep(0.05)
-                else:
-                    time.sleep(0.5)
-                gc.collect()
+                idle = schedule.idle_seconds()
+                time.sleep(60 if idle is None else min(max(idle, 0), 60))
         else:
-            # Polling path (WebPlayback or legacy)
-            times_queried = 0
+            # Polling path (WebPlayback or legacy): sweep every grabber, then wait the interval
             go = True
             while go:
                 for sport in self.sports:
@@ -790,59 +1711,120 @@ class Controller:
                     if self.webgrabber == WebPlayback and not success:
                         print("#### Done ####")
                         go = False
-
-                    soup = BeautifulSoup(html, 'lxml')
-                    has_contest_rows = soup.find('tr', id=re.compile(r'^contest_')) is not None
-
-                    if has_contest_rows:
-                        self.parse_failures[sport] = 0
-                        for team in self.sports[sport]:
-                            school_column_soup, hadErr = self.parser.extract_school_column(soup, team)
-                            if hadErr:
-                                print("ERROR EXTRACTING SCHOOL COLUMN")
-                            if school_column_soup is not None:
-                                game_info, hadErr = self.parser.parse_sport_event(school_column_soup, sport)
-                                if hadErr:
-                                    print("ERROR PARSING SPORT EVENT")
-                                game_info["sport"] = sport
-                                key = f"{sport}:{team}"
-                                if compare_dicts_excluding_key(game_info, previous_game_info[key], 'time') == False:
-                                    if previous_game_info[key] != '' and isinstance(previous_game_info[key], dict) and previous_game_info[key].get('status') != 'Final' and game_info.get('status') == 'Final':
-                                        print(f'**** GAME WENT FINAL - {sport}:{team} ****')
-                                    dt = game_info.get("time")
-                                    if isinstance(dt, datetime):
-                                        if dt.tzinfo is None:
-                                            dt = dt.replace(tzinfo=timezone.utc)
-                                        dt = dt.astimezone(timezone.utc)
-                                        game_info["time"] = str(dt)
-                                    previous_game_info[key] = game_info
-                                    self.dbputter.insert_school(game_info["home_team"], sport)
-                                    self.dbputter.insert_school(game_info["away_team"], sport)
-                                    self.dbputter.insert_game(game_info)
-                    else:
-                        self.parse_failures[sport] += 1
-                        if self.parse_failures[sport] >= 10:
-                            print(f"Restarting grabber for {sport} after {self.parse_failures[sport]} consecutive parse misses (no contest rows found)")
-                            self.grabbers[sport].restart()
-                            self.parse_failures[sport] = 0
-                        else:
-                            print(f"Parse miss for {sport} (no contest rows yet); attempt {self.parse_failures[sport]}/10")
-
+                    self.parse.put((sport, time.monotonic(), html))
                 schedule.run_pending()
-                times_queried += 1
                 time.sleep(max(self.interval_seconds, 0))
-                gc.collect()
+            self.close()
+
+    def close(self):
+        """Drain and stop the pipeline, upstream first."""
+        for stage in self.stages:
+            stage.close()
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown()
+
+    def _parse(self, item):
+        """parse stage: page -> the teams whose contest container changed since the last snapshot."""
+        sport, observed, html = item
+        teams = self.sports[sport]
+        # Only this worker handles this sport, so the digests sent along are current
+        digests = self.parse_memo.digests
+        known = {key: digests.get(key) for key in (f"{sport}:{team}" for team in teams)}
+        # Network-mode grabbers hand over the scoreboard's own JSON instead of HTML
+        parser = JsonParser if JsonParser.is_payload(html) else self.parser
+        partial = parser is JsonParser or WebGrabber.is_fragment_page(html)
+        # Partial snapshots match teams only by the names they resolved to on the last full page
+        names = dict(self.team_names[sport]) if partial else None
+        args = (parser, sport, html, teams, known, names)
+        results = self.parse_pool.submit(parse_snapshot, *args).result() if self.parse_pool else parse_snapshot(*args)
+        if results is None:
+            return sport, observed, None
+
+        changed = []
+        for team, key, digest, game_info, hadErr, name in results:
+            if not partial:
+                self.team_names[sport][team] = name
+            if self.parse_memo.unchanged(sport, key, digest) or game_info is None:
+                continue
+            if not hadErr:
+                self.parse_memo.remember(key, digest)
+            changed.append((team, key, game_info))
+        return sport, observed, changed
+
+    def _diff(self, item):
+        """diff stage: compare against the previous game_info per team; changes go to the sink."""
+        sport, observed, changed = item
+        if changed is None:
+            self.parse_failures[sport] += 1
+            if self.parse_failures[sport] >= 10:
+                print(f"Restarting grabber for {sport} after {self.parse_failures[sport]} consecutive parse misses (no contest rows found)")
+                self.grabbers[sport].restart()
+                self.parse_failures[sport] = 0
+            else:
+                print(f"Parse miss for {sport} (no contest rows yet); attempt {self.parse_failures[sport]}/10")
+            return None
+
+        self.parse_failures[sport] = 0
+        previous_game_info = self.previous_game_info
+        pending = {}
+        for team, key, game_info in changed:
+            game_info["sport"] = sport
+            if compare_dicts_excluding_key(game_info, previous_game_info[key], 'time') == False:
+                if previous_game_info[key] != '' and isinstance(previous_game_info[key], dict) and previous_game_info[key].get('status') != 'Final' and game_info.get('status') == 'Final':
+                    print(f'**** GAME WENT FINAL - {sport}:{team} ****')
+
+                print(f"Found a change for team: {team} in sport: {sport}")
+                dt = game_info.get("time")
+                if isinstance(dt, datetime):
+                    if dt.tzinfo is None:
+                        dt = dt.replace(tzinfo=timezone.utc)
+                    dt = dt.astimezone(timezone.utc)
+                    game_info["time"] = str(dt)
+                previous_game_info[key] = game_info
+                pending[key] = game_info
+        return (sport, observed, pending) if pending else None
+
+    def _sink(self, items):
+        """sink stage: write everything that changed since the last write as a single batch."""
+        pending = {}
+        for _, _, changed in items:
+            pending.update(changed)
+        try:
+            self.dbputter.put_many(list(pending.values()))
+        except Exception as e:
+            print(f"Failed to store {len(pending)} changed games: {e}")
+            # Forget them so the next observation is treated as a change and retried
+            for key in pending:
+                self.previous_game_info.pop(key, None)
+                self.parse_memo.forget(key)
 
     def _worker_loop(self, sport: str):
         g = self.grabbers[sport]
         while True:
-            success, html = g.query()
+            # query() blocks in the browser until the page changes or its timeout runs out
+            try:
+                success, html = g.query()
+            except Exception as e:
+                # Keep the thread alive, or this sport would never update again
+                self._query_failed(sport, e)
+                continue
+            self.query_failures[sport] = 0
             if success:
-                self.queue.put((sport, html))
-            else:
-                # In polling mode (dom_wait disabled), avoid tight spin
-                if not getattr(g, 'dom_wait', False):
-                    time.sleep(0.25)
+                print(f"Observed a change for {sport}")
+                # Blocks while the parse stage is behind, rather than queueing stale pages
+                self.parse.put((sport, time.monotonic(), html))
+
+    def _query_failed(self, sport: str, error: Exception):
+        self.query_failures[sport] += 1
+        print(f"Query failed for {sport} (attempt {self.query_failures[sport]}/5): {error}")
+        if self.query_failures[sport] >= 5:
+            print(f"Restarting grabber for {sport} after {self.query_failures[sport]} consecutive query errors")
+            self.query_failures[sport] = 0
+            try:
+                self.grabbers[sport].restart()
+            except Exception as e:
+                print(f"Restarting grabber for {sport} failed: {e}")
+        time.sleep(self.QUERY_RETRY_SECONDS)
 
 
 def scraper_main(config_path: str, mode = 'no_db'):
@@ -856,7 +1838,27 @@ def scraper_main(config_path: str, mode = 'no_db'):
     else:
         db_putter_cls = PostgresDatabasePutter
 
-    controller = Controller(config_path, WebGrabber, Parser, db_putter_cls)
+    parser_backend = os.getenv('PARSER_BACKEND', 'soup').lower()
+    if parser_backend not in PARSER_BACKENDS:
+        raise ValueError(f"PARSER_BACKEND must be one of {', '.join(PARSER_BACKENDS)}")
+    print(f"Using parser backend: {parser_backend}")
+    # 0 parses on a pipeline thread; N > 0 parses up to N sports at once in worker processes
+    parse_workers = int(os.getenv('PARSE_WORKERS', '0'))
+    sink_workers = int(os.getenv('SINK_WORKERS', '1'))
+    queue_size = int(os.getenv('PIPELINE_QUEUE_SIZE', '64'))
+    print(f"Parse workers: {parse_workers or 'inline'}, sink workers: {sink_workers}, queue size: {queue_size}")
+    shared_browser = os.getenv('SHARED_BROWSER', '0') in ('1', 'true', 'True')
+    print(f"Browser: {'one shared, a tab per sport' if shared_browser else 'one per sport'}")
+    # 'browser' watches each page in Chrome; 'http' polls it without one, using Chrome only if it has to
+    fetch_mode = os.getenv('FETCH_MODE', 'browser').lower()
+    fetchers = {'browser': WebGrabber, 'http': HttpGetter}
+    if fetch_mode not in fetchers:
+        raise ValueError(f"FETCH_MODE must be one of {', '.join(fetchers)}")
+    print(f"Fetch mode: {fetch_mode}")
+
+    controller = Controller(config_path, fetchers[fetch_mode], PARSER_BACKENDS[parser_backend], db_putter_cls,
+                            parse_workers=parse_workers, sink_workers=sink_workers, queue_size=queue_size,
+                            shared_browser=shared_browser)
     controller.run()
 
 
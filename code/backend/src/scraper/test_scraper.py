@@ -0,0 +1,836 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import lxml.html
+import pandas as pd
+import pytest
+from bs4 import BeautifulSoup, Tag
+from selenium.common.exceptions import JavascriptException, WebDriverException
+
+import db
+import plugins
+import psycopg2
+import scraper
+from scraper import (Controller, DatabasePutter, HttpGetter, JsonParser, LxmlParser, ParseMemo, Parser, PLUGINS,
+                     StrainedParser, PageDigests, SharedBrowser, WebGrabber, WebPlayback, parse_snapshot)
+
+TESTDATA = os.path.join(os.path.dirname(__file__), 'testdata')
+
+
+SNAPSHOTS = sorted(name for name in os.listdir(TESTDATA) if name.endswith('.html'))
+
+
+def _read(name):
+    with open(os.path.join(TESTDATA, name)) as f:
+        return f.read()
+
+
+def _load(name):
+    return BeautifulSoup(_read(name), 'lxml')
+
+
+def _contest_id(column):
+    return column.find('tr', id=Parser.CONTEST_ROW_ID)['id']
+
+
+@pytest.fixture
+def basketball():
+    return _load('scoreboard_basketball_m.html')
+
+
+def test_contest_index_maps_names_and_aliases(basketball):
+    index = Parser.build_contest_index(basketball)
+    assert _contest_id(index['utahst']) == 'contest_6400104'
+    assert _contest_id(index['montanast10']) == 'contest_6400102'  # link text with the record
+    assert _contest_id(index['miamifl']) == 'contest_6400105'
+    assert index['montana'] is not index['montanast']
+
+
+@pytest.mark.parametrize('team, contest', [
+    ('Utah St.', 'contest_6400104'),
+    ('Alabama St. ', 'contest_6400105'),    # trailing space as in config.json
+    ('Montana', 'contest_6400104'),         # exact name beats the earlier 'Montana St.'
+    ('Leh', 'contest_6400101'),             # partial name falls back to a substring match
+    ('Miami', 'contest_6400105'),
+])
+def test_lookup_school_column(basketball, team, contest):
+    column, had_err = Parser.lookup_school_column(Parser.build_contest_index(basketball), team)
+    assert not had_err
+    assert _contest_id(column) == contest
+
+
+def test_lookup_unknown_team(basketball):
+    index = Parser.build_contest_index(basketball)
+    assert Parser.lookup_school_column(index, 'Wyoming') == (None, False)
+    assert Parser.extract_school_column(basketball, 'Wyoming') == (None, False)
+
+
+def test_parse_from_indexed_column(basketball):
+    column, _ = Parser.lookup_school_column(Parser.build_contest_index(basketball), 'Texas Southern')
+    game_info, had_err = Parser.parse_sport_event(column, 'Basketball (M)')
+    assert not had_err
+    assert game_info['home_team'] == 'Texas Southern' and game_info['away_team'] == 'Southern U.'
+    assert game_info['status'] == 'Final' and game_info['score'] == [68, 68] and game_info['winner'] == 'tie'
+
+
+def _any_contest_id(column):
+    if isinstance(column, Tag):
+        return _contest_id(column)
+    return column.xpath('.//tr[starts-with(@id, "contest_")]')[0].get('id')
+
+
+@pytest.mark.parametrize('backend', [StrainedParser, LxmlParser], ids=['strained', 'lxml'])
+@pytest.mark.parametrize('snapshot', SNAPSHOTS)
+def test_backend_matches_soup(snapshot, backend):
+    html = _read(snapshot)
+    soup_page, page = Parser.parse_page(html), backend.parse_page(html)
+    assert Parser.has_contest_rows(soup_page) and backend.has_contest_rows(page)
+
+    soup_index = Parser.build_contest_index(soup_page)
+    index = backend.build_contest_index(page)
+    assert list(soup_index) == list(index)
+
+    # Every team on the page through every sport plugin, including the ones that fail to parse
+    for team in soup_index:
+        soup_column, _ = Parser.lookup_school_column(soup_index, team)
+        column, _ = backend.lookup_school_column(index, team)
+        assert _contest_id(soup_column) == _any_contest_id(column)
+        for sport in PLUGINS:
+            expected = Parser.parse_sport_event(soup_column, sport)
+            assert backend.parse_sport_event(column, sport) == expected, (team, sport)
+
+
+def test_strained_parse_keeps_only_scoreboard_cards():
+    page = StrainedParser.parse_page(_read('scoreboard_basketball_m.html'))
+    assert page.find('nav') is None and page.find('script') is None and page.find('footer') is None
+    assert len(page.find_all('tr', id=Parser.CONTEST_ROW_ID)) == 10
+
+
+def test_lxml_backend_handles_empty_page():
+    page = LxmlParser.parse_page('')
+    assert not LxmlParser.has_contest_rows(page)
+    assert LxmlParser.build_contest_index(page) == {}
+
+
+@pytest.mark.parametrize('backend', [Parser, StrainedParser, LxmlParser], ids=['soup', 'strained', 'lxml'])
+def test_container_digest_tracks_only_that_game(backend):
+    html = _read('scoreboard_basketball_m.html')
+    # A clock tick in the Montana St. game must not change the Utah St. container
+    ticked = html.replace('<span id="clock_6400102">07:41</span>', '<span id="clock_6400102">07:12</span>')
+    before = backend.build_contest_index(backend.parse_page(html))
+    after = backend.build_contest_index(backend.parse_page(ticked))
+
+    assert backend.container_digest(before['utahst']) == backend.container_digest(after['utahst'])
+    assert backend.container_digest(before['montanast']) != backend.container_digest(after['montanast'])
+
+
+def test_parse_memo_hit_rates():
+    memo = ParseMemo()
+    assert not memo.unchanged('Football', 'Football:Utah St.', b'a')
+    memo.remember('Football:Utah St.', b'a')
+    assert memo.unchanged('Football', 'Football:Utah St.', b'a')
+    assert not memo.unchanged('Football', 'Football:Utah St.', b'b')
+    memo.remember('Football:Utah St.', b'b')
+    memo.forget('Football:Utah St.')
+    assert not memo.unchanged('Football', 'Football:Utah St.', b'b')
+    assert memo.stats() == {'Football': {'lookups': 4, 'hits': 1, 'hit_rate': 0.25}}
+
+
+
+class _CollectingPutter(DatabasePutter):
+    def __init__(self, config):
+        self.written = []
+
+    def put_many(self, game_infos):
+        self.written += game_infos
+
+
+def _playback(tmp_path, monkeypatch, putter=_CollectingPutter, **pipeline):
+    """Run the Controller over recordings of the fixtures: each page, the same page again, then no scoreboard."""
+    teams = defaultdict(list)
+    os.makedirs(tmp_path / 'recordings')
+    for name, sport in [('scoreboard_basketball_m.html', 'Basketball (M)'),
+                        ('scoreboard_volleyball_w.html', 'Volleyball (W)'),
+                        ('scoreboard_baseball.html', 'Baseball')]:
+        html = _read(name)
+        for team in sorted(Parser.build_contest_index(Parser.parse_page(html)))[:4]:
+            teams[team].append(sport)
+        pd.DataFrame({'html_text': [html, html, '<html><body></body></html>']}).to_parquet(
+            tmp_path / 'recordings' / f'{sport}_2025-10-04.parquet')
+    config = {'teams': [{'name': team, 'sports': sports} for team, sports in teams.items()],
+              'timing': {'interval_seconds': 0}}
+    (tmp_path / 'config.json').write_text(json.dumps(config))
+
+    monkeypatch.chdir(tmp_path)
+    controller = Controller(str(tmp_path / 'config.json'), WebPlayback, Parser, putter,
+                            playback_date=date(2025, 10, 4), **pipeline)
+    controller.run()
+    return controller
+
+
+def test_pipeline_playback(tmp_path, monkeypatch):
+    controller = _playback(tmp_path, monkeypatch)
+    written = controller.dbputter.written
+    # Only the first snapshot is a change for each configured team; the repeat is all memo hits
+    assert sorted(Counter(g['sport'] for g in written).items()) == sorted(
+        (sport, len(teams)) for sport, teams in controller.sports.items())
+    stats = controller.pipeline_stats()
+    assert stats['parse']['processed'] == 3 * 4  # three recorded pages plus the final empty query, per sport
+    assert all(stage['depth'] == 0 for stage in stats.values())
+    assert controller.parse_failures == {'Basketball (M)': 2, 'Volleyball (W)': 2, 'Baseball': 2}
+
+
+def test_pipeline_parse_workers_match_inline(tmp_path, monkeypatch):
+    inline = _playback(tmp_path / 'inline', monkeypatch)
+    pooled = _playback(tmp_path / 'pooled', monkeypatch, parse_workers=2, sink_workers=2)
+
+    def by_sport(controller):
+        return {sport: [g for g in controller.dbputter.written if g['sport'] == sport] for sport in controller.sports}
+
+    assert by_sport(pooled) == by_sport(inline)
+
+
+class _ThreadCheckingDatabase:
+    """Stands in for db.Database: records which threads used it and whether any two overlapped."""
+    opened = []
+
+    def __init__(self, *args):
+        self.threads = set()
+        self.overlaps = 0
+        self.busy = threading.Lock()
+        self.written = []
+        _ThreadCheckingDatabase.opened.append(self)
+
+    def insert_sport(self, name):
+        self.threads.add(threading.get_ident())
+
+    def put_games(self, games):
+        if not self.busy.acquire(blocking=False):
+            self.overlaps += 1
+            return 0
+        try:
+            self.threads.add(threading.get_ident())
+            time.sleep(0.01)  # hold the "transaction" open long enough for another worker to collide
+            self.written += games
+        finally:
+            self.busy.release()
+        return len(games)
+
+
+def test_pipeline_sink_workers_get_their_own_connection(tmp_path, monkeypatch):
+    monkeypatch.setattr(scraper, 'Database', _ThreadCheckingDatabase)
+    monkeypatch.setattr(_ThreadCheckingDatabase, 'opened', [])
+    controller = _playback(tmp_path, monkeypatch, putter=scraper.PostgresDatabasePutter, sink_workers=3)
+
+    opened = _ThreadCheckingDatabase.opened
+    assert all(len(db.threads) == 1 and db.overlaps == 0 for db in opened)
+    assert len({thread for db in opened for thread in db.threads}) == len(opened)
+    assert sum(len(db.written) for db in opened) == sum(len(teams) for teams in controller.sports.values())
+
+
+class _FailingConnection:
+    """A psycopg2 connection whose every statement fails, as after a bad value from a plugin."""
+
+    def __init__(self):
+        self.rollbacks = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, args=None):
+        raise psycopg2.DataError('invalid input syntax for type date: "TBA"')
+
+    def commit(self):
+        raise AssertionError('commit after a failed statement')
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_database_rolls_back_any_failed_write(monkeypatch):
+    database = db.Database.__new__(db.Database)
+    database.conn = _FailingConnection()
+    database.cur = database.conn.cursor()
+    game = {'date': 'TBA', 'time': None, 'away_team': 'Wyoming', 'home_team': 'Utah St.',
+            'score': {}, 'winner': None, 'sport': 'Football'}
+    for write, args in ((database.insert_game, (game,)), (database.insert_school, ('Nowhere St.', 'Football')),
+                        (database.insert_sport, ('Quidditch',))):
+        with pytest.raises(psycopg2.DataError):
+            write(*args)
+    assert database.conn.rollbacks == 3
+
+
+class _FakeDriver:
+    """Stands in for Chrome: execute_async_script returns the scripted change counters in turn."""
+
+    def __init__(self, counters):
+        self.counters = list(counters)
+        self.page_source = '<html>0</html>'
+        self.installs = 0
+        self.waits = []
+        self.dirty = []
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def get(self, url):
+        pass
+
+    def execute_script(self, script, *args):
+        if script == WebGrabber.READ_DIRTY_JS:
+            cards, self.dirty = self.dirty, []
+            return cards
+        self.installs += 1
+        return [0, 'body']
+
+    def execute_async_script(self, script, last, timeout_ms):
+        self.waits.append((last, timeout_ms))
+        counter = self.counters.pop(0)
+        if isinstance(counter, Exception):
+            raise counter
+        if counter > last:
+            self.page_source = f'<html>{counter}</html>'
+        return counter
+
+
+def test_web_grabber_waits_in_browser(monkeypatch):
+    driver = _FakeDriver([0, 2, 2, -1, 1])
+    monkeypatch.setattr(scraper.webdriver, 'Chrome', lambda options: driver)
+    monkeypatch.setenv('DOM_WAIT', '1')
+    monkeypatch.setenv('DOM_WAIT_TIMEOUT', '3')
+    grabber = WebGrabber('http://scoreboard.test/')
+
+    assert grabber.query() == (True, '<html>0</html>')  # first snapshot without waiting
+    assert grabber.query() == (False, None)  # wait timed out with no mutation
+    assert grabber.query() == (True, '<html>2</html>')
+    assert grabber.query() == (False, None)
+    assert driver.installs == 1
+    assert grabber.query() == (False, None)  # observer gone: reinstall, counter restarts at 0
+    assert driver.installs == 2
+    assert grabber.query() == (True, '<html>1</html>')
+    assert driver.waits == [(0, 3000), (0, 3000), (2, 3000), (2, 3000), (0, 3000)]
+
+
+def test_web_grabber_survives_driver_errors_while_waiting(monkeypatch):
+    unloaded = JavascriptException('javascript error: document unloaded while waiting for result')
+    driver = _FakeDriver([unloaded, WebDriverException('tab crashed'), 1])
+    monkeypatch.setattr(scraper.webdriver, 'Chrome', lambda options: driver)
+    grabber = WebGrabber('http://scoreboard.test/')
+    grabber.query()
+
+    assert grabber.query() == (False, None)
+    assert grabber.query() == (False, None)
+    assert driver.installs == 3  # reinstalled after each failed wait
+    assert grabber.query() == (True, '<html>1</html>')
+
+
+class _StopWorker(BaseException):
+    pass
+
+
+class _FlakyGrabber:
+    def __init__(self, results):
+        self.results = list(results)
+        self.restarts = 0
+
+    def query(self):
+        result = self.results.pop(0)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def restart(self, url=None):
+        self.restarts += 1
+
+
+def test_worker_loop_outlives_query_errors(monkeypatch):
+    controller = Controller.__new__(Controller)
+    controller.QUERY_RETRY_SECONDS = 0
+    controller.query_failures = defaultdict(int)
+    controller.grabbers = {'Football': _FlakyGrabber([RuntimeError('boom')] * 6 + [(True, '<html>1</html>'), _StopWorker()])}
+    controller.parse = type('_Inbox', (), {'items': [], 'put': lambda self, item: self.items.append(item)})()
+
+    with pytest.raises(_StopWorker):
+        controller._worker_loop('Football')
+    assert controller.grabbers['Football'].restarts == 1  # after the fifth error in a row
+    assert [html for _, _, html in controller.parse.items] == ['<html>1</html>']
+    assert controller.query_failures['Football'] == 0
+
+
+def test_web_grabber_fragments_parse_like_the_page(monkeypatch):
+    html = _read('scoreboard_basketball_m.html')
+    index = LxmlParser.build_contest_index(LxmlParser.parse_page(html))
+    team = next(iter(index))
+    driver = _FakeDriver([1, 2, 3])
+    monkeypatch.setattr(scraper.webdriver, 'Chrome', lambda options: driver)
+    monkeypatch.setenv('QUERY_MODE', 'fragments')
+    grabber = WebGrabber('http://scoreboard.test/')
+    grabber.query()
+
+    # The observer marked one game dirty: only its card comes back, and it parses the same
+    driver.dirty = [lxml.html.tostring(index[team], encoding='unicode', with_tail=False)]  # like outerHTML
+    success, fragment = grabber.query()
+    assert success and len(fragment) < len(html) / 5
+    for backend in (Parser, StrainedParser, LxmlParser):
+        fragment_index = backend.build_contest_index(backend.parse_page(fragment))
+        full_index = backend.build_contest_index(backend.parse_page(html))
+        column, _ = backend.lookup_school_column(fragment_index, team)
+        assert backend.container_digest(column) == backend.container_digest(full_index[team])
+        assert backend.parse_sport_event(column, 'Basketball (M)') == backend.parse_sport_event(full_index[team], 'Basketball (M)')
+
+    # Mutations outside any contest card leave nothing to send
+    assert grabber.query() == (False, None)
+
+
+def _contest_json(column):
+    """A contest as live-update JSON: every plugin's fields by name, links as {"href": ...}."""
+    def plain(value):
+        if isinstance(value, Tag):
+            return {'href': value.get('href')}
+        if isinstance(value, dict):
+            return {key: plain(v) for key, v in value.items()}
+        if isinstance(value, list):
+            return [plain(v) for v in value]
+        return value
+    contest = {}
+    for plugin in PLUGINS.values():
+        contest.update(plain(plugins.SOUP.extract(plugin.PLAN, column)))
+    return json.loads(json.dumps(contest))
+
+
+def test_fragments_match_only_the_names_seen_on_the_full_page(basketball):
+    html = _read('scoreboard_basketball_m.html')
+    index = Parser.build_contest_index(basketball)
+    assert index['montana'] is not index['montanast']
+    controller = Controller.__new__(Controller)
+    controller.sports = {'Basketball (M)': ['Montana', 'Montana St.', 'Leh']}
+    controller.parser, controller.parse_pool = Parser, None
+    controller.parse_memo, controller.team_names = ParseMemo(), defaultdict(dict)
+
+    _, _, changed = controller._parse(('Basketball (M)', 0.0, html))
+    assert sorted(team for team, _, _ in changed) == ['Leh', 'Montana', 'Montana St.']
+    assert controller.team_names['Basketball (M)'] == {'Montana': 'montana', 'Montana St.': 'montanast', 'Leh': 'lehigh'}
+
+    # Only Montana St.'s card changed: Montana must not be bound to it, 'Leh' still finds Lehigh
+    card = str(index['montanast']).replace('Montana St.', 'Montana St. ')
+    fragment = WebGrabber.FRAGMENT_PAGE.format(card + str(index['lehigh']).replace('Lehigh', 'Lehigh '))
+    _, _, changed = controller._parse(('Basketball (M)', 1.0, fragment))
+    assert sorted(team for team, _, _ in changed) == ['Leh', 'Montana St.']
+    # Without a full page seen yet, a fragment only matches exact names
+    results = parse_snapshot(Parser, 'Basketball (M)', WebGrabber.FRAGMENT_PAGE.format(card), ['Montana', 'Montana St.'], {}, {})
+    assert [r[0] for r in results] == ['Montana St.']
+
+
+@pytest.mark.parametrize('snapshot', SNAPSHOTS)
+def test_json_parser_matches_soup(snapshot):
+    index = Parser.build_contest_index(Parser.parse_page(_read(snapshot)))
+    columns = list({id(column): column for column in index.values()}.values())
+    payload = json.dumps({'contests': [_contest_json(column) for column in columns]})
+    json_index = JsonParser.build_contest_index(JsonParser.parse_page(payload))
+    assert json_index
+
+    for team, contest in json_index.items():
+        column, _ = Parser.lookup_school_column(index, team)
+        assert column is not None, team
+        for sport in PLUGINS:
+            assert JsonParser.parse_sport_event(contest, sport) == Parser.parse_sport_event(column, sport), (team, sport)
+
+    # The same snapshot through the pipeline's parse step; unchanged contests skip the plugin
+    teams = list(json_index)[:3]
+    results = parse_snapshot(JsonParser, 'Basketball (M)', payload, teams, {})
+    assert [r[0] for r in results] == teams
+    known = {key: digest for _, key, digest, *_ in results}
+    assert all(r[3] is None for r in parse_snapshot(JsonParser, 'Basketball (M)', payload, teams, known))
+
+
+class _FakeNetworkDriver(_FakeDriver):
+    """_FakeDriver plus a performance log and Network.getResponseBody, as Chrome's CDP serves them."""
+
+    def __init__(self, counters):
+        super().__init__(counters)
+        self.log = []
+        self.bodies = {}
+
+    def respond(self, request_id, url, body, kind='XHR', finished=True, encode=False):
+        self.log.append({'method': 'Network.responseReceived',
+                         'params': {'requestId': request_id, 'type': kind, 'response': {'url': url}}})
+        if finished:
+            self.finish(request_id)
+        self.bodies[request_id] = ({'body': base64.b64encode(body.encode()).decode(), 'base64Encoded': True}
+                                   if encode else {'body': body, 'base64Encoded': False})
+
+    def finish(self, request_id):
+        self.log.append({'method': 'Network.loadingFinished', 'params': {'requestId': request_id}})
+
+    def get_log(self, kind):
+        assert kind == 'performance'
+        entries, self.log = self.log, []
+        return [{'message': json.dumps({'message': message})} for message in entries]
+
+    def execute_cdp_cmd(self, command, params):
+        assert command == 'Network.getResponseBody'
+        return self.bodies[params['requestId']]
+
+
+def test_web_grabber_network_mode_reads_responses(monkeypatch):
+    driver = _FakeNetworkDriver([1, 1, 2, 3, 4])
+    captured = {}
+    monkeypatch.setattr(scraper.webdriver, 'Chrome', lambda options: captured.setdefault('options', options) and driver)
+    monkeypatch.setenv('QUERY_MODE', 'network')
+    grabber = WebGrabber('http://scoreboard.test/')
+    assert captured['options'].to_capabilities()['goog:loggingPrefs'] == {'performance': 'ALL'}
+    assert grabber.query() == (True, '<html>0</html>')  # first snapshot is still the page
+
+    home = {'teams': [{'name': 'Wyoming', 'score': '1'}, {'name': 'Utah St.', 'score': '2'}]}
+    driver.respond('1', 'http://scoreboard.test/scores.json', json.dumps({'contests': [home]}))
+    driver.respond('2', 'http://scoreboard.test/logo.png', 'png', kind='Image')
+    driver.respond('3', 'http://ads.test/track', '{}')
+    driver.respond('4', 'http://scoreboard.test/scores.json', '{"contests": []}', finished=False)
+    success, payload = grabber.query()
+    assert success and json.loads(payload) == {'contests': [home]}
+    assert driver.page_source == '<html>1</html>'  # page_source itself was never read again
+
+    # The same scores again: nothing to send, even though a response arrived
+    driver.respond('5', 'http://scoreboard.test/scores.json', json.dumps({'contests': [home]}))
+    assert grabber.query() == (False, None)
+
+    # A response that finishes later is read then; newer contests come first in the merged payload
+    newer = {'teams': [{'name': 'Wyoming', 'score': '1'}, {'name': 'Utah St.', 'score': '5'}]}
+    driver.bodies['4'] = {'body': json.dumps({'contests': [home]}), 'base64Encoded': False}
+    driver.finish('4')
+    driver.respond('6', 'http://scoreboard.test/scores.json', json.dumps({'contests': [newer]}), kind='Fetch', encode=True)
+    success, payload = grabber.query()
+    contest = JsonParser.build_contest_index(JsonParser.parse_page(payload))['utahst']
+    assert success and contest == newer
+
+    # HTML fragments are passed on like QUERY_MODE=fragments
+    card = '<div class="card"><table><tr id="contest_1"><td>x</td></tr></table></div>'
+    driver.respond('7', 'http://scoreboard.test/scoreboard/refresh', card)
+    assert grabber.query() == (True, WebGrabber.FRAGMENT_PAGE.format(card))
+
+
+def test_web_grabber_network_mode_falls_back_to_the_page(monkeypatch):
+    driver = _FakeNetworkDriver([1, 1, 2])
+    monkeypatch.setattr(scraper.webdriver, 'Chrome', lambda options: driver)
+    monkeypatch.setenv('QUERY_MODE', 'network')
+    grabber = WebGrabber('http://scoreboard.test/')
+    grabber.query()
+
+    # A JSON body of some other shape: the DOM changed, so the page is read instead
+    driver.respond('1', 'http://scoreboard.test/scores.json', json.dumps({'data': {'games': [{'id': 1}]}}))
+    assert grabber.query() == (True, '<html>1</html>')
+    # Nothing usable and no DOM change: nothing to send
+    driver.respond('2', 'http://scoreboard.test/scores.json', '[1, 2, "three"]')
+    assert grabber.query() == (False, None)
+    driver.respond('3', 'http://scoreboard.test/scores.json', '[{"teams": "Wyoming"}, null]')
+    assert grabber.query() == (True, '<html>2</html>')
+
+
+def test_web_grabber_network_mode_reads_the_page_for_other_bodies(monkeypatch):
+    driver = _FakeNetworkDriver([1, 2, 2])
+    monkeypatch.setattr(scraper.webdriver, 'Chrome', lambda options: driver)
+    monkeypatch.setenv('QUERY_MODE', 'network')
+    grabber = WebGrabber('http://scoreboard.test/')
+    grabber.query()
+
+    # JSONP, scripts and text are not fragments: the changed page is read instead
+    driver.respond('1', 'http://scoreboard.test/livestream.js', 'callback({"x": 1})')
+    driver.respond('2', 'http://scoreboard.test/scoreboard/status', 'ok')
+    assert WebGrabber.network_payload(['callback("x")', 'ok']) is None
+    assert grabber.query() == (True, '<html>1</html>')
+
+    # Contests and fragments in one drain: neither alone is the whole update, so read the page
+    card = '<div class="card"><table><tr id="contest_7"><td>x</td></tr></table></div>'
+    contest = {'teams': [{'name': 'Wyoming'}, {'name': 'Utah St.'}]}
+    driver.respond('3', 'http://scoreboard.test/scores.json', json.dumps({'contests': [contest]}))
+    driver.respond('4', 'http://scoreboard.test/scoreboard/refresh', card)
+    assert grabber.query() == (True, '<html>2</html>')
+    # Even when the observer hasn't seen the DOM change yet
+    driver.page_source = '<html>2b</html>'
+    driver.respond('5', 'http://scoreboard.test/scores.json', json.dumps([contest]))
+    driver.respond('6', 'http://scoreboard.test/scoreboard/refresh', card)
+    assert grabber.query() == (True, '<html>2b</html>')
+
+
+def test_json_parser_keeps_only_contests():
+    contest = {'teams': [{'name': 'Wyoming'}, {'name': 'Utah St.'}]}
+    payload = json.dumps([1, 'two', None, {'teams': 'Wyoming'}, {'teams': [{'score': 3}]}, contest])
+    assert JsonParser.parse_page(payload) == [contest]
+    assert set(JsonParser.build_contest_index(JsonParser.parse_page(payload))) == {'wyoming', 'utahst'}
+    assert JsonParser.parse_page('{"contests": {"id": 1}}') == []
+    assert JsonParser.build_contest_index(JsonParser.parse_page('[1, 2, 3]')) == {}
+    assert WebGrabber.network_payload(['[1, 2, 3]', '{"status": "ok"}']) is None
+
+
+def test_page_digests_count_flapping():
+    digests = PageDigests(ring=3)
+    big = 'x' * (PageDigests.CHUNK * 2 + 5)
+    assert digests.changed(big)
+    assert not digests.changed('x' * (PageDigests.CHUNK * 2 + 5))
+    assert digests.changed(big + 'y')
+    assert digests.changed(big)  # back to A: still a change, but counted as a flap
+    assert digests.flaps == 1
+    for page in ('c', 'd', 'e'):
+        digests.changed(page)
+    assert digests.changed(big + 'y') and digests.flaps == 1  # fell out of the ring
+
+
+class _FakeTabbedChrome:
+    """One fake WebDriver session with tabs; fails if two commands ever overlap."""
+
+    def __init__(self, options=None):
+        self.options = options
+        self.handles = ['tab-0']
+        self.current_window_handle = 'tab-0'
+        self.urls = {}
+        self.blocked = {}
+        self.changes = defaultdict(int)
+        self.waits = []
+        self.busy = False
+        self.switch_to = self
+
+    @property
+    def window_handles(self):
+        return list(self.handles)
+
+    def _command(self):
+        assert not self.busy, 'driver used by two threads at once'
+        self.busy = True
+        time.sleep(0.0005)
+        self.busy = False
+        return self.current_window_handle
+
+    def window(self, handle):
+        self.current_window_handle = handle
+
+    def new_window(self, kind):
+        self.handles.append(f'tab-{len(self.handles)}')
+        self.current_window_handle = self.handles[-1]
+
+    def close(self):
+        self.handles.remove(self._command())
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def get(self, url):
+        self.urls[self._command()] = url
+
+    def refresh(self):
+        self._command()
+
+    def execute_cdp_cmd(self, command, params):
+        tab = self._command()
+        if command == 'Network.setBlockedURLs':
+            assert tab not in self.urls, 'blocked after the page loaded'
+            self.blocked[tab] = params['urls']
+        return {}
+
+    @property
+    def page_source(self):
+        tab = self._command()
+        return f'<html>{self.urls[tab]} {self.changes[tab]}</html>'
+
+    def execute_script(self, script, *args):
+        self._command()
+        return [0, 'body']
+
+    def execute_async_script(self, script, last, timeout_ms):
+        tab = self._command()
+        self.waits.append(timeout_ms)
+        self.changes[tab] += 1
+        return last + 1
+
+
+def test_shared_browser_serializes_tabs(monkeypatch):
+    chrome = _FakeTabbedChrome()
+    monkeypatch.setattr(scraper.webdriver, 'Chrome', lambda options: chrome)
+    monkeypatch.setenv('DOM_WAIT', '1')
+    monkeypatch.setenv('SHARED_WAIT_SLICE', '0.5')
+    browser = SharedBrowser()
+    urls = [f'http://scoreboard.test/{sport}' for sport in ('MBB', 'WVB', 'MBA')]
+    grabbers = [WebGrabber(url, browser=browser) for url in urls]
+    assert len(chrome.handles) == 3
+
+    pages = defaultdict(list)
+
+    def work(grabber):
+        for _ in range(30):
+            success, html = grabber.query()
+            assert success
+            pages[grabber.url].append(html)
+
+    threads = [threading.Thread(target=work, args=(g,)) for g in grabbers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for url in urls:
+        assert pages[url] == [f'<html>{url} {n}</html>' for n in range(30)]
+    assert set(chrome.waits) == {500}  # DOM_WAIT_TIMEOUT capped to the shared slice
+    assert chrome.blocked == {}  # BLOCK_RESOURCES defaults to none
+    grabbers[1].quit()
+    assert len(chrome.handles) == 2
+
+
+def test_block_resources_before_loading(monkeypatch):
+    monkeypatch.setenv('BLOCK_RESOURCES', 'assets')
+    monkeypatch.setenv('BLOCK_URLS', '*doubleclick.net*, *googletagmanager.com*')
+    chrome, starts = _FakeTabbedChrome(), []
+    monkeypatch.setattr(scraper.webdriver, 'Chrome', lambda options: starts.append(options) or chrome.__init__(options) or chrome)
+
+    # Own browser: flags on the command line, blocked URLs set before the first get()
+    grabber = WebGrabber('http://scoreboard.test/MBB')
+    assert {'--blink-settings=imagesEnabled=false', '--renderer-process-limit=1'} <= set(chrome.options.arguments)
+    urls = chrome.blocked['tab-0']
+    assert {'*.svg*', '*.woff*', '*.css*', '*doubleclick.net*', '*googletagmanager.com*'} <= set(urls)
+    grabber.restart()  # a refresh keeps the tab's blocking
+    assert len(starts) == 1 and chrome.blocked == {'tab-0': urls}
+
+    # Shared browser: every tab gets the same list before it loads
+    browser = SharedBrowser()
+    for sport in ('MBB', 'WVB'):
+        WebGrabber(f'http://scoreboard.test/{sport}', browser=browser)
+    assert chrome.blocked == {'tab-0': urls, 'tab-1': urls}
+    assert '--disable-background-timer-throttling' in chrome.options.arguments
+    assert '--renderer-process-limit=1' in chrome.options.arguments
+
+    monkeypatch.setenv('BLOCK_RESOURCES', 'everything')
+    assert scraper.blocking_profile() == (('*doubleclick.net*', '*googletagmanager.com*'), ())
+
+
+class _ReplayServer:
+    """Local stand-in for the scoreboard: each GET serves the next recorded page, with an ETag if asked."""
+
+    def __init__(self, pages, etags=True):
+        self.pages = list(pages)
+        self.requests = []
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                replay.requests.append(dict(self.headers))
+                page = replay.pages.pop(0) if len(replay.pages) > 1 else replay.pages[0]
+                etag = '"%s"' % hashlib.md5(page.encode()).hexdigest()
+                if etags and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = page.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                if etags:
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}/scoreboard'
+
+    def close(self):
+        self.server.shutdown()
+
+
+@pytest.fixture
+def http_intervals(monkeypatch):
+    monkeypatch.setenv('HTTP_MIN_INTERVAL', '0.001')
+    monkeypatch.setenv('HTTP_MAX_INTERVAL', '0.003')
+    monkeypatch.setenv('HTTP_BACKOFF', '2')
+
+
+def test_http_getter_conditional_get_and_backoff(http_intervals):
+    first, second = _read('scoreboard_basketball_m.html'), _read('scoreboard_volleyball_w.html')
+    server = _ReplayServer([first, first, first, second])
+    getter = HttpGetter(server.url)
+    try:
+        assert getter.query() == (True, first)
+        assert getter.interval == 0.001
+        assert getter.query() == (False, None)  # 304
+        assert getter.interval == 0.002
+        assert getter.query() == (False, None)
+        assert getter.interval == 0.003  # capped
+        assert getter.query() == (True, second)
+        assert getter.interval == 0.001  # changed: back to the fastest poll
+    finally:
+        getter.quit()
+        server.close()
+    assert 'If-None-Match' not in server.requests[0]
+    assert server.requests[1]['If-None-Match'] == server.requests[3]['If-None-Match']
+    assert dict(getter.stats) == {'requests': 4, 'changed': 2, 'not_modified': 2}
+
+
+def test_http_getter_skips_unchanged_bodies_without_etags(http_intervals):
+    page = _read('scoreboard_baseball.html')
+    server = _ReplayServer([page], etags=False)
+    getter = HttpGetter(server.url)
+    try:
+        assert getter.query() == (True, page)
+        assert getter.query() == (False, None)
+    finally:
+        getter.quit()
+        server.close()
+    assert getter.stats['unchanged'] == 1
+
+
+def test_http_getter_falls_back_to_browser(http_intervals, monkeypatch):
+    class _Browser:
+        def __init__(self, url, browser=None):
+            self.url = url
+
+        def query(self):
+            return True, '<html>rendered</html>'
+
+        def quit(self):
+            pass
+
+    monkeypatch.setattr(scraper, 'WebGrabber', _Browser)
+    monkeypatch.setenv('HTTP_FALLBACK_AFTER', '2')
+    shell = '<html><body><div id="app"></div></body></html>'
+    scoreboard = _read('scoreboard_baseball.html')
+    server = _ReplayServer([shell, shell, scoreboard], etags=False)
+    getter = HttpGetter(server.url)
+    try:
+        assert getter.query() == (True, shell)
+        assert getter.query() == (True, '<html>rendered</html>')
+        assert getter.query() == (True, '<html>rendered</html>')
+        assert len(server.requests) == 2
+        getter.restart()  # the daily restart tries plain HTTP again
+        assert getter.fallback is None
+        assert getter.query() == (True, scoreboard)
+    finally:
+        getter.quit()
+        server.close()
+    assert len(server.requests) == 3
+
+
+def test_http_getter_stays_browserless_with_no_games(http_intervals, monkeypatch):
+    monkeypatch.setattr(scraper, 'WebGrabber', lambda url, browser=None: pytest.fail('fell back to the browser'))
+    monkeypatch.setenv('HTTP_FALLBACK_AFTER', '2')
+    off_day = ('<html><body><nav class="navbar"><a class="navbar-brand" href="/">NCAA Statistics</a></nav>'
+               '<div class="container-fluid"><h3>Baseball scoreboard</h3>'
+               '<div class="row justify-content-center"></div></div></body></html>')
+    server = _ReplayServer([off_day, off_day, off_day, off_day, _read('scoreboard_baseball.html')], etags=False)
+    getter = HttpGetter(server.url)
+    try:
+        assert getter.query() == (True, off_day)
+        for _ in range(3):
+            assert getter.query() == (False, None)
+        success, html = getter.query()  # the schedule is posted
+        assert success and HttpGetter.CONTEST_ROW.search(html)
+    finally:
+        getter.quit()
+        server.close()
+    assert getter.misses == 0